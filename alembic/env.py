@@ -21,10 +21,14 @@ if config.config_file_name is not None:
 # for 'autogenerate' support
 # from myapp import mymodel
 # target_metadata = mymodel.Base.metadata
+from app.config import settings
 from app.database import Base
 from app.models import *
 target_metadata = Base.metadata
 
+# Той самий DATABASE_URL, що й у застосунку
+config.set_main_option("sqlalchemy.url", settings.database_url.replace("%", "%%"))
+
 # other values from the config, defined by the needs of env.py,
 # can be acquired:
 # my_important_option = config.get_main_option("my_important_option")
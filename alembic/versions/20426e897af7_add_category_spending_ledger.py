@@ -0,0 +1,41 @@
+"""add category spending ledger
+
+Revision ID: 20426e897af7
+Revises: 'c443cb982127'
+Create Date: 2025-09-02 19:12:41.208315
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '20426e897af7'
+down_revision = 'c443cb982127'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('category_spending',
+    sa.Column('owner_id', sa.Integer(), nullable=False),
+    sa.Column('category_id', sa.Integer(), nullable=False),
+    sa.Column('month', sa.Date(), nullable=False),
+    sa.Column('total', sa.Float(), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['category_id'], ['expense_categories.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['owner_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('owner_id', 'category_id', 'month')
+    )
+    # Заповнюємо леджер з наявних витрат
+    op.execute("""
+        INSERT INTO category_spending (owner_id, category_id, month, total, count)
+        SELECT owner_id, category_id, date_trunc('month', date)::date, SUM(amount), COUNT(*)
+        FROM expenses
+        WHERE owner_id IS NOT NULL AND category_id IS NOT NULL AND date IS NOT NULL
+        GROUP BY owner_id, category_id, date_trunc('month', date)::date
+    """)
+
+
+def downgrade() -> None:
+    op.drop_table('category_spending')
@@ -0,0 +1,32 @@
+"""add user advices
+
+Revision ID: 3a8d5e2f7b61
+Revises: '9b2f4c6e1d07'
+Create Date: 2025-09-27 12:15:48.330271
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3a8d5e2f7b61'
+down_revision = '9b2f4c6e1d07'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('user_advices',
+    sa.Column('owner_id', sa.Integer(), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.Column('etag', sa.String(length=32), nullable=False),
+    sa.Column('computed_on', sa.Date(), nullable=False),
+    sa.Column('items', sa.JSON(), nullable=False),
+    sa.ForeignKeyConstraint(['owner_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('owner_id')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('user_advices')
@@ -0,0 +1,46 @@
+"""add period rollups
+
+Revision ID: 5d1e0b7c9a43
+Revises: 'fc4349265b8c'
+Create Date: 2025-09-21 18:04:12.518307
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5d1e0b7c9a43'
+down_revision = 'fc4349265b8c'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('period_rollups',
+    sa.Column('owner_id', sa.Integer(), nullable=False),
+    sa.Column('granularity', sa.String(length=5), nullable=False),
+    sa.Column('period_start', sa.Date(), nullable=False),
+    sa.Column('kind', sa.String(length=7), nullable=False),
+    sa.Column('category_id', sa.Integer(), nullable=False),
+    sa.Column('total', sa.Float(), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['owner_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('owner_id', 'granularity', 'period_start', 'kind', 'category_id')
+    )
+    # Початкове заповнення; далі таблицю підтримує crud (або python -m app.cli rebuild-rollups)
+    # date_trunc('week') у PostgreSQL повертає понеділок — так само, як crud.period_start
+    for table, kind in (('expenses', 'expense'), ('incomes', 'income')):
+        for granularity in ('week', 'month', 'year'):
+            op.execute(f"""
+                INSERT INTO period_rollups (owner_id, granularity, period_start, kind, category_id, total, count)
+                SELECT owner_id, '{granularity}', date_trunc('{granularity}', date)::date, '{kind}',
+                       COALESCE(category_id, 0), SUM(amount), COUNT(*)
+                FROM {table}
+                WHERE date IS NOT NULL AND owner_id IS NOT NULL
+                GROUP BY owner_id, date_trunc('{granularity}', date)::date, COALESCE(category_id, 0)
+            """)
+
+
+def downgrade() -> None:
+    op.drop_table('period_rollups')
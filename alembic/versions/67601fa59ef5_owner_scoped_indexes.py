@@ -0,0 +1,42 @@
+"""owner scoped indexes
+
+Revision ID: 67601fa59ef5
+Revises: '20426e897af7'
+Create Date: 2025-09-06 11:48:03.517920
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '67601fa59ef5'
+down_revision = '20426e897af7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    for table in ('expenses', 'incomes'):
+        op.create_index(f'ix_{table}_owner_id_date', table, ['owner_id', 'date'], unique=False)
+        op.create_index(f'ix_{table}_owner_id_category_id_date', table, ['owner_id', 'category_id', 'date'], unique=False)
+        # amount/description ніхто не фільтрує, id дублює первинний ключ,
+        # а date без owner_id покривається новими складеними індексами
+        op.drop_index(op.f(f'ix_{table}_amount'), table_name=table)
+        op.drop_index(op.f(f'ix_{table}_description'), table_name=table)
+        op.drop_index(op.f(f'ix_{table}_date'), table_name=table)
+        op.drop_index(op.f(f'ix_{table}_id'), table_name=table)
+    op.create_index('ix_expense_categories_owner_id', 'expense_categories', ['owner_id'], unique=False)
+    op.create_index('ix_income_categories_owner_id', 'income_categories', ['owner_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_income_categories_owner_id', table_name='income_categories')
+    op.drop_index('ix_expense_categories_owner_id', table_name='expense_categories')
+    for table in ('incomes', 'expenses'):
+        op.create_index(op.f(f'ix_{table}_id'), table, ['id'], unique=False)
+        op.create_index(op.f(f'ix_{table}_date'), table, ['date'], unique=False)
+        op.create_index(op.f(f'ix_{table}_description'), table, ['description'], unique=False)
+        op.create_index(op.f(f'ix_{table}_amount'), table, ['amount'], unique=False)
+        op.drop_index(f'ix_{table}_owner_id_category_id_date', table_name=table)
+        op.drop_index(f'ix_{table}_owner_id_date', table_name=table)
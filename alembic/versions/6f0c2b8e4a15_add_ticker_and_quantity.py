@@ -0,0 +1,26 @@
+"""add ticker to expense category and quantity to expense
+
+Revision ID: 6f0c2b8e4a15
+Revises: 'b4e8f0a2c6d9'
+Create Date: 2025-10-08 19:33:40.201856
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '6f0c2b8e4a15'
+down_revision = 'b4e8f0a2c6d9'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('expense_categories', sa.Column('ticker', sa.String(length=20), nullable=True))
+    op.add_column('expenses', sa.Column('quantity', sa.Float(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('expenses', 'quantity')
+    op.drop_column('expense_categories', 'ticker')
@@ -0,0 +1,30 @@
+"""add user forecasts
+
+Revision ID: 9b2f4c6e1d07
+Revises: '5d1e0b7c9a43'
+Create Date: 2025-09-24 20:41:37.902114
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9b2f4c6e1d07'
+down_revision = '5d1e0b7c9a43'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('user_forecasts',
+    sa.Column('owner_id', sa.Integer(), nullable=False),
+    sa.Column('computed_on', sa.Date(), nullable=False),
+    sa.Column('data', sa.JSON(), nullable=False),
+    sa.ForeignKeyConstraint(['owner_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('owner_id')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('user_forecasts')
@@ -0,0 +1,30 @@
+"""unique investment pseudonyms
+
+Revision ID: a1f3d5b7c9e2
+Revises: 'd2a7c4e9f1b3'
+Create Date: 2025-10-13 09:16:42.830574
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a1f3d5b7c9e2'
+down_revision = 'd2a7c4e9f1b3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Із дублікатів лишається рядок з найменшим owner_id; решту з подовженими псевдонімами відновить
+    #   python -m app.cli refresh-ranking --recompute-totals
+    op.execute(
+        "DELETE FROM investment_rankings WHERE owner_id NOT IN "
+        "(SELECT MIN(owner_id) FROM investment_rankings GROUP BY pseudonym)"
+    )
+    op.create_index(op.f('ix_investment_rankings_pseudonym'), 'investment_rankings', ['pseudonym'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_investment_rankings_pseudonym'), table_name='investment_rankings')
@@ -0,0 +1,37 @@
+"""add investment rankings
+
+Revision ID: b4e8f0a2c6d9
+Revises: 'e7c1a9d3b5f2'
+Create Date: 2025-10-04 16:08:21.745019
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b4e8f0a2c6d9'
+down_revision = 'e7c1a9d3b5f2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('investment_rankings',
+    sa.Column('owner_id', sa.Integer(), nullable=False),
+    sa.Column('pseudonym', sa.String(length=64), nullable=False),
+    sa.Column('total', sa.Float(), nullable=False),
+    sa.Column('rank', sa.Integer(), nullable=True),
+    sa.Column('ranked_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['owner_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('owner_id')
+    )
+    op.create_index(op.f('ix_investment_rankings_rank'), 'investment_rankings', ['rank'], unique=False)
+    # Таблиця створюється порожньою: псевдоніми рахуються в Python із солі з налаштувань, а міграція
+    # не повинна залежати від поточного коду app. Заповнення після міграції:
+    #   python -m app.cli refresh-ranking --recompute-totals
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_investment_rankings_rank'), table_name='investment_rankings')
+    op.drop_table('investment_rankings')
@@ -0,0 +1,62 @@
+"""add per-user change sequence and transaction tombstones
+
+Revision ID: d2a7c4e9f1b3
+Revises: '6f0c2b8e4a15'
+Create Date: 2025-10-12 11:47:05.318442
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd2a7c4e9f1b3'
+down_revision = '6f0c2b8e4a15'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('users', sa.Column('change_seq', sa.Integer(), server_default=sa.text('0'), nullable=False))
+    op.add_column('expenses', sa.Column('change_seq', sa.Integer(), nullable=True))
+    op.add_column('incomes', sa.Column('change_seq', sa.Integer(), nullable=True))
+    op.create_table('transaction_tombstones',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('owner_id', sa.Integer(), nullable=False),
+    sa.Column('kind', sa.String(length=10), nullable=False),
+    sa.Column('transaction_id', sa.Integer(), nullable=False),
+    sa.Column('change_seq', sa.Integer(), nullable=False),
+    sa.Column('deleted_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['owner_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    # Наявні транзакції нумеруються по власнику: спершу витрати, потім доходи
+    op.execute(
+        "UPDATE expenses SET change_seq = numbered.seq FROM ("
+        " SELECT id, ROW_NUMBER() OVER (PARTITION BY owner_id ORDER BY id) AS seq FROM expenses"
+        ") AS numbered WHERE expenses.id = numbered.id"
+    )
+    op.execute(
+        "UPDATE incomes SET change_seq = numbered.seq FROM ("
+        " SELECT i.id, ROW_NUMBER() OVER (PARTITION BY i.owner_id ORDER BY i.id)"
+        " + (SELECT COUNT(*) FROM expenses e WHERE e.owner_id = i.owner_id) AS seq FROM incomes i"
+        ") AS numbered WHERE incomes.id = numbered.id"
+    )
+    op.execute(
+        "UPDATE users SET change_seq ="
+        " (SELECT COUNT(*) FROM expenses WHERE expenses.owner_id = users.id)"
+        " + (SELECT COUNT(*) FROM incomes WHERE incomes.owner_id = users.id)"
+    )
+    op.create_index('ix_expenses_owner_id_change_seq', 'expenses', ['owner_id', 'change_seq'], unique=False)
+    op.create_index('ix_incomes_owner_id_change_seq', 'incomes', ['owner_id', 'change_seq'], unique=False)
+    op.create_index('ix_transaction_tombstones_owner_id_change_seq', 'transaction_tombstones', ['owner_id', 'change_seq'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_transaction_tombstones_owner_id_change_seq', table_name='transaction_tombstones')
+    op.drop_index('ix_incomes_owner_id_change_seq', table_name='incomes')
+    op.drop_index('ix_expenses_owner_id_change_seq', table_name='expenses')
+    op.drop_table('transaction_tombstones')
+    op.drop_column('incomes', 'change_seq')
+    op.drop_column('expenses', 'change_seq')
+    op.drop_column('users', 'change_seq')
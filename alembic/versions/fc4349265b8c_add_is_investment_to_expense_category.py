@@ -0,0 +1,29 @@
+"""add is_investment to expense category
+
+Revision ID: fc4349265b8c
+Revises: '67601fa59ef5'
+Create Date: 2025-09-14 10:27:55.061942
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'fc4349265b8c'
+down_revision = '67601fa59ef5'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('expense_categories', sa.Column('is_investment', sa.Boolean(), server_default=sa.false(), nullable=False))
+    # Раніше інвестиції визначались пошуком за назвою — переносимо це у прапорець один раз
+    op.execute("""
+        UPDATE expense_categories SET is_investment = true
+        WHERE name ILIKE '%інвестиці%' OR name ILIKE '%invest%'
+    """)
+
+
+def downgrade() -> None:
+    op.drop_column('expense_categories', 'is_investment')
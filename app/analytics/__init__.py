@@ -0,0 +1,22 @@
+"""Per-user financial analytics computed with NumPy.
+
+``series`` loads transactions as column arrays with a single query, ``forecast`` turns
+them into monthly totals, moving averages, savings rate, category trends and goal ETAs
+for a whole batch of users at once, ``advice`` derives spending tips from the monthly
+category ledger, and ``batch`` runs both for every user (nightly).
+"""
+from .advice import compute_advices
+from .forecast import compute_forecasts, months_to_target
+from .series import CategoryMonths, TransactionSeries, load_category_spending, load_series, lookback_start
+
+
+def forecast_users(db, owner_ids, today, lookback_months: int, window_months: int) -> dict:
+    """Load and forecast ``owner_ids`` in one go; returns ``{owner_id: forecast dict}``."""
+    series = load_series(db, owner_ids, since=lookback_start(today, lookback_months))
+    return compute_forecasts(series, owner_ids, today, lookback_months, window_months)
+
+
+def advise_users(db, owner_ids, today, lookback_months: int) -> dict:
+    """Load the category ledger of ``owner_ids`` and derive advice; returns ``{owner_id: [advice, ...]}``."""
+    spending = load_category_spending(db, owner_ids, since=lookback_start(today, lookback_months))
+    return compute_advices(spending, owner_ids, today, lookback_months)
@@ -0,0 +1,111 @@
+"""Spending advice derived from the monthly per-category ledger.
+
+Works on ``CategoryMonths`` for a batch of users: every (user, category) pair becomes a
+row of a months grid, and the rules below are whole-array comparisons on that grid.
+"""
+from datetime import date
+from typing import Sequence
+
+import numpy as np
+
+from .forecast import _grid, _month_numbers
+from .series import CategoryMonths
+
+NEAR_LIMIT_SHARE = 0.9
+# Сплеск: місяць вище за середнє на стільки стандартних відхилень (і хоча б у 1.5 раза)
+SPIKE_SIGMAS = 2.0
+SPIKE_MIN_RATIO = 1.5
+SPIKE_MIN_HISTORY = 3
+CHANGE_THRESHOLD = 0.25
+
+# Порядок у стрічці: спершу те, що потребує дії
+SEVERITY = {"over_limit": 0, "near_limit": 1, "spike": 2, "total_change": 3, "category_change": 4}
+
+
+def _month_label(month_number: int) -> str:
+    return str(np.datetime64(int(month_number), "M"))
+
+
+def compute_advices(spending: CategoryMonths, owner_ids: Sequence[int], today: date, lookback_months: int) -> dict:
+    """Return ``{owner_id: [advice, ...]}`` for every id in ``owner_ids``.
+
+    The current month is checked against category limits; the last complete month is
+    compared with the one before it (month-over-month) and with the earlier history (spikes).
+    """
+    owners = np.unique(np.asarray(owner_ids, dtype=np.int64))
+    n_cols = lookback_months + 1
+    current_month = _month_numbers(np.array([today], dtype="datetime64[D]"))[0]
+    first_month = current_month - lookback_months
+    last_month = current_month - 1
+
+    cols = spending.months.astype(np.int64) - first_month
+    user_rows = np.searchsorted(owners, spending.owner_ids)
+    keep = (cols >= 0) & (cols < n_cols) & (user_rows < len(owners))
+    keep[keep] = owners[user_rows[keep]] == spending.owner_ids[keep]
+    cols, user_rows, category_ids, totals = cols[keep], user_rows[keep], spending.category_ids[keep], spending.totals[keep]
+
+    pairs, pair_rows = np.unique(np.stack([user_rows, category_ids], axis=1), axis=0, return_inverse=True)
+    grid = _grid(pair_rows.reshape(-1), cols, totals, len(pairs), n_cols)
+    advices = {owner_id: [] for owner_id in owners.tolist()}
+    if not len(pairs):
+        return advices
+    pair_users, pair_categories = pairs[:, 0], pairs[:, 1]
+
+    current, last, previous = grid[:, -1], grid[:, -2], grid[:, -3] if n_cols >= 3 else np.zeros(len(pairs))
+    limits = np.array([spending.limits.get(c) or np.nan for c in pair_categories.tolist()], dtype=np.float64)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        over_limit = current > limits
+        near_limit = ~over_limit & (current >= limits * NEAR_LIMIT_SHARE) & (current > 0)
+
+        # Історія до останнього повного місяця, починаючи з першого місяця з витратами
+        history = grid[:, :-2]
+        x = np.arange(history.shape[1])
+        first_active = np.where((history != 0).any(axis=1), (history != 0).argmax(axis=1), history.shape[1])
+        weights = (x >= first_active[:, None]).astype(np.float64)
+        history_months = weights.sum(axis=1)
+        mean = (history * weights).sum(axis=1) / history_months
+        std = np.sqrt((((history - mean[:, None]) ** 2) * weights).sum(axis=1) / history_months)
+        spike = (history_months >= SPIKE_MIN_HISTORY) & (last > mean + SPIKE_SIGMAS * std) & (last > mean * SPIKE_MIN_RATIO)
+
+        change = (last - previous) / previous
+        changed = ~spike & (previous > 0) & (np.abs(change) >= CHANGE_THRESHOLD)
+
+    def add(owner_row, category_id, kind, message, amount, reference=None, change_value=None):
+        advices[int(owners[owner_row])].append({
+            "kind": kind,
+            "message": message,
+            "category_id": category_id,
+            "category": spending.names.get(category_id) if category_id else None,
+            "amount": round(float(amount), 2),
+            "reference": None if reference is None else round(float(reference), 2),
+            "change": None if change_value is None else round(float(change_value), 4),
+        })
+
+    names = [spending.names[category_id] for category_id in pair_categories.tolist()]
+    for row in np.flatnonzero(over_limit).tolist():
+        add(pair_users[row], int(pair_categories[row]), "over_limit",
+            f"Витрати на '{names[row]}' цього місяця ({current[row]:.2f}) перевищили ліміт {limits[row]:.2f}", current[row], limits[row])
+    for row in np.flatnonzero(near_limit).tolist():
+        add(pair_users[row], int(pair_categories[row]), "near_limit",
+            f"Витрати на '{names[row]}' вже {current[row] / limits[row]:.0%} від ліміту {limits[row]:.2f}", current[row], limits[row])
+    for row in np.flatnonzero(spike).tolist():
+        add(pair_users[row], int(pair_categories[row]), "spike",
+            f"Незвично великі витрати на '{names[row]}' у {_month_label(last_month)}: {last[row]:.2f} при звичайних {mean[row]:.2f}", last[row], mean[row])
+    for row in np.flatnonzero(changed).tolist():
+        direction = "зросли" if change[row] > 0 else "зменшились"
+        add(pair_users[row], int(pair_categories[row]), "category_change",
+            f"Витрати на '{names[row]}' {direction} на {abs(change[row]):.0%} порівняно з попереднім місяцем", last[row], previous[row], change[row])
+
+    # Загальна зміна витрат за місяць
+    user_last = np.bincount(pair_users, weights=last, minlength=len(owners))
+    user_previous = np.bincount(pair_users, weights=previous, minlength=len(owners))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        user_change = (user_last - user_previous) / user_previous
+    for row in np.flatnonzero((user_previous > 0) & (np.abs(user_change) >= CHANGE_THRESHOLD)).tolist():
+        direction = "зросли" if user_change[row] > 0 else "зменшились"
+        add(row, None, "total_change",
+            f"Загальні витрати за {_month_label(last_month)} {direction} на {abs(user_change[row]):.0%}", user_last[row], user_previous[row], user_change[row])
+
+    for items in advices.values():
+        items.sort(key=lambda advice: (SEVERITY[advice["kind"]], -advice["amount"]))
+    return advices
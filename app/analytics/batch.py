@@ -0,0 +1,67 @@
+"""Nightly recomputation of every user's forecast and advice snapshots.
+
+Users are split into chunks; each chunk is loaded with one query, forecast in one
+vectorized pass and written back in one transaction. Chunks run in a process pool,
+so the total time scales down with the number of cores.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from typing import List, Optional
+
+from .. import crud, database, models
+from ..config import settings
+from . import advise_users, forecast_users
+
+CHUNK_SIZE = 500
+
+
+def _init_worker():
+    # З'єднання батьківського процесу не можна використовувати після fork
+    database.dispose_engines(close=False)
+
+
+def compute_forecast_chunk(owner_ids: List[int], today: date) -> int:
+    db = database.SessionLocal()
+    try:
+        forecasts = forecast_users(db, owner_ids, today, settings.analytics_lookback_months, settings.analytics_window_months)
+        crud.save_forecast_snapshots(db, today, forecasts)
+    finally:
+        db.close()
+    return len(forecasts)
+
+
+def compute_advice_chunk(owner_ids: List[int], today: date) -> int:
+    db = database.SessionLocal()
+    try:
+        advices = advise_users(db, owner_ids, today, settings.analytics_lookback_months)
+        crud.save_advice_snapshots(db, today, advices)
+    finally:
+        db.close()
+    return len(advices)
+
+
+JOBS = {
+    "forecasts": compute_forecast_chunk,
+    "advices": compute_advice_chunk,
+}
+
+
+def run_nightly(job: str = "forecasts", today: Optional[date] = None, workers: Optional[int] = None, chunk_size: int = CHUNK_SIZE) -> int:
+    """Recompute ``job`` snapshots for all active users; returns how many were written.
+
+    ``workers`` defaults to ``ANALYTICS_WORKERS`` (0 — one process per core); 1 runs inline.
+    """
+    compute_chunk = JOBS[job]
+    today = today or date.today()
+    workers = workers or settings.analytics_workers or os.cpu_count() or 1
+    db = database.SessionLocal()
+    try:
+        owner_ids = [user_id for (user_id,) in db.query(models.User.id).filter(models.User.is_active.is_not(False)).order_by(models.User.id)]
+    finally:
+        db.close()
+    chunks = [owner_ids[i:i + chunk_size] for i in range(0, len(owner_ids), chunk_size)]
+    if workers == 1 or len(chunks) <= 1:
+        return sum(compute_chunk(chunk, today) for chunk in chunks)
+    with ProcessPoolExecutor(max_workers=min(workers, len(chunks)), initializer=_init_worker) as pool:
+        return sum(pool.map(compute_chunk, chunks, [today] * len(chunks)))
@@ -0,0 +1,96 @@
+"""Columnar loading of transactions for the analytics code."""
+from dataclasses import dataclass
+from datetime import date
+from typing import Iterable, Optional
+
+import numpy as np
+from sqlalchemy import literal, select, union_all
+from sqlalchemy.orm import Session
+
+from .. import models
+
+
+@dataclass
+class TransactionSeries:
+    """Expenses and incomes of one or more users as parallel arrays, one element per transaction."""
+
+    owner_ids: np.ndarray  # int64
+    days: np.ndarray  # datetime64[D]
+    amounts: np.ndarray  # float64
+    category_ids: np.ndarray  # int64, 0 — без категорії
+    is_income: np.ndarray  # bool
+
+    def __len__(self):
+        return len(self.amounts)
+
+
+def lookback_start(today: date, months: int) -> date:
+    """First day of the month ``months`` months before the month of ``today``."""
+    return (np.datetime64(today, "M") - months).astype("datetime64[D]").item()
+
+
+def _select(model, is_income: bool, owner_ids, since: Optional[date]):
+    stmt = select(
+        model.owner_id, model.date, model.amount, model.category_id, literal(is_income)
+    ).where(model.owner_id.in_(owner_ids), model.date.is_not(None))
+    if since is not None:
+        stmt = stmt.where(model.date >= since)
+    return stmt
+
+
+def load_series(db: Session, owner_ids: Iterable[int], since: Optional[date] = None) -> TransactionSeries:
+    """One ``SELECT owner_id, date, amount, category_id`` over both tables, converted column by column."""
+    owner_ids = list(owner_ids)
+    stmt = union_all(
+        _select(models.Expense, False, owner_ids, since),
+        _select(models.Income, True, owner_ids, since),
+    )
+    rows = db.execute(stmt).all()
+    if not rows:
+        return TransactionSeries(
+            np.empty(0, np.int64), np.empty(0, "datetime64[D]"), np.empty(0, np.float64),
+            np.empty(0, np.int64), np.empty(0, bool),
+        )
+    owners, days, amounts, category_ids, is_income = zip(*rows)
+    return TransactionSeries(
+        owner_ids=np.array(owners, dtype=np.int64),
+        days=np.array(days, dtype="datetime64[D]"),
+        amounts=np.array([amount or 0.0 for amount in amounts], dtype=np.float64),
+        category_ids=np.array([category_id or 0 for category_id in category_ids], dtype=np.int64),
+        is_income=np.array(is_income, dtype=bool),
+    )
+
+
+@dataclass
+class CategoryMonths:
+    """Monthly expense totals per category (from ``category_spending``) with the category's name and limit."""
+
+    owner_ids: np.ndarray  # int64
+    category_ids: np.ndarray  # int64
+    months: np.ndarray  # datetime64[M]
+    totals: np.ndarray  # float64
+    names: dict  # category_id -> name
+    limits: dict  # category_id -> limit або None
+
+
+def load_category_spending(db: Session, owner_ids: Iterable[int], since: date) -> CategoryMonths:
+    """Read the maintained monthly ledger instead of the transaction tables."""
+    spending, category = models.CategorySpending, models.ExpenseCategory
+    rows = db.execute(
+        select(spending.owner_id, spending.category_id, spending.month, spending.total, category.name, category.limit)
+        .join(category, spending.category_id == category.id)
+        .where(spending.owner_id.in_(list(owner_ids)), spending.month >= since)
+    ).all()
+    names = {row[1]: row[4] for row in rows}
+    limits = {row[1]: row[5] for row in rows}
+    if not rows:
+        return CategoryMonths(np.empty(0, np.int64), np.empty(0, np.int64), np.empty(0, "datetime64[M]"), np.empty(0), names, limits)
+    owners, category_ids, months, totals = list(zip(*rows))[:4]
+    return CategoryMonths(
+        owner_ids=np.array(owners, dtype=np.int64),
+        category_ids=np.array(category_ids, dtype=np.int64),
+        months=np.array(months, dtype="datetime64[D]").astype("datetime64[M]"),
+        totals=np.array(totals, dtype=np.float64),
+        names=names,
+        limits=limits,
+    )
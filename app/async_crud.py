@@ -0,0 +1,180 @@
+"""Async variants of the ``crud`` functions for ``AsyncSession``.
+
+Each function runs the corresponding sync ``crud`` function through ``AsyncSession.run_sync``:
+the ORM code is shared, while every database round trip is awaited on the asyncpg
+connection instead of blocking the event loop or a threadpool worker.
+
+Objects returned here must be fully loaded before they leave the session: relationships are
+``lazy="raise"``, so they are requested explicitly (``load=`` / ``crud.load_options``, or the
+``category`` refreshes below).
+"""
+from typing import Optional, Sequence
+from datetime import date
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from . import cache, crud, models, schemas
+
+
+async def get_user_by_username(db: AsyncSession, username: str):
+    result = await db.execute(select(models.User).where(models.User.username == username))
+    return result.scalars().first()
+
+
+async def create_user(db: AsyncSession, user: schemas.UserCreate, hashed_password: str):
+    return await db.run_sync(crud.create_user, user, hashed_password)
+
+
+async def set_password_hash(db: AsyncSession, user_id: int, hashed_password: str):
+    await db.run_sync(crud.set_password_hash, user_id, hashed_password)
+
+
+async def set_user_active(db: AsyncSession, user_id: int, is_active: bool):
+    # run_sync виконується в потоці циклу подій — кеш інвалідовується вже асинхронно
+    db_user = await db.run_sync(crud.set_user_active, user_id, is_active, False)
+    if db_user:
+        await cache.invalidate_user_async(db_user.username)
+    return db_user
+
+
+async def get_transaction_columns(db: AsyncSession, model, category_model, owner_id: int, start_date: Optional[date] = None, end_date: Optional[date] = None, category_id: Optional[int] = None, skip: int = 0, limit: int = 100, cursor: Optional[str] = None, keyset: bool = False, with_total: bool = True):
+    return await db.run_sync(crud.get_transaction_columns, model, category_model, owner_id, start_date, end_date, category_id, skip, limit, cursor, keyset, with_total)
+
+
+async def get_expenses(db: AsyncSession, owner_id: int, start_date: Optional[date] = None, end_date: Optional[date] = None, category_id: Optional[int] = None, skip: int = 0, limit: int = 100, with_total: bool = True, load: Sequence[str] = ("category",)):
+    return await db.run_sync(crud.get_expenses, owner_id, start_date, end_date, category_id, skip, limit, with_total, load)
+
+
+async def get_expenses_page(db: AsyncSession, owner_id: int, start_date: Optional[date] = None, end_date: Optional[date] = None, category_id: Optional[int] = None, cursor: Optional[str] = None, limit: int = 100, with_total: bool = False, load: Sequence[str] = ("category",)):
+    return await db.run_sync(crud.get_expenses_page, owner_id, start_date, end_date, category_id, cursor, limit, with_total, load)
+
+
+async def get_incomes(db: AsyncSession, owner_id: int, start_date: Optional[date] = None, end_date: Optional[date] = None, category_id: Optional[int] = None, skip: int = 0, limit: int = 100, with_total: bool = True, load: Sequence[str] = ("category",)):
+    return await db.run_sync(crud.get_incomes, owner_id, start_date, end_date, category_id, skip, limit, with_total, load)
+
+
+async def get_incomes_page(db: AsyncSession, owner_id: int, start_date: Optional[date] = None, end_date: Optional[date] = None, category_id: Optional[int] = None, cursor: Optional[str] = None, limit: int = 100, with_total: bool = False, load: Sequence[str] = ("category",)):
+    return await db.run_sync(crud.get_incomes_page, owner_id, start_date, end_date, category_id, cursor, limit, with_total, load)
+
+
+async def get_changes(db: AsyncSession, owner_id: int, since: int = 0, limit: int = crud.CHANGE_FEED_LIMIT):
+    return await db.run_sync(crud.get_changes, owner_id, since, limit)
+
+
+async def get_financial_summary(db: AsyncSession, owner_id: int, start_date: Optional[date] = None, end_date: Optional[date] = None, category_id: Optional[int] = None, category_type: Optional[str] = None):
+    return await db.run_sync(crud.get_financial_summary, owner_id, start_date, end_date, category_id, category_type)
+
+
+async def get_period_totals(db: AsyncSession, owner_id: int, granularity: str = "month", start_date: Optional[date] = None, end_date: Optional[date] = None, category_id: Optional[int] = None, category_type: Optional[str] = None):
+    return await db.run_sync(crud.get_period_totals, owner_id, granularity, start_date, end_date, category_id, category_type)
+
+
+async def create_user_expense(db: AsyncSession, expense: schemas.ExpenseCreate, user_id: int):
+    db_expense = await db.run_sync(crud.create_user_expense, expense, user_id)
+    await db.refresh(db_expense, ["category"])
+    return db_expense
+
+
+async def update_expense(db: AsyncSession, expense_id: int, expense_data: schemas.ExpenseUpdate, owner_id: int):
+    db_expense = await db.run_sync(crud.update_expense, expense_id, expense_data, owner_id)
+    if db_expense:
+        await db.refresh(db_expense, ["category"])
+    return db_expense
+
+
+async def delete_expense(db: AsyncSession, expense_id: int, owner_id: int):
+    await db.run_sync(crud.delete_expense, expense_id, owner_id)
+
+
+async def create_user_income(db: AsyncSession, income: schemas.IncomeCreate, user_id: int):
+    db_income = await db.run_sync(crud.create_user_income, income, user_id)
+    await db.refresh(db_income, ["category"])
+    return db_income
+
+
+async def update_income(db: AsyncSession, income_id: int, income_data: schemas.IncomeUpdate, owner_id: int):
+    db_income = await db.run_sync(crud.update_income, income_id, income_data, owner_id)
+    if db_income:
+        await db.refresh(db_income, ["category"])
+    return db_income
+
+
+async def delete_income(db: AsyncSession, income_id: int, owner_id: int):
+    await db.run_sync(crud.delete_income, income_id, owner_id)
+
+
+async def apply_transaction_batch(db: AsyncSession, kind: str, owner_id: int, operations: list, atomic: bool = True):
+    return await db.run_sync(crud.apply_transaction_batch, kind, owner_id, operations, atomic)
+
+
+async def get_expense_categories(db: AsyncSession, owner_id: int, skip: int = 0, limit: int = 100):
+    return await db.run_sync(crud.get_expense_categories, owner_id, skip, limit)
+
+
+async def create_expense_category(db: AsyncSession, category: schemas.ExpenseCategoryCreate, owner_id: int):
+    return await db.run_sync(crud.create_expense_category, category, owner_id)
+
+
+async def update_expense_category(db: AsyncSession, category_id: int, category_data: schemas.ExpenseCategoryUpdate, owner_id: int):
+    return await db.run_sync(crud.update_expense_category, category_id, category_data, owner_id)
+
+
+async def delete_expense_category(db: AsyncSession, category_id: int, owner_id: int):
+    await db.run_sync(crud.delete_expense_category, category_id, owner_id)
+
+
+async def get_income_categories(db: AsyncSession, owner_id: int, skip: int = 0, limit: int = 100):
+    return await db.run_sync(crud.get_income_categories, owner_id, skip, limit)
+
+
+async def create_income_category(db: AsyncSession, category: schemas.IncomeCategoryCreate, owner_id: int):
+    return await db.run_sync(crud.create_income_category, category, owner_id)
+
+
+async def update_income_category(db: AsyncSession, category_id: int, category_data: schemas.IncomeCategoryUpdate, owner_id: int):
+    return await db.run_sync(crud.update_income_category, category_id, category_data, owner_id)
+
+
+async def delete_income_category(db: AsyncSession, category_id: int, owner_id: int):
+    await db.run_sync(crud.delete_income_category, category_id, owner_id)
+
+
+async def merge_categories(db: AsyncSession, kind: str, owner_id: int, source_ids: Sequence[int], target_id: Optional[int] = None):
+    return await db.run_sync(crud.merge_categories, kind, owner_id, source_ids, target_id)
+
+
+async def get_investments(db: AsyncSession, owner_id: int, series: bool = False):
+    return await db.run_sync(crud.get_investments, owner_id, series)
+
+
+async def get_investment_holdings(db: AsyncSession, owner_id: int):
+    return await db.run_sync(crud.get_investment_holdings, owner_id)
+
+
+async def get_investment_expenses_page(db: AsyncSession, owner_id: int, category_id: Optional[int] = None, cursor: Optional[str] = None, limit: int = 50, load: Sequence[str] = ("category",)):
+    return await db.run_sync(crud.get_investment_expenses_page, owner_id, category_id, cursor, limit, load)
+
+
+async def get_investment_rating(db: AsyncSession, owner_id: int, limit: int = 10):
+    return await db.run_sync(crud.get_investment_rating, owner_id, limit)
+
+
+async def get_user_forecast(db: AsyncSession, owner_id: int, today: Optional[date] = None):
+    return await db.run_sync(crud.get_user_forecast, owner_id, today)
+
+
+async def get_user_advices(db: AsyncSession, owner_id: int, today: Optional[date] = None):
+    return await db.run_sync(crud.get_user_advices, owner_id, today)
+
+
+async def create_job(db: AsyncSession, owner_id: Optional[int], kind: str, payload: Optional[dict] = None, input: Optional[bytes] = None):
+    return await db.run_sync(crud.create_job, owner_id, kind, payload, input)
+
+
+async def get_job(db: AsyncSession, job_id: int, owner_id: int):
+    return await db.run_sync(crud.get_job, job_id, owner_id)
+
+
+async def get_jobs(db: AsyncSession, owner_id: int, limit: int = 20):
+    return await db.run_sync(crud.get_jobs, owner_id, limit)
@@ -1,31 +1,34 @@
 from fastapi import Depends, HTTPException
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from jose import JWTError, jwt
-from passlib.context import CryptContext
 from datetime import datetime, timedelta
-from . import crud, models, schemas
-from .database import get_db
+from . import async_crud, cache, models, schemas, security
+from .database import get_async_db
 
 SECRET_KEY = "your-secret-key"
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
 def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
+    return security.verify_and_update(plain_password, hashed_password)[0]
 
 def get_password_hash(password):
-    return pwd_context.hash(password)
+    return security.hash_password(password)
 
-def authenticate_user(db: Session, username: str, password: str):
-    user = crud.get_user_by_username(db, username)
+async def authenticate_user(db: AsyncSession, username: str, password: str):
+    user = await async_crud.get_user_by_username(db, username)
     if not user:
+        await security.dummy_verify_async()
         return False
-    if not verify_password(password, user.hashed_password):
+    valid, new_hash = await security.verify_and_update_async(password, user.hashed_password)
+    if not valid:
         return False
+    if new_hash:
+        # Параметри хешування змінились — тихо перехешовуємо
+        await async_crud.set_password_hash(db, user.id, new_hash)
     return user
 
 def create_access_token(data: dict, expires_delta: timedelta | None = None):
@@ -38,7 +41,7 @@ def create_access_token(data: dict, expires_delta: timedelta | None = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)):
     credentials_exception = HTTPException(
         status_code=401,
         detail="Could not validate credentials",
@@ -52,12 +55,16 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = De
         token_data = schemas.TokenData(username=username)
     except JWTError:
         raise credentials_exception
-    user = crud.get_user_by_username(db, username=token_data.username)
-    if user is None:
-        raise credentials_exception
-    return user
+    identity = await cache.user_cache.aget(token_data.username)
+    if identity is None:
+        user = await async_crud.get_user_by_username(db, username=token_data.username)
+        if user is None:
+            raise credentials_exception
+        identity = {"id": user.id, "username": user.username, "is_active": user.is_active}
+        await cache.user_cache.aset(token_data.username, identity)
+    return schemas.UserIdentity(**identity)
 
-async def get_current_active_user(current_user: schemas.User = Depends(get_current_user)):
+async def get_current_active_user(current_user: schemas.UserIdentity = Depends(get_current_user)):
     if not current_user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
     return current_user
\ No newline at end of file
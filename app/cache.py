@@ -0,0 +1,154 @@
+"""Cache of authenticated user identities, so ``auth.get_current_user`` can skip the database.
+
+Every backend has sync methods (for sync code: crud, CLI, worker) and ``a*`` coroutines for the
+event loop, so an async request never waits on a blocking network call. The ``memory`` backend
+lives in one process: with several workers an invalidation reaches only the worker that made it,
+and the others keep the old entry until ``AUTH_CACHE_TTL`` runs out. Use ``redis`` there.
+"""
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from .config import settings
+
+
+class MemoryCache:
+    """In-process LRU cache with a per-entry TTL."""
+
+    def __init__(self, ttl: int, max_size: int):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[dict]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: dict):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def delete(self, key: str):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    # У пам'яті нічого не блокує — корутини лише обгортки
+    async def aget(self, key: str) -> Optional[dict]:
+        return self.get(key)
+
+    async def aset(self, key: str, value: dict):
+        self.set(key, value)
+
+    async def adelete(self, key: str):
+        self.delete(key)
+
+
+class RedisCache:
+    """Cache shared between workers; needs the optional ``redis`` package."""
+
+    def __init__(self, url: str, ttl: int, prefix: str = "auth:user:"):
+        import redis
+        import redis.asyncio
+
+        self.ttl = ttl
+        self.prefix = prefix
+        self._client = redis.Redis.from_url(url)
+        # Окремий клієнт для циклу подій: синхронний блокував би його на кожному запиті
+        self._async_client = redis.asyncio.Redis.from_url(url)
+
+    def get(self, key: str) -> Optional[dict]:
+        raw = self._client.get(self.prefix + key)
+        return json.loads(raw) if raw is not None else None
+
+    def set(self, key: str, value: dict):
+        self._client.set(self.prefix + key, json.dumps(value), ex=self.ttl)
+
+    def delete(self, key: str):
+        self._client.delete(self.prefix + key)
+
+    def clear(self):
+        for key in self._client.scan_iter(self.prefix + "*"):
+            self._client.delete(key)
+
+    async def aget(self, key: str) -> Optional[dict]:
+        raw = await self._async_client.get(self.prefix + key)
+        return json.loads(raw) if raw is not None else None
+
+    async def aset(self, key: str, value: dict):
+        await self._async_client.set(self.prefix + key, json.dumps(value), ex=self.ttl)
+
+    async def adelete(self, key: str):
+        await self._async_client.delete(self.prefix + key)
+
+
+class NullCache:
+    def get(self, key: str) -> Optional[dict]:
+        return None
+
+    def set(self, key: str, value: dict):
+        pass
+
+    def delete(self, key: str):
+        pass
+
+    def clear(self):
+        pass
+
+    async def aget(self, key: str) -> Optional[dict]:
+        return None
+
+    async def aset(self, key: str, value: dict):
+        pass
+
+    async def adelete(self, key: str):
+        pass
+
+
+def build_cache(backend: str, ttl: int, max_size: int, redis_url: str):
+    if backend == "memory":
+        return MemoryCache(ttl, max_size)
+    if backend == "redis":
+        return RedisCache(redis_url, ttl)
+    if backend == "none":
+        return NullCache()
+    raise ValueError(f"Unknown auth cache backend: {backend}")
+
+
+def _build_user_cache():
+    return build_cache(settings.auth_cache_backend, settings.auth_cache_ttl, settings.auth_cache_size, settings.redis_url)
+
+
+# Ключ — ім'я користувача з токена (sub), значення — id та is_active
+user_cache = _build_user_cache()
+
+
+def reload():
+    """Rebuild ``user_cache`` after ``settings`` changed (``main.create_app``)."""
+    global user_cache
+    user_cache = _build_user_cache()
+
+
+def invalidate_user(username: str):
+    user_cache.delete(username)
+
+
+async def invalidate_user_async(username: str):
+    await user_cache.adelete(username)
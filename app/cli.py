@@ -0,0 +1,90 @@
+"""Maintenance commands.
+
+Usage:
+    python -m app.cli rebuild-rollups [--user ID]
+    python -m app.cli forecast-all [--workers N]
+    python -m app.cli advices-all [--workers N]
+    python -m app.cli refresh-ranking [--recompute-totals]
+    python -m app.cli enqueue-nightly {forecasts,advices,ranking}
+"""
+import argparse
+
+from . import crud
+from .database import SessionLocal
+
+
+def rebuild_rollups(args):
+    db = SessionLocal()
+    try:
+        written = crud.rebuild_rollups(db, owner_id=args.user)
+    finally:
+        db.close()
+    scope = f"user {args.user}" if args.user is not None else "all users"
+    print(f"Rebuilt period rollups for {scope}: {written} rows")
+
+
+def forecast_all(args):
+    from .analytics.batch import run_nightly
+
+    written = run_nightly("forecasts", workers=args.workers)
+    print(f"Computed forecasts for {written} users")
+
+
+def advices_all(args):
+    from .analytics.batch import run_nightly
+
+    written = run_nightly("advices", workers=args.workers)
+    print(f"Computed advices for {written} users")
+
+
+def refresh_ranking(args):
+    db = SessionLocal()
+    try:
+        ranked = crud.refresh_investment_ranks(db, recompute_totals=args.recompute_totals)
+    finally:
+        db.close()
+    print(f"Ranked {ranked} users")
+
+
+def enqueue_nightly(args):
+    db = SessionLocal()
+    try:
+        if args.job == "ranking":
+            job = crud.create_job(db, owner_id=None, kind="refresh_ranking")
+        else:
+            job = crud.create_job(db, owner_id=None, kind="nightly", payload={"job": args.job})
+    finally:
+        db.close()
+    print(f"Queued job {job.id}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m app.cli", description="financePlanner maintenance commands")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    rebuild = commands.add_parser("rebuild-rollups", help="recompute period_rollups from expenses and incomes")
+    rebuild.add_argument("--user", type=int, help="only this user id (default: everyone)")
+    rebuild.set_defaults(handler=rebuild_rollups)
+
+    forecast = commands.add_parser("forecast-all", help="recompute every user's forecast snapshot (nightly job)")
+    forecast.add_argument("--workers", type=int, help="worker processes (default: ANALYTICS_WORKERS or one per core)")
+    forecast.set_defaults(handler=forecast_all)
+
+    advices = commands.add_parser("advices-all", help="recompute every user's spending advice feed (nightly job)")
+    advices.add_argument("--workers", type=int, help="worker processes (default: ANALYTICS_WORKERS or one per core)")
+    advices.set_defaults(handler=advices_all)
+
+    ranking = commands.add_parser("refresh-ranking", help="renumber the investment rating")
+    ranking.add_argument("--recompute-totals", action="store_true", help="also recompute every user's investment total")
+    ranking.set_defaults(handler=refresh_ranking)
+
+    enqueue = commands.add_parser("enqueue-nightly", help="queue a nightly recomputation for python -m app.worker")
+    enqueue.add_argument("job", choices=("forecasts", "advices", "ranking"))
+    enqueue.set_defaults(handler=enqueue_nightly)
+
+    args = parser.parse_args(argv)
+    args.handler(args)
+
+
+if __name__ == "__main__":
+    main()
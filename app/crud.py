@@ -1,15 +1,37 @@
+import base64
+import hashlib
+import json
 from fastapi import HTTPException
-from sqlalchemy.orm import Session, joinedload
-from typing import Optional
-from datetime import date
-from . import models, schemas
-from passlib.context import CryptContext
+from pydantic import ValidationError
+from sqlalchemy import and_, case, func, insert, inspect, literal, or_, select, tuple_, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session, joinedload, selectinload
+from typing import Callable, Optional, Sequence
+from datetime import date, datetime, timedelta
+from . import analytics, models, schemas, security
+from .cache import invalidate_user
+from .config import settings
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+def load_options(model, load: Sequence[str] = ()):
+    """Loader options for the named relationships of ``model``, e.g. ``load_options(models.Expense, ["category"])``.
 
-def get_user(db: Session, user_id: int):
-    return db.query(models.User).filter(models.User.id == user_id).first()
+    Relationships in ``models`` are ``lazy="raise"``: whatever a caller serializes must be named
+    here. Many-to-one relationships are joined, collections get one ``SELECT ... IN`` each.
+    """
+    relationships = inspect(model).relationships
+    options = []
+    for name in load:
+        if name not in relationships:
+            raise ValueError(f"{model.__name__} has no relationship {name!r}")
+        attribute = getattr(model, name)
+        options.append(selectinload(attribute) if relationships[name].uselist else joinedload(attribute))
+    return options
+
+
+def get_user(db: Session, user_id: int, load: Sequence[str] = ()):
+    return db.query(models.User).options(*load_options(models.User, load)).filter(models.User.id == user_id).first()
 
 
 def get_user_by_username(db: Session, username: str):
@@ -20,8 +42,10 @@ def get_users(db: Session, skip: int = 0, limit: int = 100):
     return db.query(models.User).offset(skip).limit(limit).all()
 
 
-def create_user(db: Session, user: schemas.UserCreate):
-    hashed_password = pwd_context.hash(user.password)
+def create_user(db: Session, user: schemas.UserCreate, hashed_password: Optional[str] = None):
+    """Create a user with the base categories; pass ``hashed_password`` when it was already computed off the event loop."""
+    if hashed_password is None:
+        hashed_password = security.hash_password(user.password)
     db_user = models.User(username=user.username, hashed_password=hashed_password)
     db.add(db_user)
     db.commit()
@@ -37,62 +61,572 @@ def create_user(db: Session, user: schemas.UserCreate):
     return db_user
 
 
-def get_expenses(db: Session, owner_id: int, start_date: Optional[date] = None, end_date: Optional[date] = None, category_id: Optional[int] = None, skip: int = 0, limit: int = 100):
-    query = db.query(models.Expense).filter(models.Expense.owner_id == owner_id)
+def set_password_hash(db: Session, user_id: int, hashed_password: str):
+    db.query(models.User).filter(models.User.id == user_id).update({"hashed_password": hashed_password})
+    db.commit()
+
+
+def set_user_active(db: Session, user_id: int, is_active: bool, invalidate: bool = True):
+    """Set ``is_active``; ``invalidate=False`` leaves dropping the cached identity to an async caller."""
+    db_user = get_user(db, user_id)
+    if db_user:
+        db_user.is_active = is_active
+        db.commit()
+        # Інакше кеш автентифікації віддавав би старий is_active до кінця TTL
+        if invalidate:
+            invalidate_user(db_user.username)
+    return db_user
+
+
+# Вид транзакції -> (модель транзакції, модель категорії); єдине місце для імпорту, експорту, злиття й пакетів
+TRANSACTION_MODELS = {
+    "expense": (models.Expense, models.ExpenseCategory),
+    "income": (models.Income, models.IncomeCategory),
+}
+
+
+def _filter_transactions(query, model, owner_id: int, start_date: Optional[date] = None, end_date: Optional[date] = None, category_id: Optional[int] = None):
+    """Apply the owner/period/category filters shared by expense and income queries."""
+    query = query.filter(model.owner_id == owner_id)
     if start_date:
-        query = query.filter(models.Expense.date >= start_date)
+        query = query.filter(model.date >= start_date)
     if end_date:
-        query = query.filter(models.Expense.date <= end_date)
+        query = query.filter(model.date <= end_date)
     if category_id:
-        query = query.filter(models.Expense.category_id == category_id)
-    total = query.count()
-    items = query.options(joinedload(models.Expense.category)).offset(skip).limit(limit).all()
+        query = query.filter(model.category_id == category_id)
+    return query
+
+
+def encode_cursor(day: Optional[date], row_id: int) -> str:
+    """Opaque keyset cursor for the (date, id) position of the last row on a page; ``day`` may be None."""
+    raw = f"{day.isoformat() if day else ''}|{row_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        day, row_id = raw.split("|")
+        return (date.fromisoformat(day) if day else None), int(row_id)
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def _newest_first(query, model):
+    # (date, id) робить порядок сторінок детермінованим. Рядки без дати — явно першими на всіх СУБД:
+    # так DESC у PostgreSQL збігається зі зворотним проходом індексу (owner_id, date)
+    return query.order_by(model.date.desc().nulls_first(), model.id.desc())
+
+
+def _keyset_page(query, model, cursor: Optional[str], limit: int):
+    """Return one page after ``cursor`` and the cursor of the next page (``None`` on the last one)."""
+    if cursor:
+        day, row_id = decode_cursor(cursor)
+        if day is None:
+            # Ще в групі без дати: решта цієї групи, потім усі датовані рядки
+            query = query.filter(or_(and_(model.date.is_(None), model.id < row_id), model.date.is_not(None)))
+        else:
+            # Порівняння кортежів ніколи не істинне для NULL — а рядки без дати вже були на попередніх сторінках
+            query = query.filter(tuple_(model.date, model.id) < tuple_(day, row_id))
+    items = _newest_first(query, model).limit(limit + 1).all()
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        next_cursor = encode_cursor(items[-1].date, items[-1].id)
+    return items, next_cursor
+
+
+def get_expenses(db: Session, owner_id: int, start_date: Optional[date] = None, end_date: Optional[date] = None, category_id: Optional[int] = None, skip: int = 0, limit: int = 100, with_total: bool = True, load: Sequence[str] = ("category",)):
+    query = _filter_transactions(db.query(models.Expense), models.Expense, owner_id, start_date, end_date, category_id)
+    total = query.count() if with_total else None
+    items = _newest_first(query, models.Expense).options(*load_options(models.Expense, load)).offset(skip).limit(limit).all()
     return items, total
 
 
+def get_expenses_page(db: Session, owner_id: int, start_date: Optional[date] = None, end_date: Optional[date] = None, category_id: Optional[int] = None, cursor: Optional[str] = None, limit: int = 100, with_total: bool = False, load: Sequence[str] = ("category",)):
+    """Keyset-paginated expenses, newest first; cost per page does not grow with depth."""
+    query = _filter_transactions(db.query(models.Expense), models.Expense, owner_id, start_date, end_date, category_id)
+    total = query.count() if with_total else None
+    items, next_cursor = _keyset_page(query.options(*load_options(models.Expense, load)), models.Expense, cursor, limit)
+    return items, next_cursor, total
+
+
+def _upsert(db: Session, model):
+    """INSERT ... ON CONFLICT for the dialect behind the session (PostgreSQL, or SQLite for local runs)."""
+    if db.get_bind().dialect.name == "sqlite":
+        return sqlite_insert(model)
+    return pg_insert(model)
+
+
+def _month_start(day: date) -> date:
+    return day.replace(day=1)
+
+
+def _apply_expense_spending(db: Session, owner_id: int, category_id: Optional[int], day: Optional[date], amount: float, count: int = 1):
+    """Add ``amount`` to the category's monthly running total and return the new total.
+
+    Runs inside the caller's transaction, so the ledger is committed together with the expense.
+    """
+    if category_id is None or day is None:
+        return None
+    stmt = _upsert(db, models.CategorySpending).values(
+        owner_id=owner_id, category_id=category_id, month=_month_start(day), total=amount, count=count
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["owner_id", "category_id", "month"],
+        set_={
+            "total": models.CategorySpending.total + stmt.excluded.total,
+            "count": models.CategorySpending.count + stmt.excluded.count,
+        },
+    ).returning(models.CategorySpending.total)
+    return db.execute(stmt).scalar()
+
+
+ROLLUP_GRANULARITIES = ("week", "month", "year")
+
+
+def period_start(day: date, granularity: str) -> date:
+    """First day of the week (Monday), month or year containing ``day``."""
+    if granularity == "week":
+        return day - timedelta(days=day.weekday())
+    if granularity == "month":
+        return day.replace(day=1)
+    return day.replace(month=1, day=1)
+
+
+def _apply_rollup_rows(db: Session, rows: list):
+    """Add ``rows`` (dicts with the ``PeriodRollup`` columns) to the rollups with one multi-row upsert."""
+    if not rows:
+        return
+    rollup = models.PeriodRollup
+    stmt = _upsert(db, rollup).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["owner_id", "granularity", "period_start", "kind", "category_id"],
+        set_={"total": rollup.total + stmt.excluded.total, "count": rollup.count + stmt.excluded.count},
+    )
+    db.execute(stmt)
+
+
+def _rollup_rows(kind: str, owner_id: int, category_id: Optional[int], day: date, amount: float, count: int):
+    return [
+        {
+            "owner_id": owner_id, "granularity": granularity, "period_start": period_start(day, granularity),
+            "kind": kind, "category_id": category_id or 0, "total": amount, "count": count,
+        }
+        for granularity in ROLLUP_GRANULARITIES
+    ]
+
+
+PSEUDONYM_ADJECTIVES = ("Сміливий", "Мудрий", "Швидкий", "Тихий", "Щедрий", "Хитрий", "Спокійний", "Веселий", "Уважний", "Терплячий")
+PSEUDONYM_ANIMALS = ("Лис", "Ведмідь", "Борсук", "Їжак", "Вовк", "Заєць", "Бобер", "Сокіл", "Кіт", "Лелека")
+
+
+def investment_pseudonym(owner_id: int, digits: int = 4) -> str:
+    """Stable public name for the rating, so that real usernames are never shown.
+
+    Only a million short names exist; ``digits`` takes a longer number from the same hash when the
+    short one is already used by someone else (see ``_unique_pseudonym``).
+    """
+    digest = hashlib.sha256(f"{settings.ranking_pseudonym_salt}:{owner_id}".encode()).digest()
+    number = int.from_bytes(digest[2:10], "big") % 10 ** digits
+    return f"{PSEUDONYM_ADJECTIVES[digest[0] % len(PSEUDONYM_ADJECTIVES)]} {PSEUDONYM_ANIMALS[digest[1] % len(PSEUDONYM_ANIMALS)]} {number:0{digits}d}"
+
+
+def _unique_pseudonym(owner_id: int, taken: Callable[[str], bool]) -> str:
+    """The shortest of the user's pseudonyms that ``taken`` does not report as used."""
+    for digits in range(4, 20):
+        pseudonym = investment_pseudonym(owner_id, digits)
+        if not taken(pseudonym):
+            return pseudonym
+    raise RuntimeError(f"No free pseudonym for user {owner_id}")
+
+
+def _is_investment_category(db: Session, category_id: Optional[int]) -> bool:
+    if category_id is None:
+        return False
+    # Зазвичай категорія вже в identity map сесії — без додаткового запиту
+    category = db.get(models.ExpenseCategory, category_id)
+    return bool(category and category.is_investment)
+
+
+def refresh_investment_total(db: Session, owner_id: int):
+    """Recompute the user's row in ``investment_rankings`` from the monthly ledger (a few dozen rows).
+
+    Ranks are not touched here; ``refresh_investment_ranks`` renumbers everyone periodically.
+    """
+    spending, category = models.CategorySpending, models.ExpenseCategory
+    total = db.query(func.coalesce(func.sum(spending.total), 0.0)).join(
+        category, spending.category_id == category.id
+    ).filter(spending.owner_id == owner_id, category.is_investment.is_(True)).scalar()
+    ranking = models.InvestmentRanking
+    # Псевдонім призначається один раз, при першому записі; зайнятий іншим — подовжується
+    pseudonym = db.query(ranking.pseudonym).filter(ranking.owner_id == owner_id).scalar() or _unique_pseudonym(
+        owner_id, lambda name: db.query(ranking.owner_id).filter(ranking.pseudonym == name).first() is not None
+    )
+    stmt = _upsert(db, ranking).values(owner_id=owner_id, pseudonym=pseudonym, total=total)
+    stmt = stmt.on_conflict_do_update(index_elements=["owner_id"], set_={"total": stmt.excluded.total})
+    db.execute(stmt)
+
+
+def _recompute_investment_totals(db: Session, batch_size: int = 5000):
+    """Rewrite every user's total from the ledger: one grouped query, multi-row upserts."""
+    spending, category, ranking = models.CategorySpending, models.ExpenseCategory, models.InvestmentRanking
+    totals = dict(db.query(spending.owner_id, func.sum(spending.total)).join(
+        category, spending.category_id == category.id
+    ).filter(category.is_investment.is_(True)).group_by(spending.owner_id).all())
+    pseudonyms = dict(db.query(ranking.owner_id, ranking.pseudonym))
+    taken = set(pseudonyms.values())
+    for owner_id in sorted(set(totals) - set(pseudonyms)):
+        pseudonyms[owner_id] = _unique_pseudonym(owner_id, taken.__contains__)
+        taken.add(pseudonyms[owner_id])
+    rows = [
+        {"owner_id": owner_id, "pseudonym": pseudonym, "total": totals.get(owner_id, 0.0)}
+        for owner_id, pseudonym in pseudonyms.items()
+    ]
+    for start in range(0, len(rows), batch_size):
+        stmt = _upsert(db, ranking).values(rows[start:start + batch_size])
+        db.execute(stmt.on_conflict_do_update(index_elements=["owner_id"], set_={"total": stmt.excluded.total}))
+
+
+def refresh_investment_ranks(db: Session, recompute_totals: bool = False):
+    """Renumber ``rank`` for everyone with one window-function UPDATE; returns the number of ranked users."""
+    ranking = models.InvestmentRanking
+    if recompute_totals:
+        _recompute_investment_totals(db)
+    now = datetime.utcnow()
+    ranked = select(
+        ranking.owner_id, func.rank().over(order_by=ranking.total.desc()).label("rank")
+    ).where(ranking.total > 0).subquery()
+    result = db.execute(update(ranking).where(ranking.owner_id == ranked.c.owner_id).values(rank=ranked.c.rank, ranked_at=now))
+    db.execute(update(ranking).where(ranking.total <= 0).values(rank=None, ranked_at=now))
+    db.commit()
+    return result.rowcount
+
+
+def get_investment_rating(db: Session, owner_id: int, limit: int = 10):
+    """Top ``limit`` by the indexed ``rank`` plus the caller's own row."""
+    ranking = models.InvestmentRanking
+    top = db.query(ranking).filter(ranking.rank.is_not(None), ranking.rank <= limit).order_by(ranking.rank, ranking.owner_id).limit(limit).all()
+    me = db.get(ranking, owner_id)
+    ranked_at = (top[0].ranked_at if top else None) or (me.ranked_at if me else None)
+    return {"ranked_at": ranked_at, "top": top, "me": me}
+
+
+def _allocate_change_seqs(db: Session, owner_id: int, count: int = 1) -> int:
+    """Reserve ``count`` consecutive numbers of the user's change sequence; returns the first one.
+
+    The UPDATE locks the user's row until commit, so a user's writers take their numbers in
+    commit order: once a number is visible, every smaller one is committed too.
+    """
+    last = db.execute(
+        update(models.User).where(models.User.id == owner_id).values(change_seq=models.User.change_seq + count).returning(models.User.change_seq)
+    ).scalar_one()
+    return last - count + 1
+
+
+def _add_tombstones(db: Session, owner_id: int, kind: str, deleted: Sequence[tuple]):
+    """Record deleted transactions as ``(transaction_id, change_seq)`` pairs."""
+    now = datetime.utcnow()
+    db.execute(insert(models.TransactionTombstone), [
+        {"owner_id": owner_id, "kind": kind, "transaction_id": transaction_id, "change_seq": seq, "deleted_at": now}
+        for transaction_id, seq in deleted
+    ])
+
+
+def _apply_transaction_delta(db: Session, kind: str, owner_id: int, category_id: Optional[int], day: Optional[date], amount: float, count: int = 1):
+    """Keep every maintained aggregate in step with one added (or, with negative values, removed) transaction.
+
+    Returns the category's new monthly total for expenses, for the limit check.
+    """
+    if day is None:
+        return None
+    _apply_rollup_rows(db, _rollup_rows(kind, owner_id, category_id, day, amount, count))
+    if kind == "expense":
+        month_total = _apply_expense_spending(db, owner_id, category_id, day, amount, count)
+        if _is_investment_category(db, category_id):
+            refresh_investment_total(db, owner_id)
+        return month_total
+    return None
+
+
+def _apply_batch_deltas(db: Session, kind: str, owner_id: int, values: list):
+    """Aggregate-maintenance for a batch of transactions: one upsert per key instead of per row.
+
+    Each value is a dict with ``category_id``, ``date`` and ``amount``; removals carry a negative
+    ``amount`` and ``count=-1``.
+    """
+    rollups = {}
+    monthly = {}
+    for value in values:
+        if value["date"] is None:
+            continue
+        value_count = value.get("count", 1)
+        for row in _rollup_rows(kind, owner_id, value["category_id"], value["date"], value["amount"], value_count):
+            key = (row["granularity"], row["period_start"], row["category_id"])
+            if key in rollups:
+                rollups[key]["total"] += row["total"]
+                rollups[key]["count"] += value_count
+            else:
+                rollups[key] = row
+        if kind == "expense":
+            key = (value["category_id"], _month_start(value["date"]))
+            total, count = monthly.get(key, (0.0, 0))
+            monthly[key] = (total + value["amount"], count + value_count)
+    _apply_rollup_rows(db, list(rollups.values()))
+    for (category_id, month), (total, count) in monthly.items():
+        _apply_expense_spending(db, owner_id, category_id, month, total, count=count)
+    if any(_is_investment_category(db, category_id) for category_id in {category_id for category_id, _ in monthly}):
+        refresh_investment_total(db, owner_id)
+
+
+def move_category_aggregates(db: Session, kind: str, owner_id: int, source_ids: Sequence[int], target_id: int):
+    """Fold the maintained aggregates of ``source_ids`` into ``target_id`` when their transactions are reassigned."""
+    rollup = models.PeriodRollup
+    # GROUP BY: кілька джерел дають один ключ цілі, а ON CONFLICT не може оновити рядок двічі
+    source_rows = select(
+        rollup.owner_id, rollup.granularity, rollup.period_start, rollup.kind, literal(target_id), func.sum(rollup.total), func.sum(rollup.count)
+    ).where(
+        rollup.owner_id == owner_id, rollup.kind == kind, rollup.category_id.in_(source_ids)
+    ).group_by(rollup.owner_id, rollup.granularity, rollup.period_start, rollup.kind)
+    stmt = _upsert(db, rollup).from_select(
+        ["owner_id", "granularity", "period_start", "kind", "category_id", "total", "count"], source_rows
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["owner_id", "granularity", "period_start", "kind", "category_id"],
+        set_={"total": rollup.total + stmt.excluded.total, "count": rollup.count + stmt.excluded.count},
+    )
+    db.execute(stmt)
+    db.query(rollup).filter(
+        rollup.owner_id == owner_id, rollup.kind == kind, rollup.category_id.in_(source_ids)
+    ).delete(synchronize_session=False)
+    if kind == "expense":
+        move_category_spending(db, owner_id, source_ids, target_id)
+        touches_investments = db.query(models.ExpenseCategory.id).filter(
+            models.ExpenseCategory.id.in_([*source_ids, target_id]), models.ExpenseCategory.is_investment.is_(True)
+        ).first()
+        if touches_investments:
+            refresh_investment_total(db, owner_id)
+
+
+def move_category_spending(db: Session, owner_id: int, source_ids: Sequence[int], target_id: int):
+    """Fold the ledger rows of ``source_ids`` into ``target_id`` when their expenses are reassigned."""
+    ledger = models.CategorySpending
+    source_rows = select(ledger.owner_id, literal(target_id), ledger.month, func.sum(ledger.total), func.sum(ledger.count)).where(
+        ledger.owner_id == owner_id, ledger.category_id.in_(source_ids)
+    ).group_by(ledger.owner_id, ledger.month)
+    stmt = _upsert(db, ledger).from_select(["owner_id", "category_id", "month", "total", "count"], source_rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["owner_id", "category_id", "month"],
+        set_={"total": ledger.total + stmt.excluded.total, "count": ledger.count + stmt.excluded.count},
+    )
+    db.execute(stmt)
+    db.query(ledger).filter(ledger.owner_id == owner_id, ledger.category_id.in_(source_ids)).delete(synchronize_session=False)
+
+
+def get_category_month_total(db: Session, owner_id: int, category_id: int, month: date) -> float:
+    row = db.query(models.CategorySpending.total).filter(
+        models.CategorySpending.owner_id == owner_id,
+        models.CategorySpending.category_id == category_id,
+        models.CategorySpending.month == _month_start(month),
+    ).first()
+    return row[0] if row else 0.0
+
+
+def limit_warning(category, month_total: Optional[float]):
+    """The exceeded-limit warning for ``category`` at ``month_total``, or ``None`` within the limit."""
+    if category is None or category.limit is None or month_total is None or month_total <= category.limit:
+        return None
+    return {
+        "message": f"Ліміт категорії '{category.name}' перевищено!",
+        "limit": category.limit,
+        "total": month_total,
+        "exceeded": month_total - category.limit,
+    }
+
+
 def create_user_expense(db: Session, expense: schemas.ExpenseCreate, user_id: int):
-    """Create a new expense for the user, checking category limits if applicable."""
-    category_id = expense.category_id
-    if category_id:
-        category = db.query(models.ExpenseCategory).filter(models.ExpenseCategory.id == category_id, models.ExpenseCategory.owner_id == user_id).first()
-        
-    db_expense = models.Expense(**expense.dict(), owner_id=user_id)
+    """Create a new expense for the user, checking the monthly category limit if applicable.
+
+    The expense is stored even when the limit is exceeded; the returned object then carries
+    the details in ``warning`` (``None`` otherwise).
+    """
+    category = None
+    if expense.category_id:
+        category = db.query(models.ExpenseCategory).filter(models.ExpenseCategory.id == expense.category_id, models.ExpenseCategory.owner_id == user_id).first()
+
+    db_expense = models.Expense(**expense.dict(), owner_id=user_id, change_seq=_allocate_change_seqs(db, user_id))
     db.add(db_expense)
+    # Сума витрат категорії за місяць — з леджера, в тій самій транзакції
+    month_total = _apply_transaction_delta(db, "expense", user_id, expense.category_id, expense.date, expense.amount)
     db.commit()
     db.refresh(db_expense)
-    if category and category.limit is not None:
-            # Сумарні витрати по категорії
-            total_expenses = db.query(models.Expense).filter(models.Expense.category_id == category_id, models.Expense.owner_id == user_id).with_entities(models.Expense.amount).all()
-            total = sum([e.amount for e in total_expenses]) + expense.amount
-            if total > category.limit:
-                raise HTTPException(
-                    status_code=400,
-                    detail={
-                        "message": f"Ліміт категорії '{category.name}' перевищено!",
-                        "limit": category.limit,
-                        "total": total,
-                        "exceeded": total - category.limit
-                    }
-                )
+    db_expense.warning = limit_warning(category, month_total)
     return db_expense
 
 
-def get_incomes(db: Session, owner_id: int, start_date: Optional[date] = None, end_date: Optional[date] = None, category_id: Optional[int] = None, skip: int = 0, limit: int = 100):
-    query = db.query(models.Income).filter(models.Income.owner_id == owner_id)
+def get_incomes(db: Session, owner_id: int, start_date: Optional[date] = None, end_date: Optional[date] = None, category_id: Optional[int] = None, skip: int = 0, limit: int = 100, with_total: bool = True, load: Sequence[str] = ("category",)):
+    query = _filter_transactions(db.query(models.Income), models.Income, owner_id, start_date, end_date, category_id)
+    total = query.count() if with_total else None
+    items = _newest_first(query, models.Income).options(*load_options(models.Income, load)).offset(skip).limit(limit).all()
+    return items, total
+
+
+def get_incomes_page(db: Session, owner_id: int, start_date: Optional[date] = None, end_date: Optional[date] = None, category_id: Optional[int] = None, cursor: Optional[str] = None, limit: int = 100, with_total: bool = False, load: Sequence[str] = ("category",)):
+    """Keyset-paginated incomes, newest first; cost per page does not grow with depth."""
+    query = _filter_transactions(db.query(models.Income), models.Income, owner_id, start_date, end_date, category_id)
+    total = query.count() if with_total else None
+    items, next_cursor = _keyset_page(query.options(*load_options(models.Income, load)), models.Income, cursor, limit)
+    return items, next_cursor, total
+
+
+TRANSACTION_COLUMNS = ("id", "date", "amount", "description", "category_id", "category")
+EXPENSE_COLUMNS = TRANSACTION_COLUMNS + ("quantity",)
+
+
+def get_transaction_columns(db: Session, model, category_model, owner_id: int, start_date: Optional[date] = None, end_date: Optional[date] = None, category_id: Optional[int] = None, skip: int = 0, limit: int = 100, cursor: Optional[str] = None, keyset: bool = False, with_total: bool = True):
+    """One page of transactions as columns (``{"id": [...], "amount": [...], ...}``) for the columnar listing.
+
+    Only the needed columns are selected, as plain tuples; category names come from one
+    ``id -> name`` lookup per request instead of a join and an ORM object per row.
+    Returns ``(columns, next_cursor, total)``; ``next_cursor`` is set only in keyset mode.
+    """
+    names = EXPENSE_COLUMNS if model is models.Expense else TRANSACTION_COLUMNS
+    selected = [getattr(model, name) for name in names if name != "category"]
+    query = _filter_transactions(db.query(*selected), model, owner_id, start_date, end_date, category_id)
+    total = query.count() if with_total else None
+    next_cursor = None
+    if keyset:
+        rows, next_cursor = _keyset_page(query, model, cursor, limit)
+    else:
+        rows = _newest_first(query, model).offset(skip).limit(limit).all()
+
+    values = list(zip(*rows)) if rows else [()] * len(selected)
+    # Порядок у names: id, date, amount, description, category_id, [quantity]; category вставляється після category_id
+    category_ids = values[4]
+    category_names = dict(db.query(category_model.id, category_model.name).filter(category_model.owner_id == owner_id).all()) if rows else {}
+    values.insert(5, [category_names.get(category_id) for category_id in category_ids])
+    return dict(zip(names, values)), next_cursor, total
+
+
+CHANGE_FEED_LIMIT = 1000
+
+
+def get_changes(db: Session, owner_id: int, since: int = 0, limit: int = CHANGE_FEED_LIMIT):
+    """Transactions created, updated or deleted after change number ``since``, oldest change first.
+
+    Each row carries the number of its latest change, so a row changed several times appears
+    once; deletions come from tombstones. Pass ``next_since`` back as ``since`` until
+    ``has_more`` is false. The watermark is read before the rows, so changes committed while
+    the page is read are left for the next call instead of being skipped.
+    """
+    watermark = db.query(models.User.change_seq).filter(models.User.id == owner_id).scalar() or 0
+    if since > watermark:
+        raise HTTPException(status_code=409, detail="since is ahead of the server; resync from 0")
+    changes = []
+    for kind, (model, _) in TRANSACTION_MODELS.items():
+        names = [name for name in (EXPENSE_COLUMNS if model is models.Expense else TRANSACTION_COLUMNS) if name != "category"]
+        rows = db.query(model.change_seq, *(getattr(model, name) for name in names)).filter(
+            model.owner_id == owner_id, model.change_seq > since, model.change_seq <= watermark
+        ).order_by(model.change_seq).limit(limit + 1).all()
+        changes.extend({"seq": seq, "kind": kind, "op": "upsert", "id": values[0], "data": dict(zip(names, values))} for seq, *values in rows)
+    tombstone = models.TransactionTombstone
+    rows = db.query(tombstone.change_seq, tombstone.kind, tombstone.transaction_id).filter(
+        tombstone.owner_id == owner_id, tombstone.change_seq > since, tombstone.change_seq <= watermark
+    ).order_by(tombstone.change_seq).limit(limit + 1).all()
+    changes.extend({"seq": seq, "kind": kind, "op": "delete", "id": transaction_id, "data": None} for seq, kind, transaction_id in rows)
+
+    changes.sort(key=lambda change: change["seq"])
+    has_more = len(changes) > limit
+    changes = changes[:limit]
+    next_since = changes[-1]["seq"] if has_more else watermark
+    return {"changes": changes, "next_since": next_since, "has_more": has_more}
+
+
+def get_category_totals(db: Session, model, category_model, owner_id: int, start_date: Optional[date] = None, end_date: Optional[date] = None, category_id: Optional[int] = None):
+    """Sum and count transactions per category in the database instead of in the client."""
+    query = db.query(
+        model.category_id,
+        category_model.name,
+        func.coalesce(func.sum(model.amount), 0.0),
+        func.count(model.id),
+    ).outerjoin(category_model, model.category_id == category_model.id)
+    query = _filter_transactions(query, model, owner_id, start_date, end_date, category_id)
+    rows = query.group_by(model.category_id, category_model.name).all()
+    return [
+        {"category_id": cat_id, "category": name or "Uncategorized", "total": total, "count": count}
+        for cat_id, name, total, count in rows
+    ]
+
+
+def get_financial_summary(db: Session, owner_id: int, start_date: Optional[date] = None, end_date: Optional[date] = None, category_id: Optional[int] = None, category_type: Optional[str] = None):
+    """Totals, balance and per-category breakdown for the requested period.
+
+    ``category_type`` ("income" or "expense") says which table ``category_id`` belongs to;
+    the other side is left out of the summary in that case.
+    """
+    incomes_by_category = []
+    expenses_by_category = []
+    if category_type != "expense":
+        incomes_by_category = get_category_totals(
+            db, models.Income, models.IncomeCategory, owner_id, start_date, end_date, category_id
+        )
+    if category_type != "income":
+        expenses_by_category = get_category_totals(
+            db, models.Expense, models.ExpenseCategory, owner_id, start_date, end_date, category_id
+        )
+    total_incomes = sum(c["total"] for c in incomes_by_category)
+    total_expenses = sum(c["total"] for c in expenses_by_category)
+    return {
+        "total_incomes": total_incomes,
+        "total_expenses": total_expenses,
+        "balance": total_incomes - total_expenses,
+        "income_count": sum(c["count"] for c in incomes_by_category),
+        "expense_count": sum(c["count"] for c in expenses_by_category),
+        "incomes_by_category": incomes_by_category,
+        "expenses_by_category": expenses_by_category,
+    }
+
+
+def get_period_totals(db: Session, owner_id: int, granularity: str = "month", start_date: Optional[date] = None, end_date: Optional[date] = None, category_id: Optional[int] = None, category_type: Optional[str] = None):
+    """Income/expense totals per week, month or year, read from ``period_rollups``.
+
+    Periods are whole: ``start_date`` selects the period that contains it, so the first
+    and last entries may cover days outside the requested range.
+    """
+    rollup = models.PeriodRollup
+    query = db.query(
+        rollup.period_start, rollup.kind, func.sum(rollup.total), func.sum(rollup.count)
+    ).filter(rollup.owner_id == owner_id, rollup.granularity == granularity)
     if start_date:
-        query = query.filter(models.Income.date >= start_date)
+        query = query.filter(rollup.period_start >= period_start(start_date, granularity))
     if end_date:
-        query = query.filter(models.Income.date <= end_date)
-    if category_id:
-        query = query.filter(models.Income.category_id == category_id)
-    total = query.count()
-    items = query.options(joinedload(models.Income.category)).offset(skip).limit(limit).all()
-    return items, total
+        query = query.filter(rollup.period_start <= end_date)
+    if category_type:
+        query = query.filter(rollup.kind == category_type)
+    if category_id is not None:
+        query = query.filter(rollup.category_id == category_id)
+    rows = query.group_by(rollup.period_start, rollup.kind).order_by(rollup.period_start).all()
+
+    periods = {}
+    for start, kind, total, count in rows:
+        period = periods.setdefault(start, {
+            "period_start": start, "total_incomes": 0.0, "total_expenses": 0.0, "income_count": 0, "expense_count": 0,
+        })
+        # Після видалень у rollup можуть лишатися нульові рядки
+        period["total_incomes" if kind == "income" else "total_expenses"] += total or 0.0
+        period["income_count" if kind == "income" else "expense_count"] += count or 0
+    result = []
+    for period in periods.values():
+        if period["income_count"] or period["expense_count"]:
+            period["balance"] = period["total_incomes"] - period["total_expenses"]
+            result.append(period)
+    return result
 
 
 def create_user_income(db: Session, income: schemas.IncomeCreate, user_id: int):
-    db_income = models.Income(**income.dict(), owner_id=user_id)
+    db_income = models.Income(**income.dict(), owner_id=user_id, change_seq=_allocate_change_seqs(db, user_id))
     db.add(db_income)
+    _apply_transaction_delta(db, "income", user_id, income.category_id, income.date, income.amount)
     db.commit()
     db.refresh(db_income)
     return db_income
@@ -102,8 +636,20 @@ def get_expense_categories(db: Session, owner_id: int, skip: int = 0, limit: int
     return db.query(models.ExpenseCategory).filter(models.ExpenseCategory.owner_id == owner_id).offset(skip).limit(limit).all()
 
 
+INVESTMENT_NAME_HINTS = ("інвестиці", "invest")
+
+
+def looks_like_investment(name: str) -> bool:
+    """Default for ``ExpenseCategory.is_investment`` when the client does not set it."""
+    name = name.lower()
+    return any(hint in name for hint in INVESTMENT_NAME_HINTS)
+
+
 def create_expense_category(db: Session, category: schemas.ExpenseCategoryCreate, owner_id: int):
-    db_category = models.ExpenseCategory(**category.dict(), owner_id=owner_id)
+    data = category.dict()
+    if data["is_investment"] is None:
+        data["is_investment"] = looks_like_investment(data["name"])
+    db_category = models.ExpenseCategory(**data, owner_id=owner_id)
     db.add(db_category)
     db.commit()
     db.refresh(db_category)
@@ -123,31 +669,271 @@ def create_income_category(db: Session, category: schemas.IncomeCategoryCreate,
 
 
 def delete_expense(db: Session, expense_id: int, owner_id: int):
-    db.query(models.Expense).filter(models.Expense.id == expense_id, models.Expense.owner_id == owner_id).delete()
+    db_expense = db.query(models.Expense).filter(models.Expense.id == expense_id, models.Expense.owner_id == owner_id).first()
+    if db_expense:
+        _apply_transaction_delta(db, "expense", owner_id, db_expense.category_id, db_expense.date, -db_expense.amount, count=-1)
+        _add_tombstones(db, owner_id, "expense", [(expense_id, _allocate_change_seqs(db, owner_id))])
+        db.delete(db_expense)
     db.commit()
 
 
 def delete_income(db: Session, income_id: int, owner_id: int):
-    db.query(models.Income).filter(models.Income.id == income_id, models.Income.owner_id == owner_id).delete()
+    db_income = db.query(models.Income).filter(models.Income.id == income_id, models.Income.owner_id == owner_id).first()
+    if db_income:
+        _apply_transaction_delta(db, "income", owner_id, db_income.category_id, db_income.date, -db_income.amount, count=-1)
+        _add_tombstones(db, owner_id, "income", [(income_id, _allocate_change_seqs(db, owner_id))])
+        db.delete(db_income)
     db.commit()
 
 
-def delete_expense_category(db: Session, category_id: int, owner_id: int):
-    db.query(models.ExpenseCategory).filter(models.ExpenseCategory.id == category_id, models.ExpenseCategory.owner_id == owner_id).delete()
+def _get_or_create_default_category(db: Session, category_model, owner_id: int):
+    default_category = db.query(category_model).filter(
+        category_model.name == "Uncategorized",
+        category_model.owner_id == owner_id
+    ).first()
+    if not default_category:
+        # Створюємо нову, якщо не існує
+        default_category = category_model(name="Uncategorized", owner_id=owner_id)
+        db.add(default_category)
+        db.flush()  # Отримуємо id для нової категорії
+    return default_category
+
+
+def merge_categories(db: Session, kind: str, owner_id: int, source_ids: Sequence[int], target_id: Optional[int] = None, not_found: str = "Category not found"):
+    """Move all transactions of ``source_ids`` into ``target_id`` ('Uncategorized' if None) and delete the sources.
+
+    One transaction, one set-based ``UPDATE ... WHERE category_id IN (...)`` for the rows and
+    ``INSERT ... SELECT`` upserts for the rollups and the spending ledger, whatever the number
+    of sources. Returns the target id, the number of merged categories and moved transactions.
+    """
+    model, category_model = TRANSACTION_MODELS[kind]
+    source_ids = list(dict.fromkeys(source_ids))
+    if not source_ids:
+        raise HTTPException(status_code=400, detail="No source categories given")
+    sources = db.query(category_model.id, category_model.name).filter(
+        category_model.id.in_(source_ids), category_model.owner_id == owner_id
+    ).all()
+    if len(sources) != len(source_ids):
+        raise HTTPException(status_code=404, detail=not_found)
+    # Забороняємо видалення категорії "Без категорії"
+    if any(name == "Uncategorized" for _, name in sources):
+        raise HTTPException(status_code=400, detail="Неможливо видалити стандартну категорію 'Без категорії'")
+
+    if target_id is None:
+        target_id = _get_or_create_default_category(db, category_model, owner_id).id
+    elif not db.query(category_model.id).filter(category_model.id == target_id, category_model.owner_id == owner_id).first():
+        raise HTTPException(status_code=404, detail="Target category not found")
+    if target_id in source_ids:
+        raise HTTPException(status_code=400, detail="Target category cannot be one of the sources")
+
+    # Перепризначаємо всі транзакції джерел на цільову категорію; кожен рядок отримує свій номер зміни
+    numbered = select(model.id, func.row_number().over(order_by=model.id).label("n")).where(
+        model.owner_id == owner_id, model.category_id.in_(source_ids)
+    ).subquery()
+    moved = db.query(func.count()).select_from(numbered).scalar()
+    if moved:
+        first_seq = _allocate_change_seqs(db, owner_id, moved)
+        db.execute(update(model).where(model.id == numbered.c.id).values(category_id=target_id, change_seq=first_seq - 1 + numbered.c.n))
+    move_category_aggregates(db, kind, owner_id=owner_id, source_ids=source_ids, target_id=target_id)
+    db.query(category_model).filter(
+        category_model.id.in_(source_ids), category_model.owner_id == owner_id
+    ).delete(synchronize_session=False)
     db.commit()
+    return {"target_id": target_id, "merged_categories": len(source_ids), "moved_transactions": moved}
+
+
+def delete_expense_category(db: Session, category_id: int, owner_id: int):
+    """Delete a category after moving its transactions to 'Uncategorized'."""
+    merge_categories(db, "expense", owner_id, [category_id], not_found="Expense category not found")
 
 
 def delete_income_category(db: Session, category_id: int, owner_id: int):
-    db.query(models.IncomeCategory).filter(models.IncomeCategory.id == category_id, models.IncomeCategory.owner_id == owner_id).delete()
+    merge_categories(db, "income", owner_id, [category_id], not_found="Income category not found")
+
+
+BATCH_OPERATIONS = ("create", "update", "delete")
+MAX_BATCH_OPERATIONS = 1000
+# Поля, від яких залежать леджер і rollup-и: жоден update (PUT чи пакет) не може їх обнулити
+REQUIRED_UPDATE_FIELDS = ("amount", "date")
+
+
+def _null_required_fields(update_data: dict) -> Optional[str]:
+    """Error message if ``update_data`` sets any of ``REQUIRED_UPDATE_FIELDS`` to null, else ``None``."""
+    nulls = [field for field in REQUIRED_UPDATE_FIELDS if field in update_data and update_data[field] is None]
+    return f"{', '.join(nulls)} cannot be null" if nulls else None
+
+
+def _validation_message(exc: ValidationError) -> str:
+    return "; ".join(f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}" for error in exc.errors())
+
+
+def apply_transaction_batch(db: Session, kind: str, owner_id: int, operations: list, atomic: bool = True):
+    """Apply create/update/delete operations on the user's expenses or incomes in one transaction.
+
+    Referenced rows and categories are each fetched (and ownership-checked) with one query for
+    the whole batch; aggregates are maintained with one upsert per key, and everything is
+    committed once. With ``atomic`` any invalid item leaves the data untouched; otherwise
+    invalid items are skipped. Returns per-item results in request order.
+    """
+    model, category_model = TRANSACTION_MODELS[kind]
+    create_schema = schemas.ExpenseCreate if kind == "expense" else schemas.IncomeCreate
+    not_found = "Expense not found" if kind == "expense" else "Income not found"
+
+    row_ids = {operation.id for operation in operations if operation.id is not None}
+    rows = {row.id: row for row in db.query(model).filter(model.id.in_(row_ids), model.owner_id == owner_id)} if row_ids else {}
+    # Категорії наявних рядків теж потрібні: update лише суми перевіряє ліміт їхньої категорії
+    category_ids = {operation.data.category_id for operation in operations if operation.data and operation.data.category_id}
+    category_ids |= {row.category_id for row in rows.values() if row.category_id}
+    categories = {
+        category.id: category
+        for category in db.query(category_model).filter(category_model.id.in_(category_ids), category_model.owner_id == owner_id)
+    } if category_ids else {}
+
+    # Перевірка всього пакета до будь-яких змін
+    results, valid, seen_ids = [], [], set()
+    for index, operation in enumerate(operations):
+        result = {"index": index, "op": operation.op, "id": operation.id, "status": "ok", "error": None, "warning": None}
+        results.append(result)
+        data = operation.data.dict(exclude_unset=True) if operation.data else {}
+        try:
+            if operation.op not in BATCH_OPERATIONS:
+                raise ValueError(f"op must be one of: {', '.join(BATCH_OPERATIONS)}")
+            if operation.op == "create":
+                data = create_schema(**data).dict()
+            else:
+                if operation.id not in rows:
+                    raise ValueError(not_found)
+                if operation.id in seen_ids:
+                    raise ValueError("The same transaction appears more than once in the batch")
+                seen_ids.add(operation.id)
+                if operation.op == "update" and not data:
+                    raise ValueError("Nothing to update")
+                error = _null_required_fields(data)
+                if error:
+                    raise ValueError(error)
+            if data.get("category_id") and data["category_id"] not in categories:
+                raise ValueError("Category not found")
+        except ValidationError as exc:
+            result.update(status="error", error=_validation_message(exc))
+        except ValueError as exc:
+            result.update(status="error", error=str(exc))
+        else:
+            valid.append((result, operation, data))
+
+    failed = len(operations) - len(valid)
+    if atomic and failed:
+        for result in results:
+            if result["status"] == "ok":
+                result["status"] = "skipped"
+        return {"applied": 0, "failed": failed, "results": results}
+
+    deltas, written, deleted = [], [], []
+    next_seq = _allocate_change_seqs(db, owner_id, len(valid)) if valid else 0
+    for offset, (result, operation, data) in enumerate(valid):
+        if operation.op == "create":
+            row = model(**data, owner_id=owner_id)
+            db.add(row)
+        else:
+            row = rows[operation.id]
+            deltas.append({"category_id": row.category_id, "date": row.date, "amount": -row.amount, "count": -1})
+            if operation.op == "delete":
+                db.delete(row)
+                deleted.append((operation.id, next_seq + offset))
+                continue
+            for key, value in data.items():
+                setattr(row, key, value)
+        row.change_seq = next_seq + offset
+        deltas.append({"category_id": row.category_id, "date": row.date, "amount": row.amount})
+        written.append((result, row))
+    db.flush()
+    if deleted:
+        _add_tombstones(db, owner_id, kind, deleted)
+    _apply_batch_deltas(db, kind, owner_id, deltas)
+
+    # Ліміти: сума за місяць після всього пакета, по одному запиту на (категорію, місяць)
+    month_totals = {}
+    for result, row in written:
+        result["id"] = row.id
+        category = categories.get(row.category_id)
+        if kind != "expense" or category is None or category.limit is None or row.date is None:
+            continue
+        key = (category.id, _month_start(row.date))
+        if key not in month_totals:
+            month_totals[key] = get_category_month_total(db, owner_id, category.id, row.date)
+        result["warning"] = limit_warning(category, month_totals[key])
     db.commit()
+    return {"applied": len(valid), "failed": failed, "results": results}
+
+
+def get_investments(db: Session, owner_id: int, series: bool = False):
+    """Per-category sums and counts of the user's investment categories.
+
+    Totals come from the monthly spending ledger, so one grouped query answers for all
+    categories at once; ``series`` adds the per-month breakdown from the same rows.
+    """
+    ledger = models.CategorySpending
+    category = models.ExpenseCategory
+    rows = db.query(
+        category.id, category.name, ledger.month, ledger.total, ledger.count
+    ).outerjoin(
+        ledger, (ledger.category_id == category.id) & (ledger.owner_id == owner_id)
+    ).filter(
+        category.owner_id == owner_id, category.is_investment.is_(True)
+    ).order_by(category.name, ledger.month).all()
+
+    investments = {}
+    for category_id, name, month, total, count in rows:
+        item = investments.setdefault(category_id, {
+            "category_id": category_id, "category": name, "sum": 0.0, "count": 0, "series": [] if series else None,
+        })
+        if month is None:
+            continue
+        item["sum"] += total
+        item["count"] += count
+        if series:
+            item["series"].append({"month": month, "sum": total, "count": count})
+    items = list(investments.values())
+    return {"total_invested": sum(item["sum"] for item in items), "investments": items}
+
+
+def get_investment_holdings(db: Session, owner_id: int):
+    """Invested amount and units per investment category that has a ticker, in one grouped query."""
+    category, expense = models.ExpenseCategory, models.Expense
+    rows = db.query(
+        category.id, category.name, category.ticker, func.coalesce(func.sum(expense.amount), 0.0), func.sum(expense.quantity)
+    ).outerjoin(
+        expense, (expense.category_id == category.id) & (expense.owner_id == owner_id)
+    ).filter(
+        category.owner_id == owner_id, category.is_investment.is_(True), category.ticker.is_not(None)
+    ).group_by(category.id, category.name, category.ticker).order_by(category.name).all()
+    return [
+        {"category_id": category_id, "category": name, "ticker": ticker.upper(), "invested": invested, "quantity": quantity}
+        for category_id, name, ticker, invested, quantity in rows
+    ]
+
+
+def get_investment_expenses_page(db: Session, owner_id: int, category_id: Optional[int] = None, cursor: Optional[str] = None, limit: int = 50, load: Sequence[str] = ("category",)):
+    """Keyset-paginated drill-down into individual investment expenses."""
+    investment_categories = select(models.ExpenseCategory.id).where(
+        models.ExpenseCategory.owner_id == owner_id, models.ExpenseCategory.is_investment.is_(True)
+    )
+    query = _filter_transactions(db.query(models.Expense), models.Expense, owner_id, category_id=category_id)
+    query = query.filter(models.Expense.category_id.in_(investment_categories))
+    return _keyset_page(query.options(*load_options(models.Expense, load)), models.Expense, cursor, limit)
 
 
 def update_income(db: Session, income_id: int, income_data: schemas.IncomeUpdate, owner_id: int):
     db_income = db.query(models.Income).filter(models.Income.id == income_id, models.Income.owner_id == owner_id).first()
     if db_income:
         update_data = income_data.dict(exclude_unset=True)
+        error = _null_required_fields(update_data)
+        if error:
+            raise HTTPException(status_code=400, detail=error)
+        _apply_transaction_delta(db, "income", owner_id, db_income.category_id, db_income.date, -db_income.amount, count=-1)
         for key, value in update_data.items():
             setattr(db_income, key, value)
+        _apply_transaction_delta(db, "income", owner_id, db_income.category_id, db_income.date, db_income.amount)
+        db_income.change_seq = _allocate_change_seqs(db, owner_id)
         db.commit()
         db.refresh(db_income)
     return db_income
@@ -157,8 +943,14 @@ def update_expense(db: Session, expense_id: int, expense_data: schemas.ExpenseUp
     db_expense = db.query(models.Expense).filter(models.Expense.id == expense_id, models.Expense.owner_id == owner_id).first()
     if db_expense:
         update_data = expense_data.dict(exclude_unset=True)
+        error = _null_required_fields(update_data)
+        if error:
+            raise HTTPException(status_code=400, detail=error)
+        _apply_transaction_delta(db, "expense", owner_id, db_expense.category_id, db_expense.date, -db_expense.amount, count=-1)
         for key, value in update_data.items():
             setattr(db_expense, key, value)
+        _apply_transaction_delta(db, "expense", owner_id, db_expense.category_id, db_expense.date, db_expense.amount)
+        db_expense.change_seq = _allocate_change_seqs(db, owner_id)
         db.commit()
         db.refresh(db_expense)
     return db_expense
@@ -184,8 +976,253 @@ def update_expense_category(db: Session, category_id: int, category_data: schema
         if db_category.name == "Uncategorized":
             raise HTTPException(status_code=400, detail="Cannot rename the default category 'Uncategorized'")
         update_data = category_data.dict(exclude_unset=True)
+        if update_data.get("is_investment") is None:
+            update_data.pop("is_investment", None)
+        investment_changed = update_data.get("is_investment", db_category.is_investment) != db_category.is_investment
         for key, value in update_data.items():
             setattr(db_category, key, value)
+        if investment_changed:
+            db.flush()
+            refresh_investment_total(db, owner_id)
         db.commit()
         db.refresh(db_category)
-    return db_category
\ No newline at end of file
+    return db_category
+
+IMPORT_BATCH_SIZE = 1000
+MAX_REPORTED_IMPORT_ERRORS = 1000
+
+def _flush_import_batch(db: Session, owner_id: int, kind: str, rows: list, categories: dict, created: list):
+    """Insert one batch with its aggregates and commit it.
+
+    The commit releases the lock on the user's row taken by ``_allocate_change_seqs``, so the
+    user's other writes wait for one batch at most, not for the whole import.
+    """
+    model, category_model = TRANSACTION_MODELS[kind]
+    known = categories[kind]
+    missing = sorted({row["category"] for row in rows if row["category"] and row["category"] not in known})
+    if missing:
+        new_categories = db.execute(
+            insert(category_model).returning(category_model.id, category_model.name),
+            [
+                {"name": name, "owner_id": owner_id, **({"is_investment": looks_like_investment(name)} if kind == "expense" else {})}
+                for name in missing
+            ],
+        )
+        for category_id, name in new_categories:
+            known[name] = category_id
+            created.append({"type": kind, "name": name})
+    first_seq = _allocate_change_seqs(db, owner_id, len(rows))
+    values = [
+        {
+            "owner_id": owner_id,
+            "amount": row["amount"],
+            "description": row["description"],
+            "date": row["date"],
+            "category_id": known.get(row["category"]),
+            "change_seq": first_seq + offset,
+        }
+        for offset, row in enumerate(rows)
+    ]
+    db.execute(insert(model), values)
+    _apply_batch_deltas(db, kind, owner_id, values)
+    db.commit()
+
+
+def import_transactions(db: Session, owner_id: int, rows, batch_size: int = IMPORT_BATCH_SIZE, progress=None):
+    """Insert parsed import rows (see ``imports.read_rows``) with multi-row INSERTs, one transaction per batch.
+
+    Category names are resolved against the user's categories loaded once up front; unknown
+    names are created. Rejected rows are reported by line number and do not abort the import.
+    Batches are committed as they are flushed, so if the import fails midway the batches
+    already committed stay. ``progress(rows_done)`` is called after every flushed batch.
+    """
+    categories = {
+        kind: dict(db.query(category_model.name, category_model.id).filter(category_model.owner_id == owner_id).all())
+        for kind, (_, category_model) in TRANSACTION_MODELS.items()
+    }
+    batches = {"expense": [], "income": []}
+    imported = {"expense": 0, "income": 0}
+    created = []
+    errors = []
+    failed = 0
+    for line_no, row in rows:
+        if isinstance(row, Exception):
+            failed += 1
+            if len(errors) < MAX_REPORTED_IMPORT_ERRORS:
+                errors.append({"line": line_no, "error": str(row)})
+            continue
+        batch = batches[row["kind"]]
+        batch.append(row)
+        if len(batch) >= batch_size:
+            _flush_import_batch(db, owner_id, row["kind"], batch, categories, created)
+            imported[row["kind"]] += len(batch)
+            batch.clear()
+            if progress is not None:
+                progress(imported["expense"] + imported["income"] + failed)
+    for kind, batch in batches.items():
+        if batch:
+            _flush_import_batch(db, owner_id, kind, batch, categories, created)
+            imported[kind] += len(batch)
+    return {
+        "imported_expenses": imported["expense"],
+        "imported_incomes": imported["income"],
+        "created_categories": created,
+        "failed": failed,
+        "errors": errors,
+    }
+
+
+EXPORT_BATCH_SIZE = 2000
+
+
+def iter_transaction_rows(db: Session, owner_id: int, batch_size: int = EXPORT_BATCH_SIZE):
+    """Yield lists of ``(type, date, amount, description, category)`` tuples for the user's whole history.
+
+    Rows come straight from a server-side cursor in batches; no ORM objects are built.
+    """
+    for kind, (model, category_model) in TRANSACTION_MODELS.items():
+        stmt = (
+            select(literal(kind), model.date, model.amount, model.description, category_model.name)
+            .outerjoin(category_model, model.category_id == category_model.id)
+            .where(model.owner_id == owner_id)
+            .order_by(model.date, model.id)
+            .execution_options(yield_per=batch_size)
+        )
+        for partition in db.execute(stmt).partitions():
+            yield partition
+
+
+def rebuild_rollups(db: Session, owner_id: Optional[int] = None, batch_size: int = EXPORT_BATCH_SIZE):
+    """Recompute ``period_rollups`` from the transaction tables, for one user or everyone.
+
+    Transactions are pre-aggregated per day in the database and folded into weeks, months
+    and years here, so the same code works on every dialect. Returns the number of rows written.
+    """
+    rollup = models.PeriodRollup
+    delete_query = db.query(rollup)
+    if owner_id is not None:
+        delete_query = delete_query.filter(rollup.owner_id == owner_id)
+    delete_query.delete(synchronize_session=False)
+
+    written = 0
+    for kind, (model, _) in TRANSACTION_MODELS.items():
+        stmt = (
+            select(model.owner_id, model.category_id, model.date, func.sum(model.amount), func.count(model.id))
+            .where(model.date.is_not(None))
+            .group_by(model.owner_id, model.category_id, model.date)
+            .execution_options(yield_per=batch_size)
+        )
+        if owner_id is not None:
+            stmt = stmt.where(model.owner_id == owner_id)
+        rollups = {}
+        for partition in db.execute(stmt).partitions():
+            for row_owner, category_id, day, total, count in partition:
+                for row in _rollup_rows(kind, row_owner, category_id, day, total, count):
+                    key = (row_owner, row["granularity"], row["period_start"], row["category_id"])
+                    if key in rollups:
+                        rollups[key]["total"] += total
+                        rollups[key]["count"] += count
+                    else:
+                        rollups[key] = row
+        if rollups:
+            db.execute(insert(rollup), list(rollups.values()))
+        written += len(rollups)
+    db.commit()
+    return written
+
+
+def save_forecast_snapshots(db: Session, computed_on: date, forecasts: dict):
+    """Replace the stored forecasts of the users in ``forecasts`` (``{owner_id: data}``) with one upsert."""
+    if not forecasts:
+        return
+    stmt = _upsert(db, models.UserForecast).values([
+        {"owner_id": owner_id, "computed_on": computed_on, "data": data} for owner_id, data in forecasts.items()
+    ])
+    # ON CONFLICT: два перші запити одночасно не падають на первинному ключі
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=["owner_id"], set_={"computed_on": stmt.excluded.computed_on, "data": stmt.excluded.data}
+    ))
+    db.commit()
+
+
+def _enqueue_refresh(db: Session, owner_id: int, kind: str):
+    """Queue a ``kind`` job for the user unless one is already queued or running."""
+    job = models.Job
+    pending = db.query(job.id).filter(job.owner_id == owner_id, job.kind == kind, job.status.in_(("queued", "running"))).first()
+    if pending is None:
+        create_job(db, owner_id, kind)
+
+
+def get_user_forecast(db: Session, owner_id: int, today: Optional[date] = None):
+    """The stored forecast; a stale one is served as is while a ``forecast`` job refreshes it.
+
+    Only a user without any snapshot waits for the computation.
+    """
+    today = today or date.today()
+    snapshot = db.get(models.UserForecast, owner_id)
+    if snapshot is not None:
+        data = snapshot.data
+        if snapshot.computed_on < today:
+            _enqueue_refresh(db, owner_id, "forecast")
+        return data
+    forecasts = analytics.forecast_users(db, [owner_id], today, settings.analytics_lookback_months, settings.analytics_window_months)
+    save_forecast_snapshots(db, today, forecasts)
+    return forecasts[owner_id]
+
+
+def advice_etag(items: list) -> str:
+    return hashlib.sha1(json.dumps(items, sort_keys=True, ensure_ascii=False).encode()).hexdigest()[:32]
+
+
+def save_advice_snapshots(db: Session, computed_on: date, advices: dict):
+    """Store ``{owner_id: items}`` with one upsert; the version of a feed is bumped only when its content changed."""
+    if not advices:
+        return
+    advice = models.UserAdvice
+    stmt = _upsert(db, advice).values([
+        {"owner_id": owner_id, "version": 1, "etag": advice_etag(items), "computed_on": computed_on, "items": items}
+        for owner_id, items in advices.items()
+    ])
+    db.execute(stmt.on_conflict_do_update(index_elements=["owner_id"], set_={
+        "version": case((advice.etag != stmt.excluded.etag, advice.version + 1), else_=advice.version),
+        "etag": stmt.excluded.etag,
+        "items": stmt.excluded["items"],  # .items — метод колекції колонок
+        "computed_on": stmt.excluded.computed_on,
+    }))
+    db.commit()
+
+
+def get_user_advices(db: Session, owner_id: int, today: Optional[date] = None):
+    """The stored advice feed; a stale one is served as is while an ``advices`` job refreshes it.
+
+    Only a user without any feed waits for the computation.
+    """
+    today = today or date.today()
+    snapshot = db.get(models.UserAdvice, owner_id)
+    if snapshot is None:
+        save_advice_snapshots(db, today, analytics.advise_users(db, [owner_id], today, settings.analytics_lookback_months))
+        return db.get(models.UserAdvice, owner_id)
+    if snapshot.computed_on < today:
+        _enqueue_refresh(db, owner_id, "advices")
+        # create_job закомітив сесію — знімок перечитується одним запитом
+        db.refresh(snapshot)
+    return snapshot
+
+
+def create_job(db: Session, owner_id: Optional[int], kind: str, payload: Optional[dict] = None, input: Optional[bytes] = None):
+    db_job = models.Job(owner_id=owner_id, kind=kind, payload=payload or {}, input=input, created_at=datetime.utcnow())
+    db.add(db_job)
+    db.commit()
+    db.refresh(db_job)
+    return db_job
+
+
+def get_job(db: Session, job_id: int, owner_id: int):
+    db_job = db.query(models.Job).filter(models.Job.id == job_id, models.Job.owner_id == owner_id).first()
+    if db_job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return db_job
+
+
+def get_jobs(db: Session, owner_id: int, limit: int = 20):
+    return db.query(models.Job).filter(models.Job.owner_id == owner_id).order_by(models.Job.id.desc()).limit(limit).all()
@@ -0,0 +1,127 @@
+"""Streaming encoders for the full-history export (same columns as ``imports.COLUMNS``),
+and the compact JSON encoder used by the columnar finances listing."""
+import csv
+import io
+import json
+from datetime import date
+from typing import Iterable, Iterator
+
+try:
+    import orjson
+except ImportError:  # є в requirements.txt; запасний шлях — для середовищ без нього
+    orjson = None
+
+from .imports import COLUMNS
+
+FORMATS = ("csv", "jsonl", "parquet")
+MEDIA_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "jsonl": "application/x-ndjson",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+
+def parquet_available() -> bool:
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _json_default(value):
+    if isinstance(value, date):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def json_bytes(data) -> bytes:
+    """Encode ``data`` (dates as ISO strings, tuples as arrays) with orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"), default=_json_default).encode()
+
+
+def _csv_chunks(batches: Iterable[list]) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(COLUMNS)
+    for batch in batches:
+        writer.writerows((kind, day.isoformat() if day else "", amount, description or "", category or "")
+                         for kind, day, amount, description, category in batch)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue().encode()
+
+
+def _jsonl_chunks(batches: Iterable[list]) -> Iterator[bytes]:
+    for batch in batches:
+        lines = [
+            json.dumps(dict(zip(COLUMNS, (kind, day.isoformat() if day else None, amount, description, category))), ensure_ascii=False)
+            for kind, day, amount, description, category in batch
+        ]
+        yield ("\n".join(lines) + "\n").encode()
+
+
+class _ChunkSink:
+    """Write-only file object that hands written bytes back out while keeping ``tell()`` absolute."""
+
+    closed = False
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def writable(self) -> bool:
+        return True
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _parquet_chunks(batches: Iterable[list]) -> Iterator[bytes]:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([
+        ("type", pa.string()),
+        ("date", pa.date32()),
+        ("amount", pa.float64()),
+        ("description", pa.string()),
+        ("category", pa.string()),
+    ])
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema)
+    for batch in batches:
+        columns = list(zip(*batch))
+        writer.write_table(pa.Table.from_arrays([pa.array(col, type=field.type) for col, field in zip(columns, schema)], schema=schema))
+        # кожна партія — окрема row group, віддаємо байти одразу
+        yield sink.drain()
+    writer.close()
+    yield sink.drain()
+
+
+def encode(batches: Iterable[list], fmt: str) -> Iterator[bytes]:
+    """Encode row batches from ``crud.iter_transaction_rows`` into chunks of ``fmt``."""
+    if fmt == "csv":
+        return _csv_chunks(batches)
+    if fmt == "jsonl":
+        return _jsonl_chunks(batches)
+    return _parquet_chunks(batches)
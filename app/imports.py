@@ -0,0 +1,65 @@
+"""Parsing of bank-statement style imports (CSV or JSON lines) into plain row dicts."""
+import csv
+import io
+import json
+from datetime import date
+from typing import IO, Iterator, Tuple
+
+FORMATS = ("csv", "jsonl")
+# type — "expense" або "income", category — назва категорії користувача
+COLUMNS = ("type", "date", "amount", "description", "category")
+
+
+def _raw_rows(text: IO[str], fmt: str) -> Iterator[Tuple[int, object]]:
+    if fmt == "csv":
+        reader = csv.DictReader(text)
+        for row in reader:
+            yield reader.line_num, row
+    else:
+        for line_no, line in enumerate(text, start=1):
+            if not line.strip():
+                continue
+            try:
+                yield line_no, json.loads(line)
+            except ValueError as exc:
+                yield line_no, exc
+
+
+def clean_row(raw) -> dict:
+    """Validate one raw row and return ``{"kind", "date", "amount", "description", "category"}``."""
+    if isinstance(raw, Exception):
+        raise ValueError(f"invalid JSON: {raw}")
+    if not isinstance(raw, dict):
+        raise ValueError("row must be an object")
+    # JSON може дати число чи список замість рядка — str(), а не AttributeError
+    kind = str(raw.get("type") or "").strip().lower()
+    if kind not in ("expense", "income"):
+        raise ValueError("type must be 'expense' or 'income'")
+    try:
+        day = date.fromisoformat(str(raw.get("date") or "").strip())
+    except ValueError:
+        raise ValueError("date must be YYYY-MM-DD")
+    try:
+        amount = float(raw.get("amount"))
+    except (TypeError, ValueError):
+        raise ValueError("amount must be a number")
+    description = raw.get("description") or None
+    if description is not None:
+        description = str(description)
+        if kind == "expense" and len(description) > 100:
+            raise ValueError("description is longer than 100 characters")
+    category = (str(raw.get("category") or "")).strip() or None
+    return {"kind": kind, "date": day, "amount": amount, "description": description, "category": category}
+
+
+def read_rows(stream: IO[bytes], fmt: str) -> Iterator[Tuple[int, object]]:
+    """Yield ``(line_no, row)`` pairs; ``row`` is a cleaned dict or the ``ValueError`` explaining why it was rejected.
+
+    The binary stream is decoded lazily, so uploads are never held in memory as a whole.
+    """
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    for line_no, raw in _raw_rows(text, fmt):
+        try:
+            yield line_no, clean_row(raw)
+        except ValueError as exc:
+            yield line_no, exc
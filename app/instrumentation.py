@@ -0,0 +1,244 @@
+"""Opt-in request and SQL instrumentation (``INSTRUMENTATION=1``).
+
+``InstrumentationMiddleware`` measures each request's wall time; engine events installed
+with ``instrument_engine`` count the statements that request ran, their total time and the
+slowest one. Per-request numbers go out as a ``Server-Timing`` header; aggregates per route
+are rendered in Prometheus text format by ``render_metrics`` (``GET /metrics``). A request
+that runs more than ``INSTRUMENTATION_N_PLUS_ONE`` statements is logged together with the
+statement it repeated most, which is how N+1 loops show up.
+"""
+import bisect
+import logging
+import re
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+from typing import Optional
+
+from sqlalchemy import event
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+# Межі гістограми тривалості запиту, секунди
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class RequestStats:
+    """SQL work done while serving one request."""
+
+    __slots__ = ("statements", "db_time", "slowest_time", "slowest_statement", "counts")
+
+    def __init__(self):
+        self.statements = 0
+        self.db_time = 0.0
+        self.slowest_time = 0.0
+        self.slowest_statement = None
+        self.counts = Counter()
+
+    def record(self, statement: str, seconds: float):
+        self.statements += 1
+        self.db_time += seconds
+        self.counts[statement] += 1
+        if seconds > self.slowest_time:
+            self.slowest_time = seconds
+            self.slowest_statement = statement
+
+
+# Об'єкт змінний: синхронні ендпоінти виконуються в пулі потоків з копією контексту,
+# тож вони дописують у той самий RequestStats
+_current: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # Час старту — в контексті виконання, а не в стеку з'єднання: невдалий запит не отримує
+    # after_cursor_execute, і стек зсунув би пари старт/кінець для наступних запитів
+    if context is not None:
+        context._instrumentation_start = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # pop: помилка після виконання (під час fetch) не порахує запит удруге
+    started = vars(context).pop("_instrumentation_start", None) if context is not None else None
+    stats = _current.get()
+    if stats is not None and started is not None:
+        stats.record(statement, time.perf_counter() - started)
+
+
+def _handle_error(exception_context):
+    # Запит, що впав (обмеження, statement_timeout), теж рахується — разом із часом до помилки
+    context = exception_context.execution_context
+    if context is not None and exception_context.statement is not None:
+        _after_cursor_execute(None, None, exception_context.statement, None, context, False)
+
+
+def instrument_engine(engine):
+    """Attach the statement timing hooks to a (sync) engine; safe to call more than once."""
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(engine, "handle_error", _handle_error)
+
+
+class RouteMetrics:
+    __slots__ = ("requests", "errors", "duration_sum", "buckets", "statements", "db_time")
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.duration_sum = 0.0
+        self.buckets = [0] * (len(DURATION_BUCKETS) + 1)
+        self.statements = 0
+        self.db_time = 0.0
+
+
+class MetricsRegistry:
+    """Counters per (method, route template); thread-safe."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._routes = {}
+        self.n_plus_one = 0
+
+    def observe(self, method: str, route: str, status: int, seconds: float, stats: RequestStats):
+        with self._lock:
+            metrics = self._routes.get((method, route))
+            if metrics is None:
+                metrics = self._routes[(method, route)] = RouteMetrics()
+            metrics.requests += 1
+            metrics.errors += status >= 500
+            metrics.duration_sum += seconds
+            metrics.buckets[bisect.bisect_left(DURATION_BUCKETS, seconds)] += 1
+            metrics.statements += stats.statements
+            metrics.db_time += stats.db_time
+
+    def count_n_plus_one(self):
+        with self._lock:
+            self.n_plus_one += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {key: _copy_metrics(value) for key, value in self._routes.items()}, self.n_plus_one
+
+
+def _copy_metrics(metrics: RouteMetrics) -> RouteMetrics:
+    copy = RouteMetrics()
+    for name in RouteMetrics.__slots__:
+        value = getattr(metrics, name)
+        setattr(copy, name, list(value) if isinstance(value, list) else value)
+    return copy
+
+
+registry = MetricsRegistry()
+
+
+def _label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def render_metrics(pool_status: dict = None) -> str:
+    """Prometheus text exposition of the request/SQL counters (and pool gauges, if given)."""
+    routes, n_plus_one = registry.snapshot()
+    lines = [
+        "# HELP http_requests_total Requests served, by route template.",
+        "# TYPE http_requests_total counter",
+    ]
+    for (method, route), m in routes.items():
+        lines.append(f'http_requests_total{{method="{method}",route="{_label(route)}"}} {m.requests}')
+    lines += ["# HELP http_request_errors_total Requests that ended with a 5xx status.", "# TYPE http_request_errors_total counter"]
+    for (method, route), m in routes.items():
+        lines.append(f'http_request_errors_total{{method="{method}",route="{_label(route)}"}} {m.errors}')
+    lines += ["# HELP http_request_duration_seconds Request wall time.", "# TYPE http_request_duration_seconds histogram"]
+    for (method, route), m in routes.items():
+        labels = f'method="{method}",route="{_label(route)}"'
+        cumulative = 0
+        for bound, count in zip(DURATION_BUCKETS, m.buckets):
+            cumulative += count
+            lines.append(f'http_request_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+        lines.append(f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}} {m.requests}')
+        lines.append(f"http_request_duration_seconds_sum{{{labels}}} {m.duration_sum:.6f}")
+        lines.append(f"http_request_duration_seconds_count{{{labels}}} {m.requests}")
+    lines += ["# HELP db_statements_total SQL statements executed while serving requests.", "# TYPE db_statements_total counter"]
+    for (method, route), m in routes.items():
+        lines.append(f'db_statements_total{{method="{method}",route="{_label(route)}"}} {m.statements}')
+    lines += ["# HELP db_statement_seconds_total Time spent in SQL statements while serving requests.", "# TYPE db_statement_seconds_total counter"]
+    for (method, route), m in routes.items():
+        lines.append(f'db_statement_seconds_total{{method="{method}",route="{_label(route)}"}} {m.db_time:.6f}')
+    lines += [
+        "# HELP db_n_plus_one_requests_total Requests over the statement-count threshold.",
+        "# TYPE db_n_plus_one_requests_total counter",
+        f"db_n_plus_one_requests_total {n_plus_one}",
+    ]
+    for engine_name, status in (pool_status or {}).items():
+        for key, value in status.items():
+            if isinstance(value, (int, float)):
+                lines.append(f'db_pool_{key}{{engine="{engine_name}"}} {value}')
+    return "\n".join(lines) + "\n"
+
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def _short(statement: str, limit: int = 300) -> str:
+    statement = _WHITESPACE.sub(" ", statement).strip()
+    return statement if len(statement) <= limit else statement[:limit] + "..."
+
+
+def _route_template(scope) -> str:
+    """``/jobs/{job_id}`` rather than ``/jobs/42``: one series per route, not per URL."""
+    if scope.get("route") is None:
+        return "unmatched"
+    # Шаблон відновлюється зі шляху й параметрів: route.path у вкладених роутерах не містить префікса
+    names = {str(value): name for name, value in scope.get("path_params", {}).items()}
+    return "/".join("{%s}" % names[part] if part in names else part for part in scope["path"].split("/"))
+
+
+class InstrumentationMiddleware:
+    """ASGI middleware: times the request, adds ``Server-Timing`` and feeds ``registry``."""
+
+    def __init__(self, app, n_plus_one_threshold: int = None):
+        self.app = app
+        self.n_plus_one_threshold = n_plus_one_threshold or settings.instrumentation_n_plus_one
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        stats = RequestStats()
+        token = _current.set(stats)
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                total = (time.perf_counter() - started) * 1000
+                timing = (
+                    f"app;dur={total:.1f}, db;dur={stats.db_time * 1000:.1f};desc=\"{stats.statements} queries\", "
+                    f"db-slowest;dur={stats.slowest_time * 1000:.1f}"
+                )
+                message = dict(message, headers=list(message.get("headers", [])) + [(b"server-timing", timing.encode())])
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+            seconds = time.perf_counter() - started
+            route = _route_template(scope)
+            registry.observe(scope["method"], route, status, seconds, stats)
+            if stats.statements > self.n_plus_one_threshold:
+                self._log_n_plus_one(scope["method"], route, stats)
+
+    @staticmethod
+    def _log_n_plus_one(method: str, route: str, stats: RequestStats):
+        registry.count_n_plus_one()
+        statement, repeats = stats.counts.most_common(1)[0]
+        logger.warning(
+            "Possible N+1 on %s %s: %s statements (%.1f ms); repeated %s times: %s; slowest %.1f ms: %s",
+            method, route, stats.statements, stats.db_time * 1000, repeats, _short(statement),
+            stats.slowest_time * 1000, _short(stats.slowest_statement),
+        )
@@ -0,0 +1,167 @@
+"""Job queue on top of the ``jobs`` table; no external broker is needed.
+
+Request handlers enqueue with ``crud.create_job``; ``app.worker`` processes claim jobs one at
+a time with ``FOR UPDATE SKIP LOCKED`` so any number of workers can poll the same table
+without handing a job out twice.
+"""
+import io
+import logging
+import traceback
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, Optional
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from . import analytics, crud, imports, models
+from .config import settings
+from .database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+HANDLERS: Dict[str, Callable] = {}
+# Задачі, які користувач може поставити сам через POST /jobs
+USER_JOB_KINDS = ("rebuild_rollups", "forecast", "advices")
+
+
+def handler(kind: str):
+    """Register ``fn(db, job, progress) -> result`` as the handler of ``kind`` jobs."""
+    def register(fn):
+        HANDLERS[kind] = fn
+        return fn
+    return register
+
+
+@handler("import")
+def run_import(db: Session, job: models.Job, progress):
+    rows = imports.read_rows(io.BytesIO(job.input), job.payload["format"])
+    result = crud.import_transactions(db, owner_id=job.owner_id, rows=rows, progress=progress)
+    processed = result["imported_expenses"] + result["imported_incomes"] + result["failed"]
+    progress(processed, processed)
+    return result
+
+
+@handler("rebuild_rollups")
+def run_rebuild_rollups(db: Session, job: models.Job, progress):
+    return {"rows": crud.rebuild_rollups(db, owner_id=job.owner_id)}
+
+
+@handler("forecast")
+def run_forecast(db: Session, job: models.Job, progress):
+    today = date.today()
+    forecasts = analytics.forecast_users(db, [job.owner_id], today, settings.analytics_lookback_months, settings.analytics_window_months)
+    crud.save_forecast_snapshots(db, today, forecasts)
+    return {"computed_on": today.isoformat()}
+
+
+@handler("advices")
+def run_advices(db: Session, job: models.Job, progress):
+    today = date.today()
+    crud.save_advice_snapshots(db, today, analytics.advise_users(db, [job.owner_id], today, settings.analytics_lookback_months))
+    snapshot = db.get(models.UserAdvice, job.owner_id)
+    return {"version": snapshot.version}
+
+
+@handler("nightly")
+def run_nightly_job(db: Session, job: models.Job, progress):
+    from .analytics.batch import run_nightly
+
+    # Усередині воркера — без власного пулу процесів
+    return {"users": run_nightly(job.payload.get("job", "forecasts"), workers=1)}
+
+
+@handler("refresh_ranking")
+def run_refresh_ranking(db: Session, job: models.Job, progress):
+    return {"ranked": crud.refresh_investment_ranks(db, recompute_totals=job.payload.get("recompute_totals", False))}
+
+
+def requeue_stale(db: Session, timeout: int, max_attempts: int):
+    """Put back jobs whose worker died: ``running`` for longer than ``timeout`` seconds.
+
+    A job that has already been claimed ``max_attempts`` times is marked ``failed`` instead, so
+    one that kills its worker every time does not loop forever. Returns ``(requeued, failed)``.
+    """
+    job = models.Job
+    now = datetime.utcnow()
+    stale = (job.status == "running", job.started_at < now - timedelta(seconds=timeout))
+    failed = db.execute(
+        update(job)
+        .where(*stale, job.attempts >= max_attempts)
+        .values(status="failed", error=f"Abandoned after {max_attempts} attempts", input=None, finished_at=now)
+    )
+    requeued = db.execute(update(job).where(*stale).values(status="queued"))
+    db.commit()
+    return requeued.rowcount, failed.rowcount
+
+
+def claim(db: Session) -> Optional[models.Job]:
+    """Take the oldest queued job and mark it running; other workers skip the locked row."""
+    stmt = (
+        select(models.Job)
+        .where(models.Job.status == "queued")
+        .order_by(models.Job.id)
+        .limit(1)
+        .with_for_update(skip_locked=True)
+    )
+    job = db.execute(stmt).scalars().first()
+    if job is None:
+        db.rollback()
+        return None
+    job.status = "running"
+    job.started_at = datetime.utcnow()
+    job.attempts += 1
+    db.commit()
+    return job
+
+
+class Progress:
+    """``progress(done, total=None)`` callback handed to job handlers.
+
+    Values are written from a separate session, so they are visible while the job's own
+    transaction is still open. SQLite allows only one writer, so there they are kept and
+    stored with the result instead.
+    """
+
+    def __init__(self, job_id: int, live: bool):
+        self.job_id = job_id
+        self.live = live
+        self.done = 0
+        self.total = None
+
+    def __call__(self, done: int, total: Optional[int] = None):
+        self.done, self.total = done, total
+        if self.live:
+            with SessionLocal() as progress_db:
+                progress_db.execute(update(models.Job).where(models.Job.id == self.job_id).values(progress_done=done, progress_total=total))
+                progress_db.commit()
+
+
+def run_job(db: Session, job: models.Job):
+    """Execute a claimed job and record its result or error."""
+    job_id = job.id
+    progress = Progress(job_id, live=db.get_bind().dialect.name != "sqlite")
+    try:
+        result = HANDLERS[job.kind](db, job, progress)
+    except Exception as exc:
+        db.rollback()
+        logger.exception("Job %s (%s) failed", job_id, job.kind)
+        job = db.get(models.Job, job_id)
+        job.status = "failed"
+        job.error = "".join(traceback.format_exception_only(type(exc), exc)).strip()
+    else:
+        job = db.get(models.Job, job_id)
+        job.status = "done"
+        job.result = result
+    job.progress_done, job.progress_total = progress.done, progress.total
+    job.input = None
+    job.finished_at = datetime.utcnow()
+    db.commit()
+
+
+def work_once(db: Session) -> bool:
+    """Claim and run one job; returns False when the queue is empty."""
+    job = claim(db)
+    if job is None:
+        return False
+    run_job(db, job)
+    return True
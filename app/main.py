@@ -1,50 +1,129 @@
-from fastapi import FastAPI, Request
+import time
+
+_import_started = time.perf_counter()
+
+import logging
+from contextlib import asynccontextmanager
+
+from fastapi import APIRouter, Depends, FastAPI, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import PlainTextResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 
-from . import models
-from .database import engine
-from .routers import users, finances, investments
+from . import cache, database, prices, security
+from .auth import get_current_active_user
+from .config import Settings, settings
+from .routers import users, finances, investments, analytics, jobs, system
 
-models.Base.metadata.create_all(bind=engine)
+# Схемою керує Alembic (alembic upgrade head); імпорт застосунку не звертається до бази
+IMPORT_SECONDS = time.perf_counter() - _import_started
 
-app = FastAPI()
+logger = logging.getLogger(__name__)
 
-app.mount("/static", StaticFiles(directory="app/static"), name="static")
 templates = Jinja2Templates(directory="app/templates")
+pages = APIRouter()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    started = time.perf_counter()
+    if app.state.settings.startup_warmup:
+        await _warm_up()
+    timings = app.state.startup
+    timings["warmup_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    timings["ready_ms"] = round((time.perf_counter() - _import_started) * 1000, 1)
+    logger.info("Startup: import %(import_ms)s ms, create_app %(create_app_ms)s ms, warmup %(warmup_ms)s ms, ready %(ready_ms)s ms", timings)
+    yield
+    await database.dispose_async_engine()
+    database.dispose_engines()
+
+
+async def _warm_up():
+    # Компіляція шаблонів і відкриття з'єднань до першого запиту; недоступна база не заважає старту
+    for name in templates.env.list_templates():
+        templates.env.get_template(name)
+    connections = database.warmup_connections()
+    try:
+        await run_in_threadpool(database.warm_up_pool, connections)
+        await database.warm_up_async_pool(connections)
+    except Exception as exc:
+        logger.warning("Database warmup failed, connecting on first request: %s", exc)
+
+
+def create_app(app_settings: Settings = None) -> FastAPI:
+    """Build the application; no database connection is made until the first request (or warmup).
 
-app.include_router(users.router, tags=["users"])
-app.include_router(finances.router, prefix="/finances" ,tags=["finances"])
-app.include_router(investments.router, prefix="/finances", tags=["investments"])
+    ``app_settings`` is applied to the whole process, not only to this app: every module reads
+    the shared ``config.settings``, which is updated in place, and the objects built from it
+    (engines, password context, auth cache, quote fetcher) are rebuilt.
+    """
+    started = time.perf_counter()
+    if app_settings is not None and app_settings is not settings:
+        database.configure(app_settings)
+        for module in (security, cache, prices):
+            module.reload()
 
-@app.get("/")
+    app = FastAPI(lifespan=lifespan)
+    app.state.settings = settings
+
+    if settings.instrumentation:
+        from .instrumentation import InstrumentationMiddleware, render_metrics
+
+        app.add_middleware(InstrumentationMiddleware, n_plus_one_threshold=settings.instrumentation_n_plus_one)
+
+        # Як і /system/pool: стан пулу й таймінги маршрутів — лише з токеном (bearer_token у Prometheus)
+        @app.get("/metrics", include_in_schema=False, dependencies=[Depends(get_current_active_user)])
+        def read_metrics():
+            return PlainTextResponse(render_metrics(database.pool_status()), media_type="text/plain; version=0.0.4")
+
+    app.mount("/static", StaticFiles(directory="app/static"), name="static")
+
+    app.include_router(users.router, tags=["users"])
+    app.include_router(finances.router, prefix="/finances" ,tags=["finances"])
+    app.include_router(investments.router, prefix="/finances", tags=["investments"])
+    app.include_router(analytics.router, prefix="/finances", tags=["analytics"])
+    app.include_router(jobs.router, prefix="/jobs", tags=["jobs"])
+    app.include_router(system.router, prefix="/system", tags=["system"])
+    app.include_router(pages)
+
+    app.state.startup = {
+        "import_ms": round(IMPORT_SECONDS * 1000, 1),
+        "create_app_ms": round((time.perf_counter() - started) * 1000, 1),
+    }
+    return app
+
+
+@pages.get("/")
 async def read_root(request: Request):
     return templates.TemplateResponse("index.html", {"request": request})
 
-@app.get("/stats")
+@pages.get("/stats")
 async def read_stats(request: Request):
     return templates.TemplateResponse("stats.html", {"request": request})
 
-@app.get("/rating")
+@pages.get("/rating")
 async def read_rating(request: Request):
     return templates.TemplateResponse("rating.html", {"request": request})
 
-@app.get("/categories")
+@pages.get("/categories")
 async def read_categories_page(request: Request):
     return templates.TemplateResponse("categories.html", {"request": request})
 
-@app.get("/investments")
+@pages.get("/investments")
 async def read_investments_page(request: Request):
     return templates.TemplateResponse("investments.html", {"request": request})
 
-@app.get("/advices")
+@pages.get("/advices")
 async def read_advices_page(request: Request):
     return templates.TemplateResponse("advices.html", {"request": request})
 
-@app.get("/login")
+@pages.get("/login")
 async def read_login(request: Request):
     return templates.TemplateResponse("login.html", {"request": request})
 
-@app.get("/register")
+@pages.get("/register")
 async def read_register(request: Request):
-    return templates.TemplateResponse("register.html", {"request": request})
\ No newline at end of file
+    return templates.TemplateResponse("register.html", {"request": request})
+
+app = create_app()
@@ -1,4 +1,4 @@
-from sqlalchemy import Boolean, Column, ForeignKey, Integer, String, Float, Date, UniqueConstraint
+from sqlalchemy import JSON, Boolean, Column, ForeignKey, Integer, LargeBinary, String, Float, Date, DateTime, Index, Text, UniqueConstraint, false, text
 from sqlalchemy.orm import relationship
 
 from .database import Base
@@ -11,11 +11,14 @@ class User(Base):
     username = Column(String, unique=True, index=True)
     hashed_password = Column(String)
     is_active = Column(Boolean, default=True)
+    # Останній виданий номер змін транзакцій користувача (див. crud.get_changes)
+    change_seq = Column(Integer, nullable=False, default=0, server_default=text("0"))
 
-    expenses = relationship("Expense", back_populates="owner")
-    incomes = relationship("Income", back_populates="owner")
-    expense_categories = relationship("ExpenseCategory", back_populates="owner")
-    income_categories = relationship("IncomeCategory", back_populates="owner")
+    # Уся історія користувача: лише явно через crud.load_options, неявне завантаження — помилка
+    expenses = relationship("Expense", back_populates="owner", lazy="raise")
+    incomes = relationship("Income", back_populates="owner", lazy="raise")
+    expense_categories = relationship("ExpenseCategory", back_populates="owner", lazy="raise")
+    income_categories = relationship("IncomeCategory", back_populates="owner", lazy="raise")
 
 
 class ExpenseCategory(Base):
@@ -25,9 +28,14 @@ class ExpenseCategory(Base):
     name = Column(String, index=True)
     owner_id = Column(Integer, ForeignKey("users.id"))
     limit = Column(Float, nullable=True)  # Expensive limit for the category
+    ticker = Column(String(20), nullable=True)  # символ активу для інвестиційних категорій
+    is_investment = Column(Boolean, nullable=False, default=False, server_default=false())
 
-    owner = relationship("User", back_populates="expense_categories")
-    __table_args__ = (UniqueConstraint('name', 'owner_id', name='_owner_expense_category_uc'),)
+    owner = relationship("User", back_populates="expense_categories", lazy="raise")
+    __table_args__ = (
+        UniqueConstraint('name', 'owner_id', name='_owner_expense_category_uc'),
+        Index('ix_expense_categories_owner_id', 'owner_id'),
+    )
 
 
 class IncomeCategory(Base):
@@ -37,33 +45,154 @@ class IncomeCategory(Base):
     name = Column(String, index=True)
     owner_id = Column(Integer, ForeignKey("users.id"))
 
-    owner = relationship("User", back_populates="income_categories")
-    __table_args__ = (UniqueConstraint('name', 'owner_id', name='_owner_income_category_uc'),)
+    owner = relationship("User", back_populates="income_categories", lazy="raise")
+    __table_args__ = (
+        UniqueConstraint('name', 'owner_id', name='_owner_income_category_uc'),
+        Index('ix_income_categories_owner_id', 'owner_id'),
+    )
 
 
 class Expense(Base):
     __tablename__ = "expenses"
 
-    id = Column(Integer, primary_key=True, index=True)
-    amount = Column(Float, index=True)
-    description = Column(String(100), index=True)
-    date = Column(Date, index=True)
+    id = Column(Integer, primary_key=True)
+    amount = Column(Float)
+    description = Column(String(100))
+    date = Column(Date)
     category_id = Column(Integer, ForeignKey("expense_categories.id", ondelete="SET NULL"))
     owner_id = Column(Integer, ForeignKey("users.id"))
+    quantity = Column(Float, nullable=True)  # кількість куплених одиниць активу (для інвестицій)
+    change_seq = Column(Integer, nullable=True)  # номер останньої зміни рядка в послідовності власника
+
+    owner = relationship("User", back_populates="expenses", lazy="raise")
+    # raise_on_sql: категорія з identity map доступна, запит на кожен рядок (N+1) — помилка
+    category = relationship("ExpenseCategory", lazy="raise_on_sql")
 
-    owner = relationship("User", back_populates="expenses")
-    category = relationship("ExpenseCategory")
+    # Усі запити в crud спершу фільтрують за власником
+    __table_args__ = (
+        Index('ix_expenses_owner_id_date', 'owner_id', 'date'),
+        Index('ix_expenses_owner_id_category_id_date', 'owner_id', 'category_id', 'date'),
+        Index('ix_expenses_owner_id_change_seq', 'owner_id', 'change_seq'),
+    )
 
 
 class Income(Base):
     __tablename__ = "incomes"
 
-    id = Column(Integer, primary_key=True, index=True)
-    amount = Column(Float, index=True)
-    description = Column(String, index=True)
-    date = Column(Date, index=True)
+    id = Column(Integer, primary_key=True)
+    amount = Column(Float)
+    description = Column(String)
+    date = Column(Date)
     category_id = Column(Integer, ForeignKey("income_categories.id", ondelete="SET NULL"))
     owner_id = Column(Integer, ForeignKey("users.id"))
+    change_seq = Column(Integer, nullable=True)
 
-    owner = relationship("User", back_populates="incomes")
-    category = relationship("IncomeCategory")
\ No newline at end of file
+    owner = relationship("User", back_populates="incomes", lazy="raise")
+    category = relationship("IncomeCategory", lazy="raise_on_sql")
+
+    __table_args__ = (
+        Index('ix_incomes_owner_id_date', 'owner_id', 'date'),
+        Index('ix_incomes_owner_id_category_id_date', 'owner_id', 'category_id', 'date'),
+        Index('ix_incomes_owner_id_change_seq', 'owner_id', 'change_seq'),
+    )
+
+
+class TransactionTombstone(Base):
+    """A deleted expense or income, kept so that ``GET /finances/changes`` can report the deletion."""
+    __tablename__ = "transaction_tombstones"
+
+    id = Column(Integer, primary_key=True)
+    owner_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    kind = Column(String(10), nullable=False)  # "expense" або "income"
+    transaction_id = Column(Integer, nullable=False)
+    change_seq = Column(Integer, nullable=False)
+    deleted_at = Column(DateTime, nullable=False)
+
+    __table_args__ = (
+        Index('ix_transaction_tombstones_owner_id_change_seq', 'owner_id', 'change_seq'),
+    )
+
+
+class CategorySpending(Base):
+    """Running monthly total per expense category, maintained by ``crud`` for limit checks."""
+    __tablename__ = "category_spending"
+
+    owner_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    category_id = Column(Integer, ForeignKey("expense_categories.id", ondelete="CASCADE"), primary_key=True)
+    month = Column(Date, primary_key=True)  # first day of the month
+    total = Column(Float, nullable=False, default=0.0)
+    count = Column(Integer, nullable=False, default=0)
+
+
+class PeriodRollup(Base):
+    """Per-period sum and count of a user's transactions, maintained by ``crud`` on every change.
+
+    ``category_id`` points to expense or income categories depending on ``kind``;
+    0 stands for transactions without a category.
+    """
+    __tablename__ = "period_rollups"
+
+    owner_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    granularity = Column(String(5), primary_key=True)  # week, month, year
+    period_start = Column(Date, primary_key=True)
+    kind = Column(String(7), primary_key=True)  # expense, income
+    category_id = Column(Integer, primary_key=True)
+    total = Column(Float, nullable=False, default=0.0)
+    count = Column(Integer, nullable=False, default=0)
+
+
+class UserForecast(Base):
+    """Latest ``app.analytics`` forecast of a user, stored as JSON; refreshed nightly or on demand."""
+    __tablename__ = "user_forecasts"
+
+    owner_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    computed_on = Column(Date, nullable=False)
+    data = Column(JSON, nullable=False)
+
+
+class UserAdvice(Base):
+    """Precomputed advice feed of a user; ``version`` grows and ``etag`` changes only when the items do."""
+    __tablename__ = "user_advices"
+
+    owner_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    version = Column(Integer, nullable=False, default=1)
+    etag = Column(String(32), nullable=False)
+    computed_on = Column(Date, nullable=False)
+    items = Column(JSON, nullable=False)
+
+
+class Job(Base):
+    """Background job, claimed by ``app.worker`` with ``SELECT ... FOR UPDATE SKIP LOCKED``."""
+    __tablename__ = "jobs"
+
+    id = Column(Integer, primary_key=True)
+    owner_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=True)  # None — системні задачі
+    kind = Column(String(32), nullable=False)
+    status = Column(String(10), nullable=False, default="queued")  # queued, running, done, failed
+    payload = Column(JSON, nullable=False, default=dict)
+    input = Column(LargeBinary, nullable=True)  # завантажений файл для імпорту, очищується після виконання
+    result = Column(JSON, nullable=True)
+    error = Column(Text, nullable=True)
+    progress_done = Column(Integer, nullable=False, default=0)
+    progress_total = Column(Integer, nullable=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime, nullable=False)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        # Черга читається лише по queued-рядках у порядку id
+        Index('ix_jobs_queued', 'id', postgresql_where=text("status = 'queued'"), sqlite_where=text("status = 'queued'")),
+        Index('ix_jobs_owner_id_id', 'owner_id', 'id'),
+    )
+
+
+class InvestmentRanking(Base):
+    """Rating snapshot: investment total kept current by ``crud``, ``rank`` renumbered periodically."""
+    __tablename__ = "investment_rankings"
+
+    owner_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    pseudonym = Column(String(64), nullable=False, unique=True, index=True)
+    total = Column(Float, nullable=False, default=0.0)
+    rank = Column(Integer, nullable=True, index=True)
+    ranked_at = Column(DateTime, nullable=True)
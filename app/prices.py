@@ -0,0 +1,222 @@
+"""Market prices for investment holdings.
+
+``PriceProvider`` is the upstream interface: one call returns quotes for a batch of
+symbols. ``FilePriceProvider`` and ``SQLitePriceProvider`` are local stand-ins for offline
+use and tests; a real market-data client can be plugged in via ``PRICE_PROVIDER=module:Class``.
+
+``QuoteFetcher`` sits in front of the provider: a TTL cache that serves stale quotes while
+refreshing them in the background, and a short batching window that merges the symbols
+requested by concurrent requests into one deduplicated upstream call.
+"""
+import asyncio
+import csv
+import importlib
+import json
+import logging
+import os
+import sqlite3
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Iterable, Optional
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Quote:
+    symbol: str
+    price: float
+    currency: Optional[str] = None
+    as_of: Optional[datetime] = None
+
+
+class PriceProvider:
+    """Upstream source of quotes. Symbols it does not know are simply left out of the result."""
+
+    async def fetch(self, symbols: list) -> Dict[str, Quote]:
+        raise NotImplementedError
+
+
+class NullPriceProvider(PriceProvider):
+    async def fetch(self, symbols: list) -> Dict[str, Quote]:
+        return {}
+
+
+class FilePriceProvider(PriceProvider):
+    """Prices from a JSON (``{"BTC": 65000.0, ...}``) or CSV (``symbol,price[,currency]``) file.
+
+    The file is re-read only when its modification time changes.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._mtime = None
+        self._quotes: Dict[str, Quote] = {}
+
+    def _load(self) -> Dict[str, Quote]:
+        mtime = os.path.getmtime(self.path)
+        if mtime != self._mtime:
+            as_of = datetime.utcfromtimestamp(mtime)
+            quotes = {}
+            with open(self.path, encoding="utf-8") as f:
+                if self.path.endswith(".json"):
+                    for symbol, price in json.load(f).items():
+                        quotes[symbol.upper()] = Quote(symbol.upper(), float(price), as_of=as_of)
+                else:
+                    for row in csv.DictReader(f):
+                        symbol = row["symbol"].strip().upper()
+                        quotes[symbol] = Quote(symbol, float(row["price"]), row.get("currency") or None, as_of)
+            self._quotes, self._mtime = quotes, mtime
+        return self._quotes
+
+    async def fetch(self, symbols: list) -> Dict[str, Quote]:
+        quotes = await asyncio.to_thread(self._load)
+        return {symbol: quotes[symbol] for symbol in symbols if symbol in quotes}
+
+
+class SQLitePriceProvider(PriceProvider):
+    """Prices from a local SQLite file with a ``quotes(symbol, price, currency, as_of)`` table."""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def _query(self, symbols: list) -> Dict[str, Quote]:
+        with sqlite3.connect(self.path) as conn:
+            placeholders = ",".join("?" * len(symbols))
+            rows = conn.execute(f"SELECT symbol, price, currency, as_of FROM quotes WHERE symbol IN ({placeholders})", symbols).fetchall()
+        return {
+            symbol: Quote(symbol, float(price), currency, datetime.fromisoformat(as_of) if as_of else None)
+            for symbol, price, currency, as_of in rows
+        }
+
+    async def fetch(self, symbols: list) -> Dict[str, Quote]:
+        return await asyncio.to_thread(self._query, symbols)
+
+
+def build_provider() -> PriceProvider:
+    kind = settings.price_provider
+    if kind == "none":
+        return NullPriceProvider()
+    if kind == "file":
+        return FilePriceProvider(settings.price_source)
+    if kind == "sqlite":
+        return SQLitePriceProvider(settings.price_source)
+    if ":" in kind:
+        module, name = kind.split(":", 1)
+        return getattr(importlib.import_module(module), name)()
+    raise ValueError(f"Unknown PRICE_PROVIDER: {kind}")
+
+
+class QuoteFetcher:
+    """Cached, batched access to a ``PriceProvider``.
+
+    - fresh (younger than ``ttl``) quotes are served from memory;
+    - stale ones (up to ``ttl + stale_ttl``) are served immediately and refreshed in the background;
+    - everything else is awaited; symbols requested within ``batch_window`` seconds of each
+      other, by any number of callers, go upstream in one call, and a symbol that is already
+      being fetched is never requested twice.
+    """
+
+    def __init__(self, provider: PriceProvider, ttl: float, stale_ttl: float, batch_window: float = 0.01, max_batch: int = 100):
+        self.provider = provider
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.batch_window = batch_window
+        self.max_batch = max_batch
+        self._cache: Dict[str, tuple] = {}  # symbol -> (Quote або None, fetched_at)
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._pending: Dict[str, asyncio.Future] = {}
+        self._flush_handle = None
+        self._loop = None
+        self.upstream_calls = 0
+
+    def _request(self, symbol: str) -> asyncio.Future:
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            # Запити в польоті прив'язані до циклу подій, у якому створені; кеш — ні
+            self._loop, self._inflight, self._pending, self._flush_handle = loop, {}, {}, None
+        future = self._inflight.get(symbol)
+        if future is None:
+            future = loop.create_future()
+            self._inflight[symbol] = self._pending[symbol] = future
+            if len(self._pending) >= self.max_batch:
+                self._flush()
+            elif self._flush_handle is None:
+                self._flush_handle = loop.call_later(self.batch_window, self._flush)
+        return future
+
+    def _flush(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        batch, self._pending = self._pending, {}
+        if batch:
+            asyncio.get_running_loop().create_task(self._fetch_batch(batch))
+
+    async def _fetch_batch(self, batch: Dict[str, asyncio.Future]):
+        self.upstream_calls += 1
+        try:
+            quotes = await self.provider.fetch(sorted(batch))
+        except Exception as exc:
+            logger.warning("Price provider failed for %s: %s", sorted(batch), exc)
+            for symbol, future in batch.items():
+                self._inflight.pop(symbol, None)
+                if not future.done():
+                    future.set_exception(exc)
+                    # Для фонових оновлень ніхто не чекає на результат
+                    future.exception()
+            return
+        now = time.monotonic()
+        for symbol, future in batch.items():
+            quote = quotes.get(symbol)
+            # Невідомі символи теж кешуються, щоб не питати про них щоразу
+            self._cache[symbol] = (quote, now)
+            self._inflight.pop(symbol, None)
+            if not future.done():
+                future.set_result(quote)
+
+    async def get_quotes(self, symbols: Iterable[str]) -> Dict[str, tuple]:
+        """Return ``{symbol: (Quote or None, stale)}``; ``stale`` marks quotes older than ``ttl``."""
+        now = time.monotonic()
+        result, waiting = {}, {}
+        for symbol in {s.upper() for s in symbols if s}:
+            cached = self._cache.get(symbol)
+            age = now - cached[1] if cached else None
+            if cached and age < self.ttl:
+                result[symbol] = (cached[0], False)
+            elif cached and age < self.ttl + self.stale_ttl:
+                result[symbol] = (cached[0], True)
+                self._request(symbol)
+            else:
+                waiting[symbol] = self._request(symbol)
+        for symbol, future in waiting.items():
+            try:
+                result[symbol] = (await future, False)
+            except Exception:
+                cached = self._cache.get(symbol)
+                result[symbol] = (cached[0] if cached else None, True)
+        return result
+
+
+_fetcher: Optional[QuoteFetcher] = None
+
+
+def reload():
+    """Drop the fetcher so the next call builds it from the current ``settings``."""
+    global _fetcher
+    _fetcher = None
+
+
+def get_fetcher() -> QuoteFetcher:
+    global _fetcher
+    if _fetcher is None:
+        _fetcher = QuoteFetcher(
+            build_provider(),
+            ttl=settings.price_cache_ttl,
+            stale_ttl=settings.price_stale_ttl,
+            batch_window=settings.price_batch_window_ms / 1000,
+        )
+    return _fetcher
@@ -0,0 +1,47 @@
+from datetime import date
+from fastapi import APIRouter, Depends, Header, HTTPException, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+import numpy as np
+from .. import analytics, async_crud, schemas
+from ..database import get_async_db
+from ..auth import get_current_active_user
+
+router = APIRouter()
+
+@router.get("/forecast", response_model=schemas.Forecast)
+async def get_forecast(target: Optional[float] = None, saved: float = 0.0, db: AsyncSession = Depends(get_async_db), current_user: schemas.UserIdentity = Depends(get_current_active_user)):
+    """Monthly totals, averages, savings rate and category trends; ``target`` adds the time to save that amount."""
+    if target is not None and target <= 0:
+        raise HTTPException(status_code=400, detail="target must be positive")
+    forecast = dict(await async_crud.get_user_forecast(db, owner_id=current_user.id))
+    if target is not None:
+        months = float(analytics.months_to_target(target - saved, forecast["monthly_savings"]))
+        goal = {"target": target, "saved": saved, "months": None, "eta_month": None}
+        computed_on = date.fromisoformat(forecast["computed_on"])
+        # Після date.max дату не подати — така ціль вважається недосяжною, як і при inf
+        months_left = (date.max.year - computed_on.year) * 12 + date.max.month - computed_on.month
+        if np.isfinite(months) and months <= months_left:
+            goal["months"] = int(months)
+            # Перший день місяця, в якому ціль буде досягнута
+            goal["eta_month"] = (np.datetime64(computed_on, "M") + int(months)).astype("datetime64[D]").item()
+        forecast["goal"] = goal
+    return forecast
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or any(tag.removeprefix("W/") == etag for tag in candidates)
+
+@router.get("/advices", response_model=schemas.AdviceFeed)
+async def get_advices(response: Response, if_none_match: Optional[str] = Header(None), db: AsyncSession = Depends(get_async_db), current_user: schemas.UserIdentity = Depends(get_current_active_user)):
+    """Precomputed spending advice; answers 304 when the client already has the current version."""
+    snapshot = await async_crud.get_user_advices(db, owner_id=current_user.id)
+    etag = f'"{snapshot.etag}"'
+    # private + no-cache: браузер зберігає відповідь, але щоразу перепитує з If-None-Match
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if _etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return {"version": snapshot.version, "computed_on": snapshot.computed_on, "advices": snapshot.items}
@@ -1,16 +1,18 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, File, HTTPException, UploadFile
+from fastapi.responses import Response, StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from datetime import date
 
-from .. import crud, models, schemas
-from ..database import get_db
+from .. import async_crud, crud, exports, imports, models, schemas
+from ..database import SessionLocal, get_async_db, get_db
 from ..auth import get_current_active_user
 
 router = APIRouter()
 
 @router.get("/", response_model=schemas.FinancialData)
-def read_finances(
+async def read_finances(
     start_date: Optional[date] = None,
     end_date: Optional[date] = None,
     category_id: Optional[int] = None,
@@ -18,150 +20,258 @@ def read_finances(
     income_limit: int = 10,
     expense_skip: int = 0,
     expense_limit: int = 10,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_active_user)
+    pagination: str = "offset",
+    income_cursor: Optional[str] = None,
+    expense_cursor: Optional[str] = None,
+    include_total: Optional[bool] = None,
+    format: str = "objects",
+    db: AsyncSession = Depends(get_async_db),
+    current_user: schemas.UserIdentity = Depends(get_current_active_user)
 ):
-    incomes, total_incomes = crud.get_incomes(
-        db, owner_id=current_user.id, start_date=start_date, end_date=end_date, category_id=category_id, skip=income_skip, limit=income_limit
+    """List incomes and expenses, newest first.
+
+    ``pagination=cursor`` switches to keyset pagination: pass back ``income_next_cursor`` /
+    ``expense_next_cursor`` as ``income_cursor`` / ``expense_cursor``. Totals are counted by
+    default only in offset mode; set ``include_total`` to override.
+
+    ``format=columnar`` returns ``incomes`` / ``expenses`` as ``{"id": [...], "date": [...], ...}``
+    column arrays with the category name inlined; it skips ORM objects and response-model
+    validation, which makes large pages much cheaper to serialize.
+    """
+    if pagination not in ("offset", "cursor"):
+        raise HTTPException(status_code=400, detail="pagination must be 'offset' or 'cursor'")
+    if format not in ("objects", "columnar"):
+        raise HTTPException(status_code=400, detail="format must be 'objects' or 'columnar'")
+    if format == "columnar":
+        keyset = pagination == "cursor"
+        with_total = bool(include_total) if keyset else include_total is None or include_total
+        incomes, income_next_cursor, total_incomes = await async_crud.get_transaction_columns(
+            db, models.Income, models.IncomeCategory, owner_id=current_user.id, start_date=start_date, end_date=end_date, category_id=category_id, skip=income_skip, limit=income_limit, cursor=income_cursor, keyset=keyset, with_total=with_total
+        )
+        expenses, expense_next_cursor, total_expenses = await async_crud.get_transaction_columns(
+            db, models.Expense, models.ExpenseCategory, owner_id=current_user.id, start_date=start_date, end_date=end_date, category_id=category_id, skip=expense_skip, limit=expense_limit, cursor=expense_cursor, keyset=keyset, with_total=with_total
+        )
+        content = exports.json_bytes({
+            "incomes": incomes, "expenses": expenses, "total_incomes": total_incomes, "total_expenses": total_expenses,
+            "income_next_cursor": income_next_cursor, "expense_next_cursor": expense_next_cursor,
+        })
+        return Response(content=content, media_type="application/json")
+    if pagination == "cursor":
+        with_total = bool(include_total)
+        incomes, income_next_cursor, total_incomes = await async_crud.get_incomes_page(
+            db, owner_id=current_user.id, start_date=start_date, end_date=end_date, category_id=category_id, cursor=income_cursor, limit=income_limit, with_total=with_total
+        )
+        expenses, expense_next_cursor, total_expenses = await async_crud.get_expenses_page(
+            db, owner_id=current_user.id, start_date=start_date, end_date=end_date, category_id=category_id, cursor=expense_cursor, limit=expense_limit, with_total=with_total
+        )
+        return {
+            "incomes": incomes, "expenses": expenses, "total_incomes": total_incomes, "total_expenses": total_expenses,
+            "income_next_cursor": income_next_cursor, "expense_next_cursor": expense_next_cursor,
+        }
+    with_total = include_total is None or include_total
+    incomes, total_incomes = await async_crud.get_incomes(
+        db, owner_id=current_user.id, start_date=start_date, end_date=end_date, category_id=category_id, skip=income_skip, limit=income_limit, with_total=with_total
     )
-    expenses, total_expenses = crud.get_expenses(
-        db, owner_id=current_user.id, start_date=start_date, end_date=end_date, category_id=category_id, skip=expense_skip, limit=expense_limit
+    expenses, total_expenses = await async_crud.get_expenses(
+        db, owner_id=current_user.id, start_date=start_date, end_date=end_date, category_id=category_id, skip=expense_skip, limit=expense_limit, with_total=with_total
     )
     return {"incomes": incomes, "expenses": expenses, "total_incomes": total_incomes, "total_expenses": total_expenses}
 
+@router.get("/changes", response_model=schemas.ChangeFeed)
+async def read_changes(since: int = 0, limit: int = crud.CHANGE_FEED_LIMIT, db: AsyncSession = Depends(get_async_db), current_user: schemas.UserIdentity = Depends(get_current_active_user)):
+    """Delta sync: transactions created, updated or deleted after change number ``since``.
+
+    Start with ``since=0`` for a full copy, then keep passing back ``next_since``; while
+    ``has_more`` is true there are further pages. A 409 means the client is ahead of the
+    server (e.g. after a restore) and must resync from 0.
+    """
+    if since < 0 or not 1 <= limit <= crud.CHANGE_FEED_LIMIT:
+        raise HTTPException(status_code=400, detail=f"since must be >= 0 and limit between 1 and {crud.CHANGE_FEED_LIMIT}")
+    return await async_crud.get_changes(db, owner_id=current_user.id, since=since, limit=limit)
+
+@router.get("/summary", response_model=schemas.FinancialSummary)
+async def read_financial_summary(
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    category_id: Optional[int] = None,
+    category_type: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: schemas.UserIdentity = Depends(get_current_active_user)
+):
+    if category_type not in (None, "income", "expense"):
+        raise HTTPException(status_code=400, detail="category_type must be 'income' or 'expense'")
+    return await async_crud.get_financial_summary(
+        db, owner_id=current_user.id, start_date=start_date, end_date=end_date, category_id=category_id, category_type=category_type
+    )
+
+@router.get("/periods", response_model=schemas.PeriodComparison)
+async def read_period_totals(
+    granularity: str = "month",
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    category_id: Optional[int] = None,
+    category_type: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: schemas.UserIdentity = Depends(get_current_active_user)
+):
+    """Week/month/year comparison served from the precomputed rollups."""
+    if granularity not in crud.ROLLUP_GRANULARITIES:
+        raise HTTPException(status_code=400, detail=f"granularity must be one of: {', '.join(crud.ROLLUP_GRANULARITIES)}")
+    if category_type not in (None, "income", "expense"):
+        raise HTTPException(status_code=400, detail="category_type must be 'income' or 'expense'")
+    periods = await async_crud.get_period_totals(
+        db, owner_id=current_user.id, granularity=granularity, start_date=start_date, end_date=end_date,
+        category_id=category_id, category_type=category_type
+    )
+    return {"granularity": granularity, "periods": periods}
+
+@router.post("/import", response_model=schemas.ImportResult)
+def import_transactions(
+    file: UploadFile = File(...),
+    format: str = "csv",
+    db: Session = Depends(get_db),
+    current_user: schemas.UserIdentity = Depends(get_current_active_user)
+):
+    """Bulk import of expenses and incomes from CSV (``type,date,amount,description,category``) or JSON lines."""
+    if format not in imports.FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of: {', '.join(imports.FORMATS)}")
+    rows = imports.read_rows(file.file, format)
+    return crud.import_transactions(db, owner_id=current_user.id, rows=rows)
+
+@router.post("/import/jobs", response_model=schemas.Job, status_code=202)
+async def import_transactions_job(
+    file: UploadFile = File(...),
+    format: str = "csv",
+    db: AsyncSession = Depends(get_async_db),
+    current_user: schemas.UserIdentity = Depends(get_current_active_user)
+):
+    """Same as ``POST /import``, but run by the job worker; follow it with ``GET /jobs/{id}``."""
+    if format not in imports.FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of: {', '.join(imports.FORMATS)}")
+    content = await file.read()
+    return await async_crud.create_job(db, owner_id=current_user.id, kind="import", payload={"format": format}, input=content)
+
+@router.get("/export")
+def export_transactions(format: str = "csv", current_user: schemas.UserIdentity = Depends(get_current_active_user)):
+    """Stream the user's full history; memory use does not depend on its size."""
+    if format not in exports.FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of: {', '.join(exports.FORMATS)}")
+    if format == "parquet" and not exports.parquet_available():
+        raise HTTPException(status_code=400, detail="Parquet export requires pyarrow to be installed")
+    owner_id = current_user.id
+
+    def stream():
+        # Власна сесія: генератор працює вже після завершення залежностей запиту
+        db = SessionLocal()
+        try:
+            yield from exports.encode(crud.iter_transaction_rows(db, owner_id), format)
+        finally:
+            db.close()
+
+    filename = f"finances-{date.today().isoformat()}.{format}"
+    return StreamingResponse(
+        stream(),
+        media_type=exports.MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
 @router.post("/incomes/", response_model=schemas.Income)
-def create_income_for_user(income: schemas.IncomeCreate, db: Session = Depends(get_db), current_user: models.User = Depends(get_current_active_user)):
-    return crud.create_user_income(db=db, income=income, user_id=current_user.id)
+async def create_income_for_user(income: schemas.IncomeCreate, db: AsyncSession = Depends(get_async_db), current_user: schemas.UserIdentity = Depends(get_current_active_user)):
+    return await async_crud.create_user_income(db=db, income=income, user_id=current_user.id)
+
+@router.post("/incomes/batch", response_model=schemas.BatchResult)
+async def batch_incomes(batch: schemas.IncomeBatch, db: AsyncSession = Depends(get_async_db), current_user: schemas.UserIdentity = Depends(get_current_active_user)):
+    """Create, update and delete many incomes in one transaction; see ``batch_expenses``."""
+    return await _apply_batch(db, "income", current_user.id, batch)
 
 @router.put("/incomes/{income_id}", response_model=schemas.Income)
-def update_user_income(income_id: int, income: schemas.IncomeUpdate, db: Session = Depends(get_db), current_user: models.User = Depends(get_current_active_user)):
-    db_income = crud.update_income(db=db, income_id=income_id, income_data=income, owner_id=current_user.id)
+async def update_user_income(income_id: int, income: schemas.IncomeUpdate, db: AsyncSession = Depends(get_async_db), current_user: schemas.UserIdentity = Depends(get_current_active_user)):
+    db_income = await async_crud.update_income(db=db, income_id=income_id, income_data=income, owner_id=current_user.id)
     if db_income is None:
         raise HTTPException(status_code=404, detail="Income not found")
     return db_income
 
 @router.delete("/incomes/{income_id}", status_code=204)
-def delete_user_income(income_id: int, db: Session = Depends(get_db), current_user: models.User = Depends(get_current_active_user)):
-    crud.delete_income(db=db, income_id=income_id, owner_id=current_user.id)
+async def delete_user_income(income_id: int, db: AsyncSession = Depends(get_async_db), current_user: schemas.UserIdentity = Depends(get_current_active_user)):
+    await async_crud.delete_income(db=db, income_id=income_id, owner_id=current_user.id)
     return
 
-@router.post("/expenses/", response_model=schemas.Expense)
-def create_expense_for_user(expense: schemas.ExpenseCreate, db: Session = Depends(get_db), current_user: models.User = Depends(get_current_active_user)):
-    return crud.create_user_expense(db=db, expense=expense, user_id=current_user.id)
+@router.post("/expenses/", response_model=schemas.ExpenseCreated)
+async def create_expense_for_user(expense: schemas.ExpenseCreate, db: AsyncSession = Depends(get_async_db), current_user: schemas.UserIdentity = Depends(get_current_active_user)):
+    return await async_crud.create_user_expense(db=db, expense=expense, user_id=current_user.id)
+
+@router.post("/expenses/batch", response_model=schemas.BatchResult)
+async def batch_expenses(batch: schemas.ExpenseBatch, db: AsyncSession = Depends(get_async_db), current_user: schemas.UserIdentity = Depends(get_current_active_user)):
+    """Create, update and delete many expenses in one transaction, with a result per operation.
+
+    ``atomic`` (default) applies nothing if any operation is invalid; ``atomic=false`` skips
+    the invalid ones. Exceeded category limits come back as per-item warnings, not errors.
+    """
+    return await _apply_batch(db, "expense", current_user.id, batch)
+
+async def _apply_batch(db: AsyncSession, kind: str, owner_id: int, batch):
+    if len(batch.operations) > crud.MAX_BATCH_OPERATIONS:
+        raise HTTPException(status_code=400, detail=f"At most {crud.MAX_BATCH_OPERATIONS} operations per batch")
+    return await async_crud.apply_transaction_batch(db, kind, owner_id=owner_id, operations=batch.operations, atomic=batch.atomic)
 
 @router.put("/expenses/{expense_id}", response_model=schemas.Expense)
-def update_user_expense(expense_id: int, expense: schemas.ExpenseUpdate, db: Session = Depends(get_db), current_user: models.User = Depends(get_current_active_user)):
-    db_expense = crud.update_expense(db=db, expense_id=expense_id, expense_data=expense, owner_id=current_user.id)
+async def update_user_expense(expense_id: int, expense: schemas.ExpenseUpdate, db: AsyncSession = Depends(get_async_db), current_user: schemas.UserIdentity = Depends(get_current_active_user)):
+    db_expense = await async_crud.update_expense(db=db, expense_id=expense_id, expense_data=expense, owner_id=current_user.id)
     if db_expense is None:
         raise HTTPException(status_code=404, detail="Expense not found")
     return db_expense
 
 @router.delete("/expenses/{expense_id}", status_code=204)
-def delete_user_expense(expense_id: int, db: Session = Depends(get_db), current_user: models.User = Depends(get_current_active_user)):
-    crud.delete_expense(db=db, expense_id=expense_id, owner_id=current_user.id)
+async def delete_user_expense(expense_id: int, db: AsyncSession = Depends(get_async_db), current_user: schemas.UserIdentity = Depends(get_current_active_user)):
+    await async_crud.delete_expense(db=db, expense_id=expense_id, owner_id=current_user.id)
     return
 
 @router.get("/income_categories/", response_model=List[schemas.IncomeCategory])
-def read_income_categories(skip: int = 0, limit: int = 100, db: Session = Depends(get_db), current_user: models.User = Depends(get_current_active_user)):
-    categories = crud.get_income_categories(db, owner_id=current_user.id, skip=skip, limit=limit)
+async def read_income_categories(skip: int = 0, limit: int = 100, db: AsyncSession = Depends(get_async_db), current_user: schemas.UserIdentity = Depends(get_current_active_user)):
+    categories = await async_crud.get_income_categories(db, owner_id=current_user.id, skip=skip, limit=limit)
     return categories
 
 @router.post("/income_categories/", response_model=schemas.IncomeCategory)
-def create_income_category_for_user(category: schemas.IncomeCategoryCreate, db: Session = Depends(get_db), current_user: models.User = Depends(get_current_active_user)):
-    return crud.create_income_category(db=db, category=category, owner_id=current_user.id)
+async def create_income_category_for_user(category: schemas.IncomeCategoryCreate, db: AsyncSession = Depends(get_async_db), current_user: schemas.UserIdentity = Depends(get_current_active_user)):
+    return await async_crud.create_income_category(db=db, category=category, owner_id=current_user.id)
 
 @router.put("/income_categories/{category_id}", response_model=schemas.IncomeCategory)
-def update_income_category(category_id: int, category: schemas.IncomeCategoryUpdate, db: Session = Depends(get_db), current_user: models.User = Depends(get_current_active_user)):
-    db_category = crud.update_income_category(db=db, category_id=category_id, category_data=category, owner_id=current_user.id)
+async def update_income_category(category_id: int, category: schemas.IncomeCategoryUpdate, db: AsyncSession = Depends(get_async_db), current_user: schemas.UserIdentity = Depends(get_current_active_user)):
+    db_category = await async_crud.update_income_category(db=db, category_id=category_id, category_data=category, owner_id=current_user.id)
     if db_category is None:
         raise HTTPException(status_code=404, detail="Income category not found")
     return db_category
 
 @router.delete("/income_categories/{category_id}", status_code=204)
-def delete_user_income_category(category_id: int, db: Session = Depends(get_db), current_user: models.User = Depends(get_current_active_user)):
-    # Отримуємо категорію, яку треба видалити
-    category_to_delete = db.query(models.IncomeCategory).filter(
-        models.IncomeCategory.id == category_id,
-        models.IncomeCategory.owner_id == current_user.id
-    ).first()
-
-    if not category_to_delete:
-        raise HTTPException(status_code=404, detail="Income category not found")
-
-    # Забороняємо видалення категорії "Без категорії"
-    if category_to_delete.name == "Uncategorized":
-        raise HTTPException(status_code=400, detail="Неможливо видалити стандартну категорію 'Без категорії'")
-
-    # Знаходимо або створюємо категорію "Без категорії"
-    default_category = db.query(models.IncomeCategory).filter(
-        models.IncomeCategory.name == "Uncategorized",
-        models.IncomeCategory.owner_id == current_user.id
-    ).first()
-
-    if not default_category:
-        # Створюємо нову, якщо не існує
-        new_default_category = models.IncomeCategory(name="Uncategorized", owner_id=current_user.id)
-        db.add(new_default_category)
-        db.flush()  # Отримуємо id для нової категорії
-        default_category = new_default_category
-
-    # Перепризначаємо всі доходи з цієї категорії на "Без категорії"
-    db.query(models.Income).filter(models.Income.category_id == category_id, models.Income.owner_id == current_user.id).update({"category_id": default_category.id})
-
-    # Видаляємо стару категорію
-    db.delete(category_to_delete)
-    db.commit()
+async def delete_user_income_category(category_id: int, db: AsyncSession = Depends(get_async_db), current_user: schemas.UserIdentity = Depends(get_current_active_user)):
+    await async_crud.delete_income_category(db, category_id=category_id, owner_id=current_user.id)
     return
 
+@router.post("/categories/merge", response_model=schemas.CategoryMergeResult)
+async def merge_categories(merge: schemas.CategoryMerge, db: AsyncSession = Depends(get_async_db), current_user: schemas.UserIdentity = Depends(get_current_active_user)):
+    """Move the transactions of ``source_ids`` into ``target_id`` (default 'Uncategorized') and delete the sources, atomically."""
+    if merge.kind not in crud.TRANSACTION_MODELS:
+        raise HTTPException(status_code=400, detail="kind must be 'expense' or 'income'")
+    return await async_crud.merge_categories(db, merge.kind, owner_id=current_user.id, source_ids=merge.source_ids, target_id=merge.target_id)
+
 @router.get("/expense_categories/", response_model=List[schemas.ExpenseCategory])
-def read_expense_categories(skip: int = 0, limit: int = 100, db: Session = Depends(get_db), current_user: models.User = Depends(get_current_active_user)):
-    categories = crud.get_expense_categories(db, owner_id=current_user.id, skip=skip, limit=limit)
+async def read_expense_categories(skip: int = 0, limit: int = 100, db: AsyncSession = Depends(get_async_db), current_user: schemas.UserIdentity = Depends(get_current_active_user)):
+    categories = await async_crud.get_expense_categories(db, owner_id=current_user.id, skip=skip, limit=limit)
     return categories
 
 @router.post("/expense_categories/", response_model=schemas.ExpenseCategory)
-def create_expense_category_for_user(category: schemas.ExpenseCategoryCreate, db: Session = Depends(get_db), current_user: models.User = Depends(get_current_active_user)):
-    return crud.create_expense_category(db=db, category=category, owner_id=current_user.id)
+async def create_expense_category_for_user(category: schemas.ExpenseCategoryCreate, db: AsyncSession = Depends(get_async_db), current_user: schemas.UserIdentity = Depends(get_current_active_user)):
+    return await async_crud.create_expense_category(db=db, category=category, owner_id=current_user.id)
 
 @router.put("/expense_categories/{category_id}", response_model=schemas.ExpenseCategory)
-def update_expense_category(category_id: int, category: schemas.ExpenseCategoryUpdate, db: Session = Depends(get_db), current_user: models.User = Depends(get_current_active_user)):
+async def update_expense_category(category_id: int, category: schemas.ExpenseCategoryUpdate, db: AsyncSession = Depends(get_async_db), current_user: schemas.UserIdentity = Depends(get_current_active_user)):
     """Update/rename an existing expense category."""
-    db_category = crud.update_expense_category(db=db, category_id=category_id, category_data=category, owner_id=current_user.id)
+    db_category = await async_crud.update_expense_category(db=db, category_id=category_id, category_data=category, owner_id=current_user.id)
     if db_category is None:
         raise HTTPException(status_code=404, detail="Expense category not found")
     return db_category
 
 @router.delete("/expense_categories/{category_id}", status_code=204)
-def delete_user_expense_category(category_id: int, db: Session = Depends(get_db), current_user: models.User = Depends(get_current_active_user)):
-    # Отримуємо категорію, яку треба видалити
-    category_to_delete = db.query(models.ExpenseCategory).filter(
-        models.ExpenseCategory.id == category_id,
-        models.ExpenseCategory.owner_id == current_user.id
-    ).first()
-
-    if not category_to_delete:
-        raise HTTPException(status_code=404, detail="Expense category not found")
-
-    # Забороняємо видалення категорії "Без категорії"
-    if category_to_delete.name == "Uncategorized":
-        raise HTTPException(status_code=400, detail="Неможливо видалити стандартну категорію 'Без категорії'")
-
-    # Знаходимо або створюємо категорію "Без категорії"
-    default_category = db.query(models.ExpenseCategory).filter(
-        models.ExpenseCategory.name == "Uncategorized",
-        models.ExpenseCategory.owner_id == current_user.id
-    ).first()
-
-    if not default_category:
-        # Створюємо нову, якщо не існує
-        new_default_category = models.ExpenseCategory(name="Uncategorized", owner_id=current_user.id)
-        db.add(new_default_category)
-        db.flush() # Отримуємо id для нової категорії
-        default_category = new_default_category
-
-    # Перепризначаємо всі витрати з цієї категорії на "Без категорії"
-    db.query(models.Expense).filter(models.Expense.category_id == category_id, models.Expense.owner_id == current_user.id).update({"category_id": default_category.id})
-
-    # Видаляємо стару категорію
-    db.delete(category_to_delete)
-    db.commit()
-    return
\ No newline at end of file
+async def delete_user_expense_category(category_id: int, db: AsyncSession = Depends(get_async_db), current_user: schemas.UserIdentity = Depends(get_current_active_user)):
+    await async_crud.delete_expense_category(db, category_id=category_id, owner_id=current_user.id)
+    return
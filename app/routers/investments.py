@@ -1,27 +1,50 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from .. import models
-from ..database import get_db
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+from .. import async_crud, prices, schemas
+from ..database import get_async_db
 from ..auth import get_current_active_user
 
 router = APIRouter()
 
-@router.get("/investments")
-def get_investments(db: Session = Depends(get_db), current_user: models.User = Depends(get_current_active_user)):
-    # Знаходимо всі категорії інвестицій
-    categories = db.query(models.ExpenseCategory).filter(
-        models.ExpenseCategory.owner_id == current_user.id,
-        (models.ExpenseCategory.name.ilike('%інвестиці%') | models.ExpenseCategory.name.ilike('%invest%'))
-    ).all()
-    investments = []
-    total_invested = 0
-    for category in categories:
-        expenses = db.query(models.Expense).filter(models.Expense.owner_id == current_user.id, models.Expense.category_id == category.id).all()
-        category_sum = sum([e.amount for e in expenses])
-        total_invested += category_sum
-        investments.append({
-            "category": category.name,
-            "sum": category_sum,
-            "expenses": [{"amount": e.amount, "description": e.description, "date": e.date} for e in expenses]
-        })
-    return {"total_invested": total_invested, "investments": investments}
+@router.get("/investments", response_model=schemas.InvestmentSummary)
+async def get_investments(series: Optional[str] = None, db: AsyncSession = Depends(get_async_db), current_user: schemas.UserIdentity = Depends(get_current_active_user)):
+    """Sums and counts per investment category; ``series=month`` adds monthly totals."""
+    if series not in (None, "month"):
+        raise HTTPException(status_code=400, detail="series must be 'month'")
+    return await async_crud.get_investments(db, owner_id=current_user.id, series=series == "month")
+
+@router.get("/investments/portfolio", response_model=schemas.Portfolio)
+async def get_portfolio(db: AsyncSession = Depends(get_async_db), current_user: schemas.UserIdentity = Depends(get_current_active_user)):
+    """Current value and profit of investment categories with a ticker; quotes come from the shared cache."""
+    holdings = await async_crud.get_investment_holdings(db, owner_id=current_user.id)
+    quotes = await prices.get_fetcher().get_quotes(holding["ticker"] for holding in holdings)
+    for holding in holdings:
+        quote, stale = quotes.get(holding["ticker"], (None, True))
+        holding["stale"] = stale
+        if quote is None:
+            continue
+        holding.update(price=quote.price, currency=quote.currency, quote_as_of=quote.as_of)
+        if holding["quantity"] is not None:
+            holding["value"] = holding["quantity"] * quote.price
+            holding["profit"] = holding["value"] - holding["invested"]
+    valued = [holding for holding in holdings if holding.get("value") is not None]
+    value = sum(holding["value"] for holding in valued) if valued else None
+    return {
+        "invested": sum(holding["invested"] for holding in holdings),
+        "value": value,
+        "profit": value - sum(holding["invested"] for holding in valued) if valued else None,
+        "holdings": holdings,
+    }
+
+@router.get("/investments/expenses", response_model=schemas.InvestmentExpensesPage)
+async def get_investment_expenses(category_id: Optional[int] = None, cursor: Optional[str] = None, limit: int = 50, db: AsyncSession = Depends(get_async_db), current_user: schemas.UserIdentity = Depends(get_current_active_user)):
+    expenses, next_cursor = await async_crud.get_investment_expenses_page(db, owner_id=current_user.id, category_id=category_id, cursor=cursor, limit=limit)
+    return {"expenses": expenses, "next_cursor": next_cursor}
+
+@router.get("/investments/rating", response_model=schemas.InvestmentRating)
+async def get_investment_rating(limit: int = 10, db: AsyncSession = Depends(get_async_db), current_user: schemas.UserIdentity = Depends(get_current_active_user)):
+    """Top investors under pseudonyms and the caller's own place, from the ranking snapshot."""
+    if not 1 <= limit <= 100:
+        raise HTTPException(status_code=400, detail="limit must be between 1 and 100")
+    return await async_crud.get_investment_rating(db, owner_id=current_user.id, limit=limit)
@@ -0,0 +1,24 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List
+from .. import async_crud, jobs, schemas
+from ..database import get_async_db
+from ..auth import get_current_active_user
+
+router = APIRouter()
+
+@router.post("/", response_model=schemas.Job, status_code=202)
+async def create_job(job: schemas.JobCreate, db: AsyncSession = Depends(get_async_db), current_user: schemas.UserIdentity = Depends(get_current_active_user)):
+    """Queue a heavy per-user recomputation for ``python -m app.worker``."""
+    if job.kind not in jobs.USER_JOB_KINDS:
+        raise HTTPException(status_code=400, detail=f"kind must be one of: {', '.join(jobs.USER_JOB_KINDS)}")
+    return await async_crud.create_job(db, owner_id=current_user.id, kind=job.kind)
+
+@router.get("/", response_model=List[schemas.Job])
+async def read_jobs(limit: int = 20, db: AsyncSession = Depends(get_async_db), current_user: schemas.UserIdentity = Depends(get_current_active_user)):
+    return await async_crud.get_jobs(db, owner_id=current_user.id, limit=limit)
+
+@router.get("/{job_id}", response_model=schemas.Job)
+async def read_job(job_id: int, db: AsyncSession = Depends(get_async_db), current_user: schemas.UserIdentity = Depends(get_current_active_user)):
+    """Status and progress; poll until ``status`` is ``done`` or ``failed``."""
+    return await async_crud.get_job(db, job_id=job_id, owner_id=current_user.id)
@@ -0,0 +1,16 @@
+from fastapi import APIRouter, Depends, Request
+
+from .. import database
+from ..auth import get_current_active_user
+
+router = APIRouter()
+
+@router.get("/pool", dependencies=[Depends(get_current_active_user)])
+def read_pool_status():
+    """Connection pool usage: checked-out and overflow connections, checkout wait time."""
+    return database.pool_status()
+
+@router.get("/startup", dependencies=[Depends(get_current_active_user)])
+def read_startup_timings(request: Request):
+    """How long the running process took to import, build the app and warm up (milliseconds)."""
+    return request.app.state.startup
@@ -1,22 +1,23 @@
 from fastapi import APIRouter, Depends, HTTPException, Form
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
-from .. import crud, schemas, auth
-from ..database import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from .. import async_crud, schemas, auth, security
+from ..database import get_async_db
 
 router = APIRouter()
 
 @router.post("/users/", response_model=schemas.User)
-def create_user(username: str = Form(...), password: str = Form(...), db: Session = Depends(get_db)):
-    db_user = crud.get_user_by_username(db, username=username)
+async def create_user(username: str = Form(...), password: str = Form(...), db: AsyncSession = Depends(get_async_db)):
+    db_user = await async_crud.get_user_by_username(db, username=username)
     if db_user:
         raise HTTPException(status_code=400, detail="Username already registered")
     user = schemas.UserCreate(username=username, password=password)
-    return crud.create_user(db=db, user=user)
+    hashed_password = await security.hash_password_async(password)
+    return await async_crud.create_user(db=db, user=user, hashed_password=hashed_password)
 
 @router.post("/token", response_model=schemas.Token)
-async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
-    user = auth.authenticate_user(db, form_data.username, form_data.password)
+async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_async_db)):
+    user = await auth.authenticate_user(db, form_data.username, form_data.password)
     if not user:
         raise HTTPException(
             status_code=401,
@@ -27,4 +28,9 @@ async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(
     access_token = auth.create_access_token(
         data={"sub": user.username}, expires_delta=access_token_expires
     )
-    return {"access_token": access_token, "token_type": "bearer"}
\ No newline at end of file
+    return {"access_token": access_token, "token_type": "bearer"}
+
+@router.delete("/users/me", status_code=204)
+async def deactivate_current_user(db: AsyncSession = Depends(get_async_db), current_user: schemas.UserIdentity = Depends(auth.get_current_active_user)):
+    await async_crud.set_user_active(db, user_id=current_user.id, is_active=False)
+    return
@@ -1,11 +1,15 @@
 from pydantic import BaseModel, Field
-from datetime import date
+import datetime as dt
+from datetime import date, datetime
 from typing import List, Optional
 
 
 class ExpenseCategoryBase(BaseModel):
     name: str
     limit: Optional[float] = None
+    # None — визначити за назвою категорії
+    is_investment: Optional[bool] = None
+    ticker: Optional[str] = Field(None, max_length=20)
 
 
 class ExpenseCategoryCreate(ExpenseCategoryBase):
@@ -19,6 +23,7 @@ class ExpenseCategoryUpdate(ExpenseCategoryBase):
 
 class ExpenseCategory(ExpenseCategoryBase):
     id: int
+    is_investment: bool = False
 
     class Config:
         orm_mode = True
@@ -48,6 +53,7 @@ class ExpenseBase(BaseModel):
     description: Optional[str] = Field(None, max_length=100)
     date: date
     category_id: Optional[int] = None
+    quantity: Optional[float] = None
 
 
 class ExpenseCreate(ExpenseBase):
@@ -63,11 +69,24 @@ class Expense(ExpenseBase):
         orm_mode = True
 
 
+class LimitWarning(BaseModel):
+    message: str
+    limit: float
+    total: float
+    exceeded: float
+
+
+class ExpenseCreated(Expense):
+    # Перевищений місячний ліміт категорії; витрату все одно збережено
+    warning: Optional[LimitWarning] = None
+
+
 class ExpenseUpdate(BaseModel):
     amount: Optional[float] = None
     description: Optional[str] = None
-    date: Optional[date] = None
+    date: Optional[dt.date] = None  # dt.date: ім'я поля затінює тип date у тілі класу
     category_id: Optional[int] = None
+    quantity: Optional[float] = None
 
 
 class IncomeBase(BaseModel):
@@ -93,10 +112,49 @@ class Income(IncomeBase):
 class IncomeUpdate(BaseModel):
     amount: Optional[float] = None
     description: Optional[str] = None
-    date: Optional[date] = None
+    date: Optional[dt.date] = None  # dt.date: ім'я поля затінює тип date у тілі класу
     category_id: Optional[int] = None
 
 
+class ExpenseBatchOperation(BaseModel):
+    op: str  # "create", "update" або "delete"
+    id: Optional[int] = None  # для update і delete
+    data: Optional[ExpenseUpdate] = None  # для create (amount і date обов'язкові) і update
+
+
+class IncomeBatchOperation(BaseModel):
+    op: str
+    id: Optional[int] = None
+    data: Optional[IncomeUpdate] = None
+
+
+class ExpenseBatch(BaseModel):
+    operations: List[ExpenseBatchOperation]
+    # True — при будь-якій помилці не застосовується нічого
+    atomic: bool = True
+
+
+class IncomeBatch(BaseModel):
+    operations: List[IncomeBatchOperation]
+    atomic: bool = True
+
+
+class BatchItemResult(BaseModel):
+    index: int
+    op: str
+    id: Optional[int] = None
+    status: str  # "ok", "error" або "skipped" (атомарний пакет із помилками)
+    error: Optional[str] = None
+    # Перевищений ліміт категорії; операцію все одно застосовано
+    warning: Optional[LimitWarning] = None
+
+
+class BatchResult(BaseModel):
+    applied: int
+    failed: int
+    results: List[BatchItemResult]
+
+
 class UserBase(BaseModel):
     username: str
 
@@ -106,15 +164,21 @@ class UserCreate(UserBase):
 
 
 class User(UserBase):
+    """Account fields only; transactions are paged through ``GET /finances/``."""
     id: int
     is_active: bool
-    expenses: List[Expense] = []
-    incomes: List[Income] = []
 
     class Config:
         orm_mode = True
 
 
+class UserIdentity(BaseModel):
+    """What request handlers know about the authenticated user (cached, no ORM object)."""
+    id: int
+    username: str
+    is_active: bool
+
+
 class Token(BaseModel):
     access_token: str
     token_type: str
@@ -127,5 +191,210 @@ class TokenData(BaseModel):
 class FinancialData(BaseModel):
     incomes: List[Income]
     expenses: List[Expense]
-    total_incomes: int
-    total_expenses: int
\ No newline at end of file
+    total_incomes: Optional[int] = None
+    total_expenses: Optional[int] = None
+    income_next_cursor: Optional[str] = None
+    expense_next_cursor: Optional[str] = None
+
+
+class Change(BaseModel):
+    seq: int
+    kind: str  # "expense" або "income"
+    op: str  # "upsert" або "delete"
+    id: int
+    # Поля транзакції для upsert (id, date, amount, description, category_id[, quantity])
+    data: Optional[dict] = None
+
+
+class ChangeFeed(BaseModel):
+    changes: List[Change]
+    next_since: int
+    has_more: bool
+
+
+class CategoryMerge(BaseModel):
+    kind: str = "expense"  # "expense" або "income"
+    source_ids: List[int]
+    # None — перенести в "Uncategorized"
+    target_id: Optional[int] = None
+
+
+class CategoryMergeResult(BaseModel):
+    target_id: int
+    merged_categories: int
+    moved_transactions: int
+
+
+class CategoryTotal(BaseModel):
+    category_id: Optional[int] = None
+    category: str
+    total: float
+    count: int
+
+
+class FinancialSummary(BaseModel):
+    total_incomes: float
+    total_expenses: float
+    balance: float
+    income_count: int
+    expense_count: int
+    incomes_by_category: List[CategoryTotal]
+    expenses_by_category: List[CategoryTotal]
+
+
+class PeriodTotal(BaseModel):
+    period_start: date
+    total_incomes: float
+    total_expenses: float
+    balance: float
+    income_count: int
+    expense_count: int
+
+
+class PeriodComparison(BaseModel):
+    granularity: str
+    periods: List[PeriodTotal]
+
+
+class CategoryTrend(BaseModel):
+    category_id: Optional[int] = None
+    average: float
+    trend: float
+
+
+class GoalEstimate(BaseModel):
+    target: float
+    saved: float
+    months: Optional[int] = None
+    eta_month: Optional[date] = None
+
+
+class Forecast(BaseModel):
+    computed_on: date
+    months: List[date]
+    incomes: List[float]
+    expenses: List[float]
+    income_moving_average: List[float]
+    expense_moving_average: List[float]
+    current_month_incomes: float
+    current_month_expenses: float
+    average_income: float
+    average_expense: float
+    monthly_savings: float
+    savings_rate: Optional[float] = None
+    categories: List[CategoryTrend]
+    goal: Optional[GoalEstimate] = None
+
+
+class Advice(BaseModel):
+    kind: str
+    message: str
+    category_id: Optional[int] = None
+    category: Optional[str] = None
+    amount: float
+    reference: Optional[float] = None
+    change: Optional[float] = None
+
+
+class AdviceFeed(BaseModel):
+    version: int
+    computed_on: date
+    advices: List[Advice]
+
+
+class JobCreate(BaseModel):
+    kind: str
+
+
+class Job(BaseModel):
+    id: int
+    kind: str
+    status: str
+    progress_done: int
+    progress_total: Optional[int] = None
+    result: Optional[dict] = None
+    error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        orm_mode = True
+
+
+class RatingEntry(BaseModel):
+    rank: Optional[int] = None
+    pseudonym: str
+    total: float
+
+    class Config:
+        orm_mode = True
+
+
+class InvestmentRating(BaseModel):
+    ranked_at: Optional[datetime] = None
+    top: List[RatingEntry]
+    me: Optional[RatingEntry] = None
+
+
+class ImportRowError(BaseModel):
+    line: int
+    error: str
+
+
+class ImportedCategory(BaseModel):
+    type: str
+    name: str
+
+
+class ImportResult(BaseModel):
+    imported_expenses: int
+    imported_incomes: int
+    created_categories: List[ImportedCategory]
+    failed: int
+    errors: List[ImportRowError]
+
+
+class InvestmentMonth(BaseModel):
+    month: date
+    sum: float
+    count: int
+
+
+class InvestmentCategory(BaseModel):
+    category_id: int
+    category: str
+    sum: float
+    count: int
+    series: Optional[List[InvestmentMonth]] = None
+
+
+class Holding(BaseModel):
+    category_id: int
+    category: str
+    ticker: str
+    invested: float
+    quantity: Optional[float] = None
+    price: Optional[float] = None
+    currency: Optional[str] = None
+    value: Optional[float] = None
+    profit: Optional[float] = None
+    quote_as_of: Optional[datetime] = None
+    stale: bool = False
+
+
+class Portfolio(BaseModel):
+    invested: float
+    value: Optional[float] = None
+    profit: Optional[float] = None
+    holdings: List[Holding]
+
+
+class InvestmentSummary(BaseModel):
+    total_invested: float
+    investments: List[InvestmentCategory]
+
+
+class InvestmentExpensesPage(BaseModel):
+    expenses: List[Expense]
+    next_cursor: Optional[str] = None
@@ -0,0 +1,91 @@
+"""Password hashing: one shared ``CryptContext`` whose work runs in a bounded executor.
+
+bcrypt/argon2 take 100+ ms of CPU per call, so async handlers must await the ``*_async``
+functions instead of hashing on the event loop.
+"""
+import asyncio
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Optional, Tuple
+
+from passlib.context import CryptContext
+from passlib.registry import get_crypt_handler
+
+from .config import settings
+
+
+def build_context() -> CryptContext:
+    schemes = [scheme.strip() for scheme in settings.password_schemes.split(",") if scheme.strip()]
+    for scheme in schemes:
+        # Без бекенда (bcrypt, argon2-cffi) passlib впав би лише на першому хешуванні
+        try:
+            handler = get_crypt_handler(scheme)
+        except KeyError:
+            raise RuntimeError(f"PASSWORD_SCHEMES: unknown scheme '{scheme}'")
+        if hasattr(handler, "has_backend") and not handler.has_backend():
+            raise RuntimeError(f"PASSWORD_SCHEMES: '{scheme}' has no backend installed; install passlib[{scheme}]")
+    options = {}
+    if "bcrypt" in schemes:
+        # min_rounds: хеші зі старою (меншою) кількістю раундів перехешовуються при вході
+        options.update(bcrypt__rounds=settings.bcrypt_rounds, bcrypt__min_rounds=settings.bcrypt_rounds)
+    if "argon2" in schemes:
+        options.update(
+            argon2__time_cost=settings.argon2_time_cost,
+            argon2__memory_cost=settings.argon2_memory_cost,
+            argon2__parallelism=settings.argon2_parallelism,
+        )
+    return CryptContext(schemes=schemes, deprecated="auto", **options)
+
+
+pwd_context = build_context()
+
+_executor: Optional[Executor] = None
+
+
+def reload():
+    """Rebuild the context and executor after ``settings`` changed (``main.create_app``)."""
+    global pwd_context, _executor
+    pwd_context = build_context()
+    if _executor is not None:
+        _executor.shutdown(wait=False)
+        _executor = None
+
+
+def _get_executor() -> Executor:
+    global _executor
+    if _executor is None:
+        if settings.password_hash_executor == "process":
+            _executor = ProcessPoolExecutor(max_workers=settings.password_hash_workers)
+        else:
+            _executor = ThreadPoolExecutor(max_workers=settings.password_hash_workers, thread_name_prefix="password-hash")
+    return _executor
+
+
+def hash_password(password: str) -> str:
+    return pwd_context.hash(password)
+
+
+def verify_and_update(password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Return ``(valid, new_hash)``; ``new_hash`` is set when the stored hash uses outdated parameters."""
+    return pwd_context.verify_and_update(password, hashed_password)
+
+
+def dummy_verify() -> bool:
+    # Стільки ж часу, скільки справжня перевірка, щоб не видавати неіснуючих користувачів
+    return pwd_context.dummy_verify()
+
+
+async def _run(fn, *args):
+    return await asyncio.get_running_loop().run_in_executor(_get_executor(), fn, *args)
+
+
+async def hash_password_async(password: str) -> str:
+    return await _run(hash_password, password)
+
+
+async def verify_and_update_async(password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    return await _run(verify_and_update, password, hashed_password)
+
+
+async def dummy_verify_async() -> bool:
+    return await _run(dummy_verify)
+
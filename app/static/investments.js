@@ -23,7 +23,7 @@ async function loadInvestments() {
                 tableEl.appendChild(tr);
             });
         }
-        // Оновлюємо деталі витрат
+        // Оновлюємо деталі витрат: по категорії, сторінками з next_cursor
         const detailsEl = document.getElementById("investments-details");
         if (detailsEl) {
             detailsEl.innerHTML = "";
@@ -31,11 +31,13 @@ async function loadInvestments() {
                 const div = document.createElement("div");
                 div.innerHTML = `<h4>${inv.category}</h4>`;
                 const ul = document.createElement("ul");
-                inv.expenses.forEach(e => {
-                    ul.innerHTML += `<li>${e.date}: ${e.amount} ${e.description ? "— " + e.description : ""}</li>`;
-                });
+                const moreBtn = document.createElement("button");
+                moreBtn.textContent = "Показати ще";
+                moreBtn.style.display = "none";
                 div.appendChild(ul);
+                div.appendChild(moreBtn);
                 detailsEl.appendChild(div);
+                loadInvestmentExpenses(inv.category_id, ul, moreBtn, null);
             });
         }
     } else {
@@ -43,7 +45,49 @@ async function loadInvestments() {
     }
 }
 
+// Одна сторінка витрат категорії; кнопка "Показати ще" бере наступну за next_cursor
+async function loadInvestmentExpenses(categoryId, ul, moreBtn, cursor) {
+    const params = new URLSearchParams({ category_id: categoryId, limit: 50 });
+    if (cursor) params.set("cursor", cursor);
+    const response = await fetch(`/finances/investments/expenses?${params}`, {
+        headers: {
+            "Authorization": "Bearer " + localStorage.getItem("access_token")
+        }
+    });
+    if (!response.ok) return;
+    const page = await response.json();
+    page.expenses.forEach(e => {
+        ul.innerHTML += `<li>${e.date}: ${e.amount} ${e.description ? "— " + e.description : ""}</li>`;
+    });
+    moreBtn.style.display = page.next_cursor ? "" : "none";
+    moreBtn.onclick = () => loadInvestmentExpenses(categoryId, ul, moreBtn, page.next_cursor);
+}
+
+// Поточна вартість і прибуток по категоріях з тикером
+async function loadPortfolio() {
+    const tbody = document.querySelector("#portfolio-table tbody");
+    if (!tbody) return;
+    const response = await fetch("/finances/investments/portfolio", {
+        headers: {
+            "Authorization": "Bearer " + localStorage.getItem("access_token")
+        }
+    });
+    if (!response.ok) return;
+    const portfolio = await response.json();
+    const format = value => value === null || value === undefined ? "—" : value.toFixed(2);
+    tbody.innerHTML = "";
+    portfolio.holdings.forEach(h => {
+        const tr = document.createElement("tr");
+        // Застаріла ціна позначається зірочкою, поки оновлюється у фоні
+        tr.innerHTML = `<td>${h.category}</td><td>${h.ticker}</td><td>${format(h.invested)}</td>` +
+            `<td>${h.quantity ?? "—"}</td><td>${format(h.price)}${h.stale && h.price !== null ? "*" : ""}</td>` +
+            `<td>${format(h.value)}</td><td>${format(h.profit)}</td>`;
+        tbody.appendChild(tr);
+    });
+}
+
 // Викликаємо при завантаженні сторінки
 if (window.location.pathname.includes("investments")) {
     window.addEventListener("DOMContentLoaded", loadInvestments);
+    window.addEventListener("DOMContentLoaded", loadPortfolio);
 }
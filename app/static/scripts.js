@@ -63,16 +63,12 @@ async function addExpense(event) {
             body: JSON.stringify(data)
         });
         if (response.ok) {
+            // Перевищений ліміт приходить як warning разом зі збереженою витратою
+            warning = (await response.json()).warning;
             expenseAdded = true;
         } else {
-            // Якщо бекенд повертає warning, але не помилку
             const error = await response.json();
-            if (error.detail && error.detail.message && error.detail.limit !== undefined) {
-                warning = error.detail;
-                expenseAdded = true; // все одно додаємо
-            } else {
-                throw new Error(error.detail || "Failed to add expense");
-            }
+            throw new Error(error.detail || "Failed to add expense");
         }
     } catch (err) {
         alert(err.message);
@@ -118,6 +114,10 @@ async function addCategory(type, event) {
         const limitInput = document.getElementById('new-expense-category-limit');
         const limit = limitInput.value;
         if (limit) payload.limit = parseFloat(limit);
+        const investmentInput = document.getElementById('new-expense-category-investment');
+        if (investmentInput && investmentInput.checked) payload.is_investment = true;
+        const tickerInput = document.getElementById('new-expense-category-ticker');
+        if (tickerInput && tickerInput.value.trim()) payload.ticker = tickerInput.value.trim().toUpperCase();
     }
     if (!name) return;
     await fetchAPI(`/finances/${type}_categories/`, {
@@ -129,7 +129,13 @@ async function addCategory(type, event) {
         body: JSON.stringify(payload)
     });
     input.value = '';
-    if (type === 'expense') document.getElementById('new-expense-category-limit').value = '';
+    if (type === 'expense') {
+        document.getElementById('new-expense-category-limit').value = '';
+        const investmentInput = document.getElementById('new-expense-category-investment');
+        if (investmentInput) investmentInput.checked = false;
+        const tickerInput = document.getElementById('new-expense-category-ticker');
+        if (tickerInput) tickerInput.value = '';
+    }
     loadCategories(type);
 }
 
@@ -167,7 +173,7 @@ async function loadCategories(type) {
                 li.id = `${type}-category-${category.id}`;
                 li.value = category.id;
                 li.innerHTML = `
-                    <span>${category.name}${type === 'expense' && category.limit !== null ? ` (Ліміт: ${category.limit})` : ''}</span>
+                    <span>${category.name}${type === 'expense' && category.limit !== null ? ` (Ліміт: ${category.limit})` : ''}${type === 'expense' && category.is_investment ? ' (Інвестиції)' : ''}${type === 'expense' && category.ticker ? ` [${category.ticker}]` : ''}</span>
                     <div class="category-buttons">
                         <button onclick="toggleEditForm('${type}', ${category.id}, '${category.name}', ${type === 'expense' ? category.limit : 'null'})">Edit</button>
                         <button onclick="deleteCategory('${type}', ${category.id})">Delete</button>
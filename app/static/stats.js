@@ -109,48 +109,39 @@ async function loadFinancialData() {
         if (endDateInput) endDateInput.value = endDate;
     }
 
-    let url = "/finances/?";
-    if (startDate) url += `start_date=${startDate}&`;
-    if (endDate) url += `end_date=${endDate}&`;
+    let query = "";
+    if (startDate) query += `start_date=${startDate}&`;
+    if (endDate) query += `end_date=${endDate}&`;
     // Додаємо категорію до запиту, якщо вибрана
     if (categoryId && categoryId !== "all" && categoryId.includes('-')) {
         const [type, id] = categoryId.split('-');
-        url += `category_type=${type}&category_id=${id}&`;
+        query += `category_type=${type}&category_id=${id}&`;
     } else if (categoryId && categoryId !== "all") {
-        url += `category_id=${categoryId}&`;
+        query += `category_id=${categoryId}&`;
     }
-    const response = await fetch(url, {
-        headers: {
-            "Authorization": "Bearer " + token
-        }
-    });
-    if (response.ok) {
+    const headers = { "Authorization": "Bearer " + token };
+    // Підсумки рахує сервер, список транзакцій — лише поточна сторінка
+    const [response, summaryResponse] = await Promise.all([
+        fetch(`/finances/?${query}`, { headers }),
+        fetch(`/finances/summary?${query}`, { headers })
+    ]);
+    if (response.ok && summaryResponse.ok) {
         const data = await response.json();
+        const summary = await summaryResponse.json();
 
-        // Calculate totals and aggregates
-        let totalIncome = 0;
         const incomeByCategory = {};
-        data.incomes.forEach(income => {
-            totalIncome += income.amount;
-            const categoryName = income.category ? income.category.name : "Uncategorized";
-            if (!incomeByCategory[categoryName]) {
-                incomeByCategory[categoryName] = 0;
-            }
-            incomeByCategory[categoryName] += income.amount;
+        summary.incomes_by_category.forEach(item => {
+            incomeByCategory[item.category] = (incomeByCategory[item.category] || 0) + item.total;
         });
 
-        let totalExpenses = 0;
         const expenseByCategory = {};
-        data.expenses.forEach(expense => {
-            totalExpenses += expense.amount;
-            const categoryName = expense.category ? expense.category.name : "Uncategorized";
-            if (!expenseByCategory[categoryName]) {
-                expenseByCategory[categoryName] = 0;
-            }
-            expenseByCategory[categoryName] += expense.amount;
+        summary.expenses_by_category.forEach(item => {
+            expenseByCategory[item.category] = (expenseByCategory[item.category] || 0) + item.total;
         });
 
-        const balance = totalIncome - totalExpenses;
+        const totalIncome = summary.total_incomes;
+        const totalExpenses = summary.total_expenses;
+        const balance = summary.balance;
 
         // Update summary elements
         if (document.getElementById("balance")) {
@@ -0,0 +1,83 @@
+"""Job worker: ``python -m app.worker [--concurrency N] [--executor thread|process] [--once]``.
+
+Starts N loops (threads or processes) that poll the ``jobs`` table; run as many worker
+instances on as many machines as needed, they coordinate through ``SKIP LOCKED`` only.
+"""
+import argparse
+import logging
+import multiprocessing
+import signal
+import threading
+
+from . import database, jobs
+from .config import settings
+
+logger = logging.getLogger("app.worker")
+
+
+def run_loop(stop, poll_interval: float, once: bool = False):
+    """Claim and run jobs until ``stop`` is set (or, with ``once``, until the queue is empty)."""
+    while not stop.is_set():
+        db = database.SessionLocal()
+        try:
+            worked = jobs.work_once(db)
+        except Exception:
+            logger.exception("Worker loop error")
+            worked = False
+        finally:
+            db.close()
+        if not worked:
+            if once:
+                return
+            stop.wait(poll_interval)
+
+
+def _process_main(stop, poll_interval: float, once: bool):
+    # Дочірній процес не повинен користуватись з'єднаннями батьківського
+    database.dispose_engines(close=False)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    run_loop(stop, poll_interval, once)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m app.worker", description="Run background jobs from the jobs table")
+    parser.add_argument("--concurrency", type=int, default=settings.worker_concurrency, help="parallel job loops (default: WORKER_CONCURRENCY)")
+    parser.add_argument("--executor", choices=("thread", "process"), default=settings.worker_executor, help="default: WORKER_EXECUTOR")
+    parser.add_argument("--once", action="store_true", help="exit when the queue is empty")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(processName)s %(levelname)s %(message)s")
+
+    poll_interval = settings.worker_poll_interval_ms / 1000
+    with database.SessionLocal() as db:
+        requeued, failed = jobs.requeue_stale(db, settings.worker_job_timeout, settings.worker_max_attempts)
+    if requeued or failed:
+        logger.info("Requeued %s stale jobs, %s failed after %s attempts", requeued, failed, settings.worker_max_attempts)
+
+    if args.executor == "process":
+        stop = multiprocessing.Event()
+        loops = [
+            multiprocessing.Process(target=_process_main, args=(stop, poll_interval, args.once), name=f"worker-{i}")
+            for i in range(args.concurrency)
+        ]
+    else:
+        stop = threading.Event()
+        loops = [
+            threading.Thread(target=run_loop, args=(stop, poll_interval, args.once), name=f"worker-{i}")
+            for i in range(args.concurrency)
+        ]
+    logger.info("Starting %s %s worker loops", args.concurrency, args.executor)
+    for loop in loops:
+        loop.start()
+    try:
+        for loop in loops:
+            loop.join()
+    except KeyboardInterrupt:
+        # Поточні задачі доробляються, нові не беруться
+        logger.info("Stopping after running jobs finish")
+        stop.set()
+        for loop in loops:
+            loop.join()
+
+
+if __name__ == "__main__":
+    main()
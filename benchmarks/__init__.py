@@ -0,0 +1 @@
+"""Latency/throughput benchmarks for the API hot paths; see ``benchmarks.run``."""
@@ -0,0 +1,106 @@
+"""Synthetic users with configurable history, created through ``app.crud`` and ``app.models``.
+
+History goes in through ``crud.import_transactions``, so the monthly ledger, period rollups
+and investment ranking are filled exactly as in production. Generation is deterministic
+for a given seed, and users that already exist are reused.
+
+    python -m benchmarks.datagen --users 3 --expenses 20000 --incomes 2000
+"""
+import argparse
+import random
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import List
+
+from app import crud, models, schemas, security
+from app.database import SessionLocal
+
+BENCH_PREFIX = "bench_"
+BENCH_PASSWORD = "bench-password"
+EXPENSE_CATEGORIES = ("Food", "Transport", "Rent", "Fun", "Health", "Інвестиції")
+INCOME_CATEGORIES = ("Salary", "Freelance")
+# Категорія з лімітом для сценарію створення витрат
+LIMITED_CATEGORY = "Food"
+LIMITED_CATEGORY_LIMIT = 5000.0
+
+
+@dataclass
+class DataSpec:
+    users: int = 3
+    expenses: int = 5000
+    incomes: int = 500
+    days: int = 730
+    seed: int = 42
+
+    def username(self, index: int) -> str:
+        # Розмір історії в імені: набори різних розмірів живуть в одній базі
+        return f"{BENCH_PREFIX}{self.expenses}_{self.incomes}_{index}"
+
+
+def _rows(spec: DataSpec, rnd: random.Random):
+    today = date.today()
+    line_no = 0
+    for kind, count, categories in (("expense", spec.expenses, EXPENSE_CATEGORIES), ("income", spec.incomes, INCOME_CATEGORIES)):
+        for _ in range(count):
+            line_no += 1
+            yield line_no, {
+                "kind": kind,
+                "date": today - timedelta(days=rnd.randrange(spec.days)),
+                "amount": round(rnd.uniform(1, 500 if kind == "expense" else 5000), 2),
+                "description": f"bench {kind} {line_no}",
+                "category": rnd.choice(categories),
+            }
+
+
+def generate(db, spec: DataSpec) -> List[models.User]:
+    """Create (or reuse) ``spec.users`` users with the requested history; returns them."""
+    hashed_password = None
+    users = []
+    for index in range(spec.users):
+        username = spec.username(index)
+        user = crud.get_user_by_username(db, username)
+        if user is None:
+            # Один хеш на всіх: bcrypt тут лише сповільнив би генерацію
+            hashed_password = hashed_password or security.hash_password(BENCH_PASSWORD)
+            user = crud.create_user(db, schemas.UserCreate(username=username, password=BENCH_PASSWORD), hashed_password=hashed_password)
+            crud.import_transactions(db, user.id, _rows(spec, random.Random(spec.seed + index)))
+            limited = db.query(models.ExpenseCategory).filter(
+                models.ExpenseCategory.owner_id == user.id, models.ExpenseCategory.name == LIMITED_CATEGORY
+            ).first()
+            limited.limit = LIMITED_CATEGORY_LIMIT
+            db.commit()
+        users.append(user)
+    crud.refresh_investment_ranks(db)
+    # Коміт вище прострочує атрибути; завантажуємо їх, щоб користувачі були придатні після закриття сесії
+    for user in users:
+        db.refresh(user)
+    return users
+
+
+def add_argparse_options(parser: argparse.ArgumentParser):
+    defaults = DataSpec()
+    parser.add_argument("--users", type=int, default=defaults.users, help="benchmark users to create")
+    parser.add_argument("--expenses", type=int, default=defaults.expenses, help="expenses per user")
+    parser.add_argument("--incomes", type=int, default=defaults.incomes, help="incomes per user")
+    parser.add_argument("--days", type=int, default=defaults.days, help="history length in days")
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+
+
+def spec_from_args(args) -> DataSpec:
+    return DataSpec(users=args.users, expenses=args.expenses, incomes=args.incomes, days=args.days, seed=args.seed)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.datagen", description="Create benchmark users")
+    add_argparse_options(parser)
+    args = parser.parse_args(argv)
+    db = SessionLocal()
+    try:
+        users = generate(db, spec_from_args(args))
+    finally:
+        db.close()
+    print(f"{len(users)} users ready: {', '.join(user.username for user in users)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""Run the benchmark scenarios and report latency percentiles and throughput.
+
+    python -m benchmarks.run [--scenarios finances_deep_offset,login] [--iterations 200]
+                             [--users 3 --expenses 5000 --incomes 500]
+                             [--base-url http://localhost:8000] [--concurrency 4]
+                             [--json results.json] [--compare baseline.json]
+
+Benchmark data is generated (or reused) in the database from ``DATABASE_URL``. Without
+``--base-url`` requests go to the app in-process; with it, to a running server that must
+use the same database. ``--compare`` exits with status 1 when any scenario's p95 is worse
+than the baseline by more than ``--max-regression``.
+
+SQLite smoke run:
+    DATABASE_URL=sqlite:///./bench.db python -m benchmarks.run --create-schema --expenses 500 --iterations 20
+"""
+import argparse
+import json
+import math
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app.database import SessionLocal
+
+from . import datagen
+from .scenarios import SCENARIOS, Context
+
+
+def percentile(sorted_values, p: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return float("nan")
+    return sorted_values[min(len(sorted_values) - 1, max(0, math.ceil(p / 100 * len(sorted_values)) - 1))]
+
+
+def measure(call, expected, iterations: int, warmup: int, concurrency: int) -> dict:
+    for i in range(warmup):
+        call(i % iterations)
+
+    def timed(i):
+        start = time.perf_counter()
+        response = call(i)
+        return time.perf_counter() - start, response.status_code in expected
+
+    started = time.perf_counter()
+    # Розігрів використовує ті самі індекси, тому сценарії з одноразовими даними (delete) його пропускають
+    indexes = range(iterations)
+    if concurrency > 1:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            results = list(pool.map(timed, indexes))
+    else:
+        results = [timed(i) for i in indexes]
+    elapsed = time.perf_counter() - started
+
+    latencies = sorted(seconds * 1000 for seconds, _ in results)
+    return {
+        "iterations": iterations,
+        "errors": sum(1 for _, ok in results if not ok),
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+        "p99_ms": percentile(latencies, 99),
+        "mean_ms": sum(latencies) / len(latencies),
+        "max_ms": latencies[-1],
+        "throughput_rps": iterations / elapsed,
+    }
+
+
+def print_report(results: dict, baseline: dict = None):
+    header = f"{'scenario':<24}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'mean ms':>10}{'req/s':>10}{'errors':>8}"
+    print(header)
+    print("-" * len(header))
+    for name, r in results.items():
+        line = f"{name:<24}{r['p50_ms']:>10.2f}{r['p95_ms']:>10.2f}{r['p99_ms']:>10.2f}{r['mean_ms']:>10.2f}{r['throughput_rps']:>10.1f}{r['errors']:>8}"
+        if baseline and name in baseline:
+            line += f"   p95 {(r['p95_ms'] / baseline[name]['p95_ms'] - 1):+.0%} vs baseline"
+        print(line)
+
+
+def regressions(results: dict, baseline: dict, max_regression: float) -> list:
+    return [
+        name for name, r in results.items()
+        if name in baseline and r["p95_ms"] > baseline[name]["p95_ms"] * (1 + max_regression)
+    ]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.run", description="API hot path benchmarks")
+    parser.add_argument("--scenarios", default="all", help=f"comma-separated, or 'all': {', '.join(SCENARIOS)}")
+    parser.add_argument("--iterations", type=int, default=100)
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--base-url", help="benchmark a running server instead of the in-process app")
+    parser.add_argument("--create-schema", action="store_true", help="create tables with metadata.create_all (SQLite smoke runs)")
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--compare", help="baseline results file from an earlier --json run")
+    parser.add_argument("--max-regression", type=float, default=0.2, help="allowed p95 slowdown vs baseline (0.2 = 20%%)")
+    datagen.add_argparse_options(parser)
+    args = parser.parse_args(argv)
+
+    names = list(SCENARIOS) if args.scenarios == "all" else args.scenarios.split(",")
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(unknown)}")
+
+    if args.create_schema:
+        from app.database import Base, get_engine
+
+        Base.metadata.create_all(bind=get_engine())
+    spec = datagen.spec_from_args(args)
+    db = SessionLocal()
+    try:
+        started = time.perf_counter()
+        users = datagen.generate(db, spec)
+        print(f"Data ready in {time.perf_counter() - started:.1f}s: {len(users)} users x {spec.expenses} expenses / {spec.incomes} incomes")
+    finally:
+        db.close()
+
+    if args.base_url:
+        import httpx
+
+        client = httpx.Client(base_url=args.base_url, timeout=60)
+    else:
+        from fastapi.testclient import TestClient
+        from app.main import app
+
+        client = TestClient(app)
+
+    results = {}
+    with client:
+        ctx = Context(client=client, spec=spec, users=users, iterations=args.iterations)
+        for user in users:
+            ctx.login(user.username)
+        for name in names:
+            call, expected = SCENARIOS[name](ctx)
+            # Сценарії, що змінюють дані безповоротно, не розігріваються
+            warmup = 0 if name in ("delete_category", "create_user") else args.warmup
+            results[name] = measure(call, expected, args.iterations, warmup, args.concurrency)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+    print_report(results, baseline)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"spec": vars(spec), "iterations": args.iterations, "concurrency": args.concurrency, "results": results}, f, indent=2)
+    if baseline:
+        slower = regressions(results, baseline, args.max_regression)
+        if slower:
+            print(f"p95 regression over {args.max_regression:.0%}: {', '.join(slower)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""Benchmark scenarios.
+
+A scenario is a setup function registered with ``@scenario``: it runs once, untimed, and
+returns ``(call, expected_statuses)``. ``call(i)`` performs the i-th timed request and
+returns the response.
+"""
+import random
+import time
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Callable, Dict, List
+
+from app import crud, models
+from app.database import SessionLocal
+
+from .datagen import BENCH_PASSWORD, LIMITED_CATEGORY, DataSpec
+
+SCENARIOS: Dict[str, Callable] = {}
+
+
+def scenario(name: str):
+    def register(setup):
+        SCENARIOS[name] = setup
+        return setup
+    return register
+
+
+@dataclass
+class Context:
+    client: object  # httpx.Client або fastapi TestClient
+    spec: DataSpec
+    users: List[models.User]
+    iterations: int
+    headers: Dict[str, dict] = field(default_factory=dict)  # username -> auth headers
+
+    def login(self, username: str) -> dict:
+        if username not in self.headers:
+            response = self.client.post("/token", data={"username": username, "password": BENCH_PASSWORD})
+            response.raise_for_status()
+            self.headers[username] = {"Authorization": "Bearer " + response.json()["access_token"]}
+        return self.headers[username]
+
+    def user_headers(self, i: int) -> dict:
+        """Round-robin over the benchmark users."""
+        return self.login(self.users[i % len(self.users)].username)
+
+
+@scenario("finances_deep_offset")
+def finances_deep_offset(ctx: Context):
+    # Остання десята частина історії: OFFSET проходить майже всі рядки
+    expense_skip = max(ctx.spec.expenses * 9 // 10, 0)
+    income_skip = max(ctx.spec.incomes * 9 // 10, 0)
+
+    def call(i):
+        params = {"expense_skip": expense_skip, "expense_limit": 100, "income_skip": income_skip, "income_limit": 100}
+        return ctx.client.get("/finances/", params=params, headers=ctx.user_headers(i))
+    return call, {200}
+
+
+@scenario("finances_cursor")
+def finances_cursor(ctx: Context):
+    def call(i):
+        params = {"pagination": "cursor", "expense_limit": 100, "income_limit": 100}
+        return ctx.client.get("/finances/", params=params, headers=ctx.user_headers(i))
+    return call, {200}
+
+
+@scenario("finances_columnar")
+def finances_columnar(ctx: Context):
+    def call(i):
+        params = {"format": "columnar", "expense_limit": 1000, "income_limit": 100}
+        return ctx.client.get("/finances/", params=params, headers=ctx.user_headers(i))
+    return call, {200}
+
+
+@scenario("create_expense_limited")
+def create_expense_limited(ctx: Context):
+    db = SessionLocal()
+    try:
+        category_ids = {
+            user.username: db.query(models.ExpenseCategory.id).filter(
+                models.ExpenseCategory.owner_id == user.id, models.ExpenseCategory.name == LIMITED_CATEGORY
+            ).scalar()
+            for user in ctx.users
+        }
+    finally:
+        db.close()
+    today = date.today().isoformat()
+
+    def call(i):
+        username = ctx.users[i % len(ctx.users)].username
+        payload = {"amount": 10.0, "date": today, "category_id": category_ids[username], "description": "bench"}
+        return ctx.client.post("/finances/expenses/", json=payload, headers=ctx.login(username))
+    return call, {200}
+
+
+@scenario("delete_category")
+def delete_category(ctx: Context, expenses_per_category: int = 200):
+    """Each iteration deletes a category holding ``expenses_per_category`` expenses (reassigned to Uncategorized)."""
+    rnd = random.Random(ctx.spec.seed)
+    run_id = int(time.time())
+    targets = []
+    db = SessionLocal()
+    try:
+        for i in range(ctx.iterations):
+            user = ctx.users[i % len(ctx.users)]
+            name = f"bench-delete-{run_id}-{i}"
+            rows = (
+                (n, {"kind": "expense", "date": date.today(), "amount": rnd.uniform(1, 100), "description": None, "category": name})
+                for n in range(expenses_per_category)
+            )
+            crud.import_transactions(db, user.id, rows)
+            category_id = db.query(models.ExpenseCategory.id).filter(
+                models.ExpenseCategory.owner_id == user.id, models.ExpenseCategory.name == name
+            ).scalar()
+            targets.append((user.username, category_id))
+    finally:
+        db.close()
+
+    def call(i):
+        username, category_id = targets[i]
+        return ctx.client.delete(f"/finances/expense_categories/{category_id}", headers=ctx.login(username))
+    return call, {204}
+
+
+@scenario("investments")
+def investments(ctx: Context):
+    def call(i):
+        return ctx.client.get("/finances/investments", headers=ctx.user_headers(i))
+    return call, {200}
+
+
+@scenario("login")
+def login(ctx: Context):
+    def call(i):
+        username = ctx.users[i % len(ctx.users)].username
+        return ctx.client.post("/token", data={"username": username, "password": BENCH_PASSWORD})
+    return call, {200}
+
+
+@scenario("create_user")
+def create_user(ctx: Context):
+    run_id = int(time.time() * 1000)
+
+    def call(i):
+        return ctx.client.post("/users/", data={"username": f"bench-new-{run_id}-{i}", "password": BENCH_PASSWORD})
+    return call, {200}
@@ -0,0 +1,98 @@
+"""Print EXPLAIN ANALYZE plans for the queries issued by ``app.crud``.
+
+Usage:
+    python scripts/explain_crud.py <username> [--start-date 2025-01-01] [--end-date 2025-12-31]
+
+Every crud call runs inside a transaction that is rolled back at the end, so the
+script is safe to point at a database with real data. Compare the output before
+and after ``alembic upgrade head`` to check that the owner-scoped indexes are used.
+"""
+import argparse
+import sys
+from datetime import date
+from os.path import abspath, dirname
+
+sys.path.insert(0, dirname(dirname(abspath(__file__))))
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app import crud, models, schemas
+from app.database import get_engine
+
+
+def capture_statements(conn, run):
+    """Run ``run(session)`` and return the (statement, parameters) pairs it executed and its error, if any."""
+    captured = []
+    error = None
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if not executemany and not statement.lstrip().upper().startswith(("EXPLAIN", "SAVEPOINT", "RELEASE", "ROLLBACK")):
+            captured.append((statement, parameters))
+
+    event.listen(conn, "before_cursor_execute", before_cursor_execute)
+    try:
+        # commit() у crud лише звільняє savepoint, зовнішня транзакція відкочується
+        session = Session(bind=conn, join_transaction_mode="create_savepoint")
+        try:
+            run(session)
+        except Exception as exc:  # ліміт категорії тощо — план все одно цікавий
+            error = exc
+        session.close()
+    finally:
+        event.remove(conn, "before_cursor_execute", before_cursor_execute)
+    return captured, error
+
+
+def explain(conn, statement, parameters):
+    plan = conn.exec_driver_sql("EXPLAIN (ANALYZE, BUFFERS) " + statement, parameters)
+    return "\n".join(row[0] for row in plan)
+
+
+def crud_calls(user, start_date, end_date):
+    expense_category = next(iter(user.expense_categories), None)
+    expense_category_id = expense_category.id if expense_category else None
+    return [
+        ("get_expenses", lambda db: crud.get_expenses(db, user.id, start_date, end_date)),
+        ("get_expenses (category)", lambda db: crud.get_expenses(db, user.id, start_date, end_date, category_id=expense_category_id)),
+        ("get_expenses (deep offset)", lambda db: crud.get_expenses(db, user.id, start_date, end_date, skip=5000, with_total=False)),
+        ("get_expenses_page", lambda db: crud.get_expenses_page(db, user.id, start_date, end_date)),
+        ("get_incomes", lambda db: crud.get_incomes(db, user.id, start_date, end_date)),
+        ("get_incomes_page", lambda db: crud.get_incomes_page(db, user.id, start_date, end_date)),
+        ("get_financial_summary", lambda db: crud.get_financial_summary(db, user.id, start_date, end_date)),
+        ("get_expense_categories", lambda db: crud.get_expense_categories(db, user.id)),
+        ("get_income_categories", lambda db: crud.get_income_categories(db, user.id)),
+        ("create_user_expense", lambda db: crud.create_user_expense(
+            db, schemas.ExpenseCreate(amount=1.0, date=date.today(), category_id=expense_category_id), user.id
+        )),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("username")
+    parser.add_argument("--start-date", type=date.fromisoformat)
+    parser.add_argument("--end-date", type=date.fromisoformat)
+    args = parser.parse_args()
+
+    with get_engine().connect() as conn:
+        transaction = conn.begin()
+        try:
+            user = Session(bind=conn).query(models.User).filter(models.User.username == args.username).first()
+            if user is None:
+                sys.exit(f"User '{args.username}' not found")
+            for name, run in crud_calls(user, args.start_date, args.end_date):
+                print(f"=== crud.{name}")
+                statements, error = capture_statements(conn, run)
+                if error is not None:
+                    print(f"  ({type(error).__name__}: {error})")
+                for statement, parameters in statements:
+                    print(statement.strip())
+                    print(explain(conn, statement, parameters))
+                    print()
+        finally:
+            transaction.rollback()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""Measure cold start: import ``app.main`` and run the lifespan startup in fresh processes.
+
+Usage:
+    python scripts/startup_time.py [--runs 5] [--no-warmup]
+
+Each run is a new interpreter, so the numbers include module imports the way a freshly
+scheduled worker pays them. Prints the per-phase median over the runs (milliseconds).
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from os.path import abspath, dirname
+
+ROOT = dirname(dirname(abspath(__file__)))
+
+CHILD = """
+import json, time
+started = time.perf_counter()
+from fastapi.testclient import TestClient
+from app.main import app
+with TestClient(app):
+    timings = dict(app.state.startup)
+timings["total_ms"] = round((time.perf_counter() - started) * 1000, 1)
+print(json.dumps(timings))
+"""
+
+
+def measure(warmup: bool) -> dict:
+    env = dict(os.environ, STARTUP_WARMUP="1" if warmup else "0")
+    started = time.perf_counter()
+    output = subprocess.run([sys.executable, "-c", CHILD], cwd=ROOT, env=env, check=True, capture_output=True, text=True).stdout
+    timings = json.loads(output.strip().splitlines()[-1])
+    timings["process_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--no-warmup", action="store_true", help="skip pool/template warmup (STARTUP_WARMUP=0)")
+    args = parser.parse_args()
+
+    runs = [measure(not args.no_warmup) for _ in range(args.runs)]
+    for key in runs[0]:
+        values = [run[key] for run in runs]
+        print(f"{key:<15}{statistics.median(values):>10.1f}   (min {min(values):.1f}, max {max(values):.1f})")
+
+
+if __name__ == "__main__":
+    main()
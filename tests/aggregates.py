@@ -0,0 +1,45 @@
+"""Check the maintained aggregates against a recomputation from the transaction tables."""
+from collections import defaultdict
+
+from app import crud, models
+
+
+def _rollups(db, owner_id):
+    rollup = models.PeriodRollup
+    rows = db.query(rollup).filter(rollup.owner_id == owner_id).all()
+    # Після видалень лишаються нульові рядки — вони не впливають на відповіді
+    return {
+        (row.granularity, row.period_start, row.kind, row.category_id): (round(row.total, 6), row.count)
+        for row in rows if row.count
+    }
+
+
+def _ledger(db, owner_id):
+    ledger = models.CategorySpending
+    return {
+        (row.category_id, row.month): (round(row.total, 6), row.count)
+        for row in db.query(ledger).filter(ledger.owner_id == owner_id) if row.count
+    }
+
+
+def _expected_ledger(db, owner_id):
+    totals = defaultdict(lambda: [0.0, 0])
+    expense = models.Expense
+    for category_id, day, amount in db.query(expense.category_id, expense.date, expense.amount).filter(expense.owner_id == owner_id):
+        if category_id is None or day is None:
+            continue
+        key = (category_id, day.replace(day=1))
+        totals[key][0] += amount
+        totals[key][1] += 1
+    return {key: (round(total, 6), count) for key, (total, count) in totals.items()}
+
+
+def assert_aggregates_consistent(db, owner_id):
+    """Rollups must equal ``crud.rebuild_rollups`` output, the ledger must equal the expenses per month."""
+    db.expire_all()
+    maintained = _rollups(db, owner_id)
+    ledger = _ledger(db, owner_id)
+    assert ledger == _expected_ledger(db, owner_id)
+    crud.rebuild_rollups(db, owner_id=owner_id)
+    db.expire_all()
+    assert maintained == _rollups(db, owner_id)
@@ -0,0 +1,62 @@
+"""Fixtures: the app on a fresh SQLite database per test, and a logged-in client."""
+import os
+from dataclasses import replace
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import database, main, models
+from app.config import Settings
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    # Шаблони й статика підключаються відносними шляхами
+    monkeypatch.chdir(ROOT)
+    test_settings = replace(
+        Settings(),
+        database_url=f"sqlite:///{tmp_path / 'test.db'}",
+        auth_cache_backend="none",
+        bcrypt_rounds=4,
+        password_schemes="bcrypt",
+        password_hash_executor="thread",
+        startup_warmup=False,
+        instrumentation=False,
+    )
+    application = main.create_app(test_settings)
+    database.Base.metadata.create_all(bind=database.get_engine())
+    yield application
+    database.dispose_engines()
+
+
+@pytest.fixture
+def client(app):
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def db(app):
+    session = database.SessionLocal()
+    yield session
+    session.close()
+
+
+def login(client, username="alice", password="secret"):
+    """Register ``username`` and return the Authorization header of its token."""
+    assert client.post("/users/", data={"username": username, "password": password}).status_code == 200
+    response = client.post("/token", data={"username": username, "password": password})
+    assert response.status_code == 200, response.text
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+@pytest.fixture
+def auth(client):
+    return login(client)
+
+
+@pytest.fixture
+def owner_id(auth, db):
+    return db.query(models.User.id).filter(models.User.username == "alice").scalar()
@@ -0,0 +1,87 @@
+"""Rollups and the monthly spending ledger stay equal to a full recomputation after every kind of write."""
+import io
+import json
+
+from app import crud, imports
+
+from .aggregates import assert_aggregates_consistent
+
+
+def _category(client, auth, name, kind="expense", **fields):
+    response = client.post(f"/finances/{kind}_categories/", json={"name": name, **fields}, headers=auth)
+    assert response.status_code == 200, response.text
+    return response.json()["id"]
+
+
+def test_create_update_delete(client, auth, db, owner_id):
+    food = _category(client, auth, "Food", limit=100)
+    rent = _category(client, auth, "Rent")
+    salary = _category(client, auth, "Job", kind="income")
+    ids = [
+        client.post("/finances/expenses/", json={"amount": amount, "date": day, "category_id": food}, headers=auth).json()["id"]
+        for amount, day in ((10, "2025-01-30"), (20, "2025-02-02"), (30, "2025-02-28"))
+    ]
+    client.post("/finances/expenses/", json={"amount": 5, "date": "2025-02-03"}, headers=auth)
+    income = client.post("/finances/incomes/", json={"amount": 1000, "date": "2025-02-01", "category_id": salary}, headers=auth).json()["id"]
+    assert_aggregates_consistent(db, owner_id)
+
+    assert client.put(f"/finances/expenses/{ids[0]}", json={"amount": 15}, headers=auth).status_code == 200
+    assert client.put(f"/finances/expenses/{ids[1]}", json={"category_id": rent, "date": "2024-12-31"}, headers=auth).status_code == 200
+    assert client.put(f"/finances/incomes/{income}", json={"amount": 900, "date": "2025-03-01"}, headers=auth).status_code == 200
+    assert_aggregates_consistent(db, owner_id)
+
+    assert client.delete(f"/finances/expenses/{ids[2]}", headers=auth).status_code == 204
+    assert client.delete(f"/finances/incomes/{income}", headers=auth).status_code == 204
+    assert_aggregates_consistent(db, owner_id)
+
+
+def test_batch(client, auth, db, owner_id):
+    food = _category(client, auth, "Food")
+    rent = _category(client, auth, "Rent")
+    operations = [{"op": "create", "data": {"amount": 10 + i, "date": f"2025-0{1 + i % 3}-1{i}", "category_id": food}} for i in range(6)]
+    results = client.post("/finances/expenses/batch", json={"operations": operations}, headers=auth).json()["results"]
+    ids = [result["id"] for result in results]
+    assert_aggregates_consistent(db, owner_id)
+
+    response = client.post("/finances/expenses/batch", json={"operations": [
+        {"op": "update", "id": ids[0], "data": {"amount": 100}},
+        {"op": "update", "id": ids[1], "data": {"category_id": rent, "date": "2025-05-05"}},
+        {"op": "delete", "id": ids[2]},
+        {"op": "create", "data": {"amount": 7, "date": "2025-01-01"}},
+    ]}, headers=auth).json()
+    assert response["applied"] == 4
+    assert_aggregates_consistent(db, owner_id)
+
+
+def test_import(client, auth, db, owner_id):
+    _category(client, auth, "Food")
+    lines = [
+        {"type": "expense", "date": f"2025-0{1 + i % 4}-0{1 + i % 9}", "amount": i + 1, "category": "Food" if i % 2 else "New"}
+        for i in range(30)
+    ] + [{"type": "income", "date": "2025-02-01", "amount": 500, "category": "Salary"}]
+    body = "\n".join(json.dumps(line) for line in lines).encode()
+    response = client.post("/finances/import?format=jsonl", files={"file": ("rows.jsonl", io.BytesIO(body))}, headers=auth)
+    assert response.status_code == 200, response.text
+    assert response.json()["imported_expenses"] == 30
+    assert_aggregates_consistent(db, owner_id)
+
+    # Малі пакети: кожен комітиться окремо зі своїми агрегатами
+    result = crud.import_transactions(db, owner_id, imports.read_rows(io.BytesIO(body), "jsonl"), batch_size=7)
+    assert result["imported_expenses"] == 30 and not result["created_categories"]
+    assert_aggregates_consistent(db, owner_id)
+
+
+def test_merge(client, auth, db, owner_id):
+    sources = [_category(client, auth, f"Source {i}") for i in range(3)]
+    target = _category(client, auth, "Target")
+    for i in range(12):
+        category_id = (sources + [target])[i % 4]
+        client.post("/finances/expenses/", json={"amount": i + 1, "date": f"2025-0{1 + i % 3}-15", "category_id": category_id}, headers=auth)
+    response = client.post("/finances/categories/merge", json={"source_ids": sources[:2], "target_id": target}, headers=auth)
+    assert response.status_code == 200, response.text
+    assert response.json()["moved_transactions"] == 6
+    assert_aggregates_consistent(db, owner_id)
+
+    # Видалення категорії йде тим самим шляхом — у 'Uncategorized'
+    assert client.delete(f"/finances/expense_categories/{sources[2]}", headers=auth).status_code == 204
+    assert_aggregates_consistent(db, owner_id)
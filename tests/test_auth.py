@@ -0,0 +1,24 @@
+"""Cached identities in get_current_user: served from the cache, dropped on deactivation."""
+import pytest
+
+from app import cache
+
+from .conftest import login
+
+
+@pytest.fixture
+def memory_cache(monkeypatch):
+    user_cache = cache.MemoryCache(ttl=60, max_size=100)
+    monkeypatch.setattr(cache, "user_cache", user_cache)
+    return user_cache
+
+
+def test_identity_is_cached_and_invalidated_on_deactivation(client, memory_cache):
+    auth = login(client)
+    assert client.get("/finances/expense_categories/", headers=auth).status_code == 200
+    assert memory_cache.get("alice")["is_active"] is True
+
+    assert client.delete("/users/me", headers=auth).status_code == 204
+    assert memory_cache.get("alice") is None
+    response = client.get("/finances/expense_categories/", headers=auth)
+    assert response.status_code == 400 and response.json()["detail"] == "Inactive user"
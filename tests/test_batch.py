@@ -0,0 +1,92 @@
+"""POST /finances/{expenses,incomes}/batch (per-item errors, atomicity, limit warnings) and the matching PUT checks."""
+from app import models
+
+
+def _food(client, auth, limit=100):
+    return client.post("/finances/expense_categories/", json={"name": "Food", "limit": limit}, headers=auth).json()["id"]
+
+
+def _batch(client, auth, operations, kind="expenses", **options):
+    response = client.post(f"/finances/{kind}/batch", json={"operations": operations, **options}, headers=auth)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_amount_only_update_gets_limit_warning(client, auth):
+    food = _food(client, auth)
+    created = _batch(client, auth, [{"op": "create", "data": {"amount": 90, "date": "2025-02-01", "category_id": food}}])
+    expense_id = created["results"][0]["id"]
+    assert created["results"][0]["warning"] is None
+
+    result = _batch(client, auth, [{"op": "update", "id": expense_id, "data": {"amount": 150}}])["results"][0]
+    assert result["status"] == "ok"
+    assert result["warning"]["total"] == 150 and result["warning"]["exceeded"] == 50
+
+
+def test_null_amount_or_date_is_an_item_error(client, auth, db):
+    food = _food(client, auth)
+    created = _batch(client, auth, [{"op": "create", "data": {"amount": 10, "date": "2025-02-01", "category_id": food}}] * 2)
+    first, second = (result["id"] for result in created["results"])
+
+    response = _batch(client, auth, [
+        {"op": "update", "id": first, "data": {"amount": None}},
+        {"op": "update", "id": second, "data": {"date": None}},
+    ])
+    assert response["applied"] == 0 and response["failed"] == 2
+    assert [result["error"] for result in response["results"]] == ["amount cannot be null", "date cannot be null"]
+    assert sorted(amount for (amount,) in db.query(models.Expense.amount)) == [10, 10]
+
+
+def test_atomic_batch_applies_nothing_on_error(client, auth, db):
+    food = _food(client, auth)
+    other_user = client.post("/users/", data={"username": "eve", "password": "pw"}).json()["id"]
+    foreign = db.query(models.ExpenseCategory.id).filter(models.ExpenseCategory.owner_id == other_user).first()[0]
+    created = _batch(client, auth, [{"op": "create", "data": {"amount": 10, "date": "2025-02-01", "category_id": food}}])
+    expense_id = created["results"][0]["id"]
+
+    operations = [
+        {"op": "delete", "id": expense_id},
+        {"op": "create", "data": {"amount": 1, "date": "2025-02-01", "category_id": foreign}},
+        {"op": "create", "data": {"amount": 1}},
+        {"op": "frob"},
+        {"op": "update", "id": 999999, "data": {"amount": 1}},
+        {"op": "update", "id": expense_id, "data": {}},
+    ]
+    response = _batch(client, auth, operations)
+    assert response["applied"] == 0 and response["failed"] == 5
+    statuses = [(result["status"], result["error"]) for result in response["results"]]
+    assert statuses[0] == ("skipped", None)
+    assert statuses[1] == ("error", "Category not found")
+    assert statuses[2][0] == "error" and "date" in statuses[2][1]
+    assert statuses[3][0] == "error" and statuses[3][1].startswith("op must be one of")
+    assert statuses[4] == ("error", "Expense not found")
+    assert statuses[5] == ("error", "The same transaction appears more than once in the batch")
+    assert db.query(models.Expense).count() == 1
+
+
+def test_non_atomic_batch_skips_invalid_items(client, auth, db):
+    response = _batch(client, auth, [
+        {"op": "create", "data": {"amount": 5, "date": "2025-01-01"}},
+        {"op": "update", "id": 424242, "data": {"amount": 1}},
+    ], kind="incomes", atomic=False)
+    assert response["applied"] == 1 and response["failed"] == 1
+    assert [result["status"] for result in response["results"]] == ["ok", "error"]
+    assert db.query(models.Income).count() == 1
+
+
+def test_batch_size_limit(client, auth):
+    response = client.post("/finances/incomes/batch", json={"operations": [{"op": "delete", "id": 1}] * 1001}, headers=auth)
+    assert response.status_code == 400
+
+
+def test_single_update_rejects_null_amount_or_date(client, auth, db):
+    food = _food(client, auth)
+    expense = client.post("/finances/expenses/", json={"amount": 10, "date": "2025-02-01", "category_id": food}, headers=auth).json()["id"]
+    income = client.post("/finances/incomes/", json={"amount": 5, "date": "2025-02-01"}, headers=auth).json()["id"]
+    for path in (f"/finances/expenses/{expense}", f"/finances/incomes/{income}"):
+        for field in ("amount", "date"):
+            response = client.put(path, json={field: None}, headers=auth)
+            assert response.status_code == 400, response.text
+            assert response.json()["detail"] == f"{field} cannot be null"
+    assert db.query(models.Expense.amount).scalar() == 10
+    assert db.query(models.CategorySpending.total).scalar() == 10
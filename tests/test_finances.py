@@ -0,0 +1,144 @@
+"""Single-transaction endpoints, snapshot refresh and the protected system routes."""
+from dataclasses import replace
+from datetime import date, timedelta
+
+from fastapi.testclient import TestClient
+
+from app import crud, database, main, models
+
+from .conftest import ROOT, login
+
+
+def test_expense_over_limit_is_saved_with_warning(client, auth, db):
+    food = client.post("/finances/expense_categories/", json={"name": "Food", "limit": 100}, headers=auth).json()["id"]
+    first = client.post("/finances/expenses/", json={"amount": 90, "date": "2025-02-01", "category_id": food}, headers=auth)
+    assert first.status_code == 200 and first.json()["warning"] is None
+
+    second = client.post("/finances/expenses/", json={"amount": 20, "date": "2025-02-03", "category_id": food}, headers=auth)
+    assert second.status_code == 200, second.text
+    assert second.json()["warning"] == {"message": "Ліміт категорії 'Food' перевищено!", "limit": 100, "total": 110, "exceeded": 10}
+    assert db.query(models.Expense).count() == 2
+
+
+def test_stale_snapshots_are_served_and_refreshed_by_a_job(auth, db, owner_id):
+    forecast = crud.get_user_forecast(db, owner_id)
+    advices = crud.get_user_advices(db, owner_id)
+    assert db.query(models.Job).count() == 0
+
+    tomorrow = date.today() + timedelta(days=1)
+    for _ in range(2):
+        assert crud.get_user_forecast(db, owner_id, tomorrow) == forecast
+        assert crud.get_user_advices(db, owner_id, tomorrow).computed_on == advices.computed_on
+    assert sorted(job.kind for job in db.query(models.Job)) == ["advices", "forecast"]
+
+
+def test_snapshot_saves_are_upserts(auth, db, owner_id):
+    tomorrow = date.today() + timedelta(days=1)
+    crud.save_forecast_snapshots(db, date.today(), {owner_id: {"v": 1}})
+    crud.save_forecast_snapshots(db, tomorrow, {owner_id: {"v": 2}})
+    db.expire_all()
+    assert db.get(models.UserForecast, owner_id).data == {"v": 2}
+
+    crud.save_advice_snapshots(db, date.today(), {owner_id: [{"a": 1}]})
+    crud.save_advice_snapshots(db, tomorrow, {owner_id: [{"a": 1}]})
+    db.expire_all()
+    assert db.get(models.UserAdvice, owner_id).version == 1
+    crud.save_advice_snapshots(db, tomorrow, {owner_id: [{"a": 2}]})
+    db.expire_all()
+    assert db.get(models.UserAdvice, owner_id).version == 2
+
+
+def test_system_routes_require_a_token(client, auth):
+    for path in ("/system/pool", "/system/startup"):
+        assert client.get(path).status_code == 401
+        assert client.get(path, headers=auth).status_code == 200
+
+
+def test_metrics_require_a_token(tmp_path, monkeypatch):
+    monkeypatch.chdir(ROOT)
+    instrumented = replace(main.settings, database_url=f"sqlite:///{tmp_path / 'metrics.db'}", instrumentation=True)
+    app = main.create_app(instrumented)
+    database.Base.metadata.create_all(bind=database.get_engine())
+    try:
+        with TestClient(app) as client:
+            assert client.get("/metrics").status_code == 401
+            response = client.get("/metrics", headers=login(client))
+            assert response.status_code == 200 and "http_requests_total" in response.text
+    finally:
+        database.dispose_engines()
+
+
+def _month_before(day: date, months: int) -> date:
+    index = day.year * 12 + day.month - 1 - months
+    return date(index // 12, index % 12 + 1, 10)
+
+
+def test_forecast_goal_past_date_max_is_unreachable(client, auth):
+    for months in range(1, 4):
+        day = _month_before(date.today(), months).isoformat()
+        client.post("/finances/incomes/", json={"amount": 100.01, "date": day}, headers=auth)
+        client.post("/finances/expenses/", json={"amount": 100, "date": day}, headers=auth)
+
+    response = client.get("/finances/forecast?target=1e9", headers=auth)
+    assert response.status_code == 200, response.text
+    forecast = response.json()
+    assert 0 < forecast["monthly_savings"] < 0.1
+    assert forecast["goal"]["months"] is None and forecast["goal"]["eta_month"] is None
+
+    reachable = client.get("/finances/forecast?target=1", headers=auth).json()["goal"]
+    assert reachable["months"] > 0 and reachable["eta_month"] is not None
+
+
+def test_investment_drill_down_pages_per_category(client, auth):
+    stocks = client.post("/finances/expense_categories/", json={"name": "Stocks", "is_investment": True}, headers=auth).json()["id"]
+    bonds = client.post("/finances/expense_categories/", json={"name": "Bonds", "is_investment": True}, headers=auth).json()["id"]
+    client.post("/finances/expenses/", json={"amount": 1, "date": "2024-01-01", "category_id": bonds}, headers=auth)
+    for day in range(1, 6):
+        client.post("/finances/expenses/", json={"amount": day, "date": f"2025-01-0{day}", "category_id": stocks}, headers=auth)
+
+    seen, cursor = [], None
+    while True:
+        params = {"category_id": stocks, "limit": 2, **({"cursor": cursor} if cursor else {})}
+        page = client.get("/finances/investments/expenses", params=params, headers=auth).json()
+        seen += [expense["amount"] for expense in page["expenses"]]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert seen == [5, 4, 3, 2, 1]
+    only_bonds = client.get("/finances/investments/expenses", params={"category_id": bonds, "limit": 2}, headers=auth).json()
+    assert [expense["amount"] for expense in only_bonds["expenses"]] == [1] and only_bonds["next_cursor"] is None
+
+
+def test_keyset_pages_include_rows_without_a_date(client, auth, db, owner_id):
+    for day in range(1, 4):
+        client.post("/finances/expenses/", json={"amount": day, "date": f"2025-03-0{day}"}, headers=auth)
+    # Рядки без дати лишилися від старих даних — API таких не створює
+    db.add_all([models.Expense(owner_id=owner_id, amount=10 + n, date=None) for n in range(3)])
+    db.commit()
+
+    seen, cursor = [], None
+    while True:
+        items, cursor, _ = crud.get_expenses_page(db, owner_id, cursor=cursor, limit=2, load=())
+        seen += [expense.amount for expense in items]
+        if cursor is None:
+            break
+    assert seen == [12, 11, 10, 3, 2, 1]
+
+
+def test_colliding_pseudonyms_are_extended(client, auth, db, owner_id):
+    login(client, "bob")
+    bob = db.query(models.User.id).filter(models.User.username == "bob").scalar()
+    # Боб уже зайняв короткий псевдонім Аліси
+    db.add(models.InvestmentRanking(owner_id=bob, pseudonym=crud.investment_pseudonym(owner_id), total=1))
+    db.commit()
+
+    stocks = client.post("/finances/expense_categories/", json={"name": "Stocks", "is_investment": True}, headers=auth).json()["id"]
+    client.post("/finances/expenses/", json={"amount": 5, "date": "2025-01-01", "category_id": stocks}, headers=auth)
+    db.expire_all()
+    assert db.get(models.InvestmentRanking, owner_id).pseudonym == crud.investment_pseudonym(owner_id, 5)
+
+    db.delete(db.get(models.InvestmentRanking, owner_id))
+    db.commit()
+    crud.refresh_investment_ranks(db, recompute_totals=True)
+    names = dict(db.query(models.InvestmentRanking.owner_id, models.InvestmentRanking.pseudonym))
+    assert names == {bob: crud.investment_pseudonym(owner_id), owner_id: crud.investment_pseudonym(owner_id, 5)}
@@ -0,0 +1,41 @@
+"""Import parsing: malformed rows are reported per line instead of failing the request."""
+import io
+import json
+import re
+
+import pytest
+
+from app import imports
+
+
+@pytest.mark.parametrize("raw, message", [
+    ({"type": 1, "date": "2025-01-01", "amount": 1}, "type must be 'expense' or 'income'"),
+    ({"type": ["expense"], "date": "2025-01-01", "amount": 1}, "type must be 'expense' or 'income'"),
+    ({"type": "expense", "date": 5, "amount": 1}, "date must be YYYY-MM-DD"),
+    ({"type": "expense", "date": "2025-01-01", "amount": [1]}, "amount must be a number"),
+    (["expense"], "row must be an object"),
+])
+def test_clean_row_rejects_malformed_values(raw, message):
+    with pytest.raises(ValueError, match=re.escape(message)):
+        imports.clean_row(raw)
+
+
+def test_clean_row_coerces_scalars():
+    row = imports.clean_row({"type": " Expense ", "date": "2025-01-01", "amount": "2.5", "category": 7, "description": 12})
+    assert row == {"kind": "expense", "date": row["date"], "amount": 2.5, "description": "12", "category": "7"}
+
+
+def test_import_reports_bad_rows_per_line(client, auth):
+    lines = [
+        json.dumps({"type": "expense", "date": "2025-01-01", "amount": 3, "category": "Food"}),
+        json.dumps({"type": 1, "date": "2025-01-01", "amount": 3}),
+        "{not json",
+        json.dumps({"type": "income", "date": "2025-01-02", "amount": 10}),
+    ]
+    body = "\n".join(lines).encode()
+    response = client.post("/finances/import?format=jsonl", files={"file": ("rows.jsonl", io.BytesIO(body))}, headers=auth)
+    assert response.status_code == 200, response.text
+    result = response.json()
+    assert (result["imported_expenses"], result["imported_incomes"], result["failed"]) == (1, 1, 2)
+    assert [error["line"] for error in result["errors"]] == [2, 3]
+    assert result["errors"][0]["error"] == "type must be 'expense' or 'income'"
@@ -0,0 +1,20 @@
+"""Job queue: stale jobs whose worker died are retried a limited number of times."""
+from datetime import datetime, timedelta
+
+from app import crud, jobs, models
+
+
+def test_stale_job_fails_after_max_attempts(db, owner_id):
+    job_id = crud.create_job(db, owner_id, "rebuild_rollups").id
+    for attempt in range(1, 4):
+        job = jobs.claim(db)
+        assert job.id == job_id and job.attempts == attempt
+        # Воркер "впав" посеред задачі
+        job.started_at = datetime.utcnow() - timedelta(hours=2)
+        db.commit()
+        assert jobs.requeue_stale(db, timeout=3600, max_attempts=3) == ((1, 0) if attempt < 3 else (0, 1))
+
+    db.expire_all()
+    job = db.get(models.Job, job_id)
+    assert job.status == "failed" and job.error == "Abandoned after 3 attempts" and job.finished_at is not None
+    assert jobs.claim(db) is None